@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Agent Registry (memoized builders and a warm agent pool)
+Agents are built lazily on first use and pooled per (builder, arguments) — in practice per
+(builder, policy pack, model id) — so batch and service runs in one process stop rebuilding
+every agent and its model client on each job.
+
+agno agents keep per-run state and are not safe to share between threads, so instances are
+leased rather than shared: `lease` hands out an idle instance (or builds one), and on return
+the per-run state (session id/state, cached session, team binding, pinned datetime, request
+params) is restored to what the builder produced before the instance goes back to the pool.
+An instance whose lease ends in an error — e.g. a timed-out stage whose call may still be in
+flight on an abandoned thread — is dropped instead of pooled, and so is one whose call is still
+running after a hedged duplicate won (see llm_runtime.py). `checkout` leases a group of
+agents (team members) for the length of one run.
+"""
+
+import os, threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+from llm_runtime import call_stats
+
+AGENT_POOL_ENABLED = os.getenv("AGENT_POOL", "1").lower() in ("1", "true", "yes", "on")
+# Idle instances kept per key; extra instances returned beyond this are dropped.
+AGENT_POOL_MAX_IDLE = int(os.getenv("AGENT_POOL_MAX_IDLE", "8"))
+
+# Attributes agno or this pipeline change while running an agent; restored on every return.
+RESET_ATTRIBUTES = (
+    "session_id",
+    "session_state",
+    "_cached_session",
+    "_cached_session_db",
+    "team_id",
+    "_team",
+    "datetime_format",
+    "additional_context",
+)
+
+_MISSING = object()
+
+
+def _key(builder: Callable, args: tuple, kwargs: dict) -> Tuple:
+    return (builder, args, tuple(sorted(kwargs.items())))
+
+
+class AgentRegistry:
+    """Process-wide pool of built agents, keyed by builder and builder arguments."""
+
+    def __init__(self, enabled: bool = AGENT_POOL_ENABLED, max_idle: int = AGENT_POOL_MAX_IDLE):
+        self.enabled = enabled
+        self.max_idle = max_idle
+        self.builds: Dict[Tuple, int] = {}
+        self.reuses: Dict[Tuple, int] = {}
+        self.discards = 0
+        self._idle: Dict[Tuple, List[Any]] = {}
+        self._snapshots: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # ---------- build / reset ----------
+
+    def _build(self, key: Tuple, builder: Callable, args: tuple, kwargs: dict) -> Any:
+        agent = builder(*args, **kwargs)
+        snapshot = {name: getattr(agent, name, _MISSING) for name in RESET_ATTRIBUTES}
+        model = getattr(agent, "model", None)
+        snapshot["model.request_params"] = dict(getattr(model, "request_params", None) or {}) or None
+        with self._lock:
+            self.builds[key] = self.builds.get(key, 0) + 1
+            self._snapshots[id(agent)] = snapshot
+        return agent
+
+    def reset(self, agent: Any):
+        """Restore the per-run state of a pooled agent to what its builder produced."""
+        snapshot = self._snapshots.get(id(agent))
+        if snapshot is None:
+            return
+        for name in RESET_ATTRIBUTES:
+            value = snapshot[name]
+            if value is not _MISSING:
+                setattr(agent, name, value)
+        model = getattr(agent, "model", None)
+        if model is not None and hasattr(model, "request_params"):
+            params = snapshot["model.request_params"]
+            model.request_params = dict(params) if params else None
+
+    # ---------- pool ----------
+
+    def acquire(self, builder: Callable, *args, **kwargs) -> Any:
+        """An idle pooled instance for this builder and arguments, or a freshly built one."""
+        key = _key(builder, args, kwargs)
+        if self.enabled:
+            with self._lock:
+                idle = self._idle.get(key)
+                if idle:
+                    self.reuses[key] = self.reuses.get(key, 0) + 1
+                    return idle.pop()
+        return self._build(key, builder, args, kwargs)
+
+    def release(self, agent: Any, builder: Callable, *args, discard: bool = False, **kwargs):
+        """Return an acquired agent to the pool, or drop it (`discard`, still in flight, pool off or full)."""
+        key = _key(builder, args, kwargs)
+        discard = discard or call_stats.in_flight(agent)
+        if not discard and self.enabled:
+            self.reset(agent)
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle:
+                    idle.append(agent)
+                    return
+        with self._lock:
+            self._snapshots.pop(id(agent), None)
+            if discard:
+                self.discards += 1
+
+    @contextmanager
+    def lease(self, builder: Callable, *args, **kwargs):
+        """Exclusive use of one agent for the `with` block; pooled again afterwards unless the block raised."""
+        agent = self.acquire(builder, *args, **kwargs)
+        try:
+            yield agent
+        except BaseException:
+            self.release(agent, builder, *args, discard=True, **kwargs)
+            raise
+        self.release(agent, builder, *args, **kwargs)
+
+    @contextmanager
+    def checkout(self):
+        """Lease several agents for one run: `with registry.checkout() as agents: agents.get(build_x, model)`."""
+        checkout = AgentCheckout(self)
+        try:
+            yield checkout
+        except BaseException:
+            checkout.close(discard=True)
+            raise
+        checkout.close()
+
+    def warm(self, builder: Callable, *args, count: int = 1, **kwargs):
+        """Pre-build `count` idle instances so the first jobs of a batch or service start warm."""
+        key = _key(builder, args, kwargs)
+        built = [self._build(key, builder, args, kwargs) for _ in range(count)]
+        for agent in built:
+            self.release(agent, builder, *args, **kwargs)
+
+    def clear(self):
+        """Drop every idle instance (e.g. after changing models or policy packs at runtime)."""
+        with self._lock:
+            for idle in self._idle.values():
+                for agent in idle:
+                    self._snapshots.pop(id(agent), None)
+            self._idle.clear()
+
+    def summary(self) -> str:
+        built = sum(self.builds.values())
+        reused = sum(self.reuses.values())
+        idle = sum(len(v) for v in self._idle.values())
+        if not self.enabled:
+            return f"Agent pool: off ({built} agent(s) built)."
+        return f"Agent pool: {built} built, {reused} reused, {self.discards} dropped after errors or with calls in flight, {idle} idle across {len(self._idle)} key(s)."
+
+
+class AgentCheckout:
+    """Agents leased for one run; `get` returns the same instance for repeated requests within the run."""
+
+    def __init__(self, registry: AgentRegistry):
+        self.registry = registry
+        self._leased: Dict[Tuple, Tuple[Any, Callable, tuple, dict]] = {}
+
+    def get(self, builder: Callable, *args, **kwargs) -> Any:
+        key = _key(builder, args, kwargs)
+        if key not in self._leased:
+            self._leased[key] = (self.registry.acquire(builder, *args, **kwargs), builder, args, kwargs)
+        return self._leased[key][0]
+
+    def close(self, discard: bool = False):
+        for agent, builder, args, kwargs in self._leased.values():
+            self.registry.release(agent, builder, *args, discard=discard, **kwargs)
+        self._leased.clear()
+
+
+registry = AgentRegistry()
@@ -1,7 +1,7 @@
 # === agents_accessibility.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 from policy_packs import inject_pack_context
 
 import dotenv, os
@@ -17,11 +17,11 @@ _base_instructions = [
     "Be concrete, testable, and concise. No generic platitudes.",
 ]
 
-def build_accessibility_agent(active_pack_name: str) -> Agent:
+def build_accessibility_agent(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="Accessibility Compliance Agent (US)",
         role="Produces accessibility checklists and DoD for 508 or WCAG 2.2 AA.",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_base_instructions, active_pack_name),
         add_datetime_to_context=True,
@@ -1,7 +1,12 @@
 # === agents_compliance_red_team.py ===
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field
+
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
+from json_repair import parse_model
+from llm_runtime import run_agent
 from policy_packs import inject_pack_context
 
 import dotenv, os
@@ -19,12 +24,55 @@ _base_instructions = [
     "Prioritize issues that would cause evaluator downgrades or compliance rejection.",
 ]
 
-def build_compliance_red_team(active_pack_name: str) -> Agent:
+def build_compliance_red_team(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="Compliance Red Team (US)",
         role="Adversarial gap hunter against requirements and policy pack.",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_base_instructions, active_pack_name),
         add_datetime_to_context=True,
     )
+
+
+class RedTeamIssue(BaseModel):
+    section: Optional[str] = None
+    finding: str
+    impact: Optional[str] = None
+    fix: Optional[str] = None
+    owner: Optional[str] = None
+    artifact: Optional[str] = None
+    priority: Optional[str] = None
+
+class RedTeamIssues(BaseModel):
+    issues: List[RedTeamIssue] = Field(default_factory=list)
+
+
+def _coerce_issues(data: Any) -> Any:
+    """Accept a bare list or an {"issues": [...]} wrapper; stringify numeric fields and drop non-object items."""
+    if isinstance(data, dict) and "finding" not in data:
+        data = data.get("issues")
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return {"issues": []}
+    issues = []
+    for item in data:
+        if isinstance(item, dict):
+            # Models sometimes emit section numbers or priorities as numbers; the schema keeps strings.
+            coerced = {k: (str(v) if v is not None and not isinstance(v, str) else v) for k, v in item.items()}
+            issues.append({**coerced, "finding": coerced.get("finding") or ""})
+    return {"issues": issues}
+
+
+def run_compliance_red_team(agent: Agent, requirements_text: str, draft_text: str) -> List[RedTeamIssue]:
+    prompt = f"""
+BUYER REQUIREMENTS:
+{requirements_text}
+
+CURRENT PROPOSAL DRAFT:
+{draft_text}
+"""
+    raw = run_agent(agent, prompt).content
+    # Repairs fences, prose, trailing commas and truncation locally; re-asks only fields that fail validation.
+    return parse_model(agent, raw, RedTeamIssues, coerce=_coerce_issues).issues
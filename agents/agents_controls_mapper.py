@@ -1,7 +1,7 @@
 # === agents_controls_mapper.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 from policy_packs import inject_pack_context
 
 import dotenv, os
@@ -17,11 +17,11 @@ _base_instructions = [
     "Keep mappings specific and auditable (e.g., 'DBA → AU-12: log review weekly; evidence: SIEM report IDs').",
 ]
 
-def build_controls_mapper(active_pack_name: str) -> Agent:
+def build_controls_mapper(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="Controls Mapper (US)",
         role="Maps staffing to applicable controls based on US policy pack.",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_base_instructions, active_pack_name),
         add_datetime_to_context=True,
@@ -1,9 +1,9 @@
 from agno.agent import Agent
 from agno.models.anthropic import Claude
-from agno.models.openai import OpenAIChat
 from agno.team.team import Team
 from agno.tools.duckduckgo import DuckDuckGoTools
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 # from agno.tools.yfinance import YFinanceTools
 
 import dotenv, os
@@ -49,7 +49,7 @@ llm_model = "gpt-5-nano"
 outlining_compliance_agent = Agent(
     name="Outlining & Compliance Matrix Agent",
     role="Extracts a detailed outline and compliance matrix from RFPs, mapping requirements to sections and ensuring all compliance items are captured. Outputs structured tables and summaries.",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     tools=[ReasoningTools(add_instructions=True)],
     instructions=[
         "Generate a hierarchical outline of the RFP sections and subsections.",
@@ -65,7 +65,7 @@ outlining_compliance_agent = Agent(
 english_agent = Agent(
     name="English Agent",
     role="Reviews proposal sections for clarity, correctness, grammar, tone, and logical flow. Provides feedback and suggested edits to ensure professional, consistent, and persuasive writing.",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     tools=[ReasoningTools(add_instructions=True)],
     instructions=[
         "Read the provided proposal section(s) and check for grammar, spelling, and clarity.",
@@ -81,7 +81,7 @@ english_agent = Agent(
 tone_agent = Agent(
     name="Tone Agent",
     role="Ensures the proposal maintains a consistent, professional, and persuasive tone and style throughout all sections. Harmonizes voice, formality, and word choice.",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     tools=[ReasoningTools(add_instructions=True)],
     instructions=[
         "Review the provided proposal sections for tone, style, and voice consistency.",
@@ -97,7 +97,7 @@ tone_agent = Agent(
 proposal_scoring_agent = Agent(
     name="Proposal Scoring Agent",
     role="Scores the proposal against the RFP requirements and industry best practices. Provides a detailed breakdown of strengths, weaknesses, and actionable recommendations.",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     tools=[ReasoningTools(add_instructions=True)],
     instructions=[
         "Evaluate the proposal section(s) for compliance, completeness, clarity, and competitiveness.",
@@ -113,7 +113,7 @@ proposal_scoring_agent = Agent(
 rfp_analyzer_agent = Agent(
     name="RFP Analyzer Agent",
     role="Extracts structured information from RFP text, including customer, scope, tasks, requirements, and key dates. Outputs a JSON-like structure for downstream processing.",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     tools=[ReasoningTools(add_instructions=True)],
     instructions=[
         "Analyze the provided RFP text and extract the following:",
@@ -149,7 +149,7 @@ rfp_analyzer_agent = Agent(
 technology_agent = Agent(
     name="Technology Agent",
     role="Research and summarize technologies relevant to the RFP, including recent trends, standards, and best practices. Provide concise, actionable insights with sources.",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     tools=[DuckDuckGoTools()],
     instructions=[
         "Focus on technologies, frameworks, and standards directly relevant to the RFP.",
@@ -163,7 +163,7 @@ technology_agent = Agent(
 section_writing_agent = Agent(
     name="Section Writing Agent",
     role="Drafts complete proposal sections based on the provided outline, compliance matrix, and technology research. Integrates all requirements, best practices, and recommendations into clear, persuasive, and compliant proposal text.",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     tools=[ReasoningTools(add_instructions=True)],
     instructions=[
         "For each section in the provided outline, write a detailed, professional draft that:",
@@ -185,7 +185,7 @@ section_writing_agent = Agent(
 proposal_outline_agent = Agent(
     name="Proposal Outline Agent",
     role="Generates a detailed, hierarchical proposal outline based on the structured RFP analysis, ensuring all customer requirements and best practices are addressed in the proposal structure.",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     tools=[ReasoningTools(add_instructions=True)],
     instructions=[
         "Read the structured RFP analysis (JSON) from the RFP Analyzer Agent.",
@@ -201,7 +201,7 @@ proposal_outline_agent = Agent(
 maestor_team = Team(
     name="Maestor Orchestration Team",
     mode="coordinate",
-    model=OpenAIChat(id=llm_model),
+    model=openai_model(llm_model),
     members=[
         rfp_analyzer_agent,  # 1. Analyze RFP and extract structured info
         proposal_outline_agent,  # 2. Generate detailed proposal outline from RFP analysis
@@ -1,7 +1,7 @@
 # === agents_english.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 import os
 
 llm_model = os.getenv("LLM_MODEL", "gpt-5")
@@ -18,16 +18,32 @@ _ENGLISH_AGENT_INSTRUCTIONS = [
 ]
 
 
-def build_english_agent(model_id: str | None = None) -> Agent:
-    """Builds the English language review agent."""
+_SECTION_REVIEW_OUTPUT_INSTRUCTION = (
+    "You receive ONE proposal section and the proposal STYLE SHEET. Apply the style sheet's voice, tense, terminology, "
+    "and acronym rules exactly so every section reads the same. Return the full revised section markdown, then a line "
+    "containing only '=== EDIT NOTES ===', then at most three short bullets on the most important edits and remaining risks."
+)
+
+
+def build_english_agent(model_id: str | None = None, per_section: bool = False) -> Agent:
+    """Builds the English language review agent.
+
+    With `per_section=True` the agent reviews one section at a time against a shared style sheet.
+    """
+    instructions = _ENGLISH_AGENT_INSTRUCTIONS
+    if per_section:
+        instructions = [
+            _SECTION_REVIEW_OUTPUT_INSTRUCTION if i.startswith("Output the revised text followed by") else i
+            for i in _ENGLISH_AGENT_INSTRUCTIONS
+        ]
     return Agent(
         name="English Agent",
         role=(
             "Reviews proposal sections for clarity, correctness, grammar, tone, and logical flow. "
             "Provides feedback and suggested edits to ensure professional, consistent, and persuasive writing."
         ),
-        model=OpenAIChat(id=model_id or llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
-        instructions=_ENGLISH_AGENT_INSTRUCTIONS,
+        instructions=instructions,
         add_datetime_to_context=True,
     )
@@ -9,8 +9,12 @@ from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
+from json_repair import parse_model
+from llm_runtime import run_agent
+from budget import BudgetExhausted
+from pipeline import StageCancelled
 from policy_packs import inject_pack_context
 
 class EvidenceInput(BaseModel):
@@ -44,73 +48,76 @@ _BASE_INSTRUCTIONS = [
     "Templates must be brief outlines, not full documents; use neutral language.",
 ]
 
-def build_evidence_packager(active_pack_name: str) -> Agent:
+def build_evidence_packager(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="Evidence & Artifact Packager (US, Pack-Aware)",
         role="Curates proof kit and insertion plan for any US proposal.",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_BASE_INSTRUCTIONS, active_pack_name),
         add_datetime_to_context=True,
     )
 
+def _coerce_pack(data: Any) -> Any:
+    """Map the shapes the model tends to drift into (dict gaps/summary, missing artifact keys) onto EvidencePack."""
+    if not isinstance(data, dict):
+        return data
+    validated_data = {
+        "artifacts": [],
+        "insertion_map": data.get("insertion_map", {}),
+        "gaps": [],
+        "summary": ""
+    }
+
+    # Fix artifacts structure
+    for artifact in data.get("artifacts", []):
+        if isinstance(artifact, dict):
+            validated_artifact = {
+                "name": artifact.get("name", "Unnamed artifact"),
+                "required": artifact.get("required", False),
+                "status": artifact.get("status", "Missing"),
+                "placement_hint": artifact.get("placement_hint", "To be determined"),
+                "template_stub": artifact.get("template_stub", ""),
+                "evidence_tags": artifact.get("evidence_tags", [])
+            }
+            # Ensure evidence_tags is a list of strings
+            if not isinstance(validated_artifact["evidence_tags"], list):
+                validated_artifact["evidence_tags"] = []
+            validated_data["artifacts"].append(validated_artifact)
+
+    # Fix gaps structure - convert dicts to strings
+    for gap in data.get("gaps", []):
+        if isinstance(gap, dict):
+            # Extract artifact name and details
+            artifact_name = gap.get("artifact", "")
+            details = gap.get("details", gap.get("description", str(gap)))
+            formatted_gap = f"{artifact_name}: {details}" if artifact_name else details
+            validated_data["gaps"].append(formatted_gap)
+        else:
+            validated_data["gaps"].append(str(gap))
+
+    # Fix summary structure
+    summary_data = data.get("summary", {})
+    if isinstance(summary_data, dict):
+        # Extract key information from the summary dict
+        pack = summary_data.get("pack", "")
+        alignment = summary_data.get("alignment", "")
+        artifacts_count = len(validated_data["artifacts"])
+        gaps_count = len(validated_data["gaps"])
+        validated_data["summary"] = f"Evidence pack for {pack}: {artifacts_count} artifacts, {gaps_count} gaps. Alignment: {alignment}"
+    else:
+        validated_data["summary"] = str(summary_data) if summary_data else "Evidence packaging completed"
+
+    return validated_data
+
 def run_evidence_packager(agent: Agent, payload: EvidenceInput) -> EvidencePack:
     try:
-        raw = agent.run("Return ONLY JSON.\n" + json.dumps(payload.model_dump(), ensure_ascii=False)).content.strip()
-        if "```" in raw:
-            raw = raw.split("```")[-2] if "```json" in raw else raw.split("```")[-2]
-        data = json.loads(raw)
-        
-        # Validate and fix the data structure
-        validated_data = {
-            "artifacts": [],
-            "insertion_map": data.get("insertion_map", {}),
-            "gaps": [],
-            "summary": ""
-        }
-        
-        # Fix artifacts structure
-        for artifact in data.get("artifacts", []):
-            if isinstance(artifact, dict):
-                validated_artifact = {
-                    "name": artifact.get("name", "Unnamed artifact"),
-                    "required": artifact.get("required", False),
-                    "status": artifact.get("status", "Missing"),
-                    "placement_hint": artifact.get("placement_hint", "To be determined"),
-                    "template_stub": artifact.get("template_stub", ""),
-                    "evidence_tags": artifact.get("evidence_tags", [])
-                }
-                # Ensure evidence_tags is a list of strings
-                if not isinstance(validated_artifact["evidence_tags"], list):
-                    validated_artifact["evidence_tags"] = []
-                validated_data["artifacts"].append(validated_artifact)
-        
-        # Fix gaps structure - convert dicts to strings
-        for gap in data.get("gaps", []):
-            if isinstance(gap, dict):
-                # Extract artifact name and details
-                artifact_name = gap.get("artifact", "")
-                details = gap.get("details", gap.get("description", str(gap)))
-                formatted_gap = f"{artifact_name}: {details}" if artifact_name else details
-                validated_data["gaps"].append(formatted_gap)
-            else:
-                validated_data["gaps"].append(str(gap))
-        
-        # Fix summary structure
-        summary_data = data.get("summary", {})
-        if isinstance(summary_data, dict):
-            # Extract key information from the summary dict
-            pack = summary_data.get("pack", "")
-            alignment = summary_data.get("alignment", "")
-            artifacts_count = len(validated_data["artifacts"])
-            gaps_count = len(validated_data["gaps"])
-            validated_data["summary"] = f"Evidence pack for {pack}: {artifacts_count} artifacts, {gaps_count} gaps. Alignment: {alignment}"
-        else:
-            validated_data["summary"] = str(summary_data) if summary_data else "Evidence packaging completed"
-        
-        return EvidencePack.model_validate(validated_data)
-        
-    except json.JSONDecodeError as e:
+        raw = run_agent(agent, "Return ONLY JSON.\n" + json.dumps(payload.model_dump(), ensure_ascii=False)).content
+        return parse_model(agent, raw, EvidencePack, coerce=_coerce_pack)
+
+    except (StageCancelled, BudgetExhausted):
+        raise
+    except ValueError as e:
         print(f"⚠️  JSON decode error in evidence packager: {e}")
         return EvidencePack(
             artifacts=[],
@@ -9,8 +9,12 @@ from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
+from json_repair import parse_model
+from llm_runtime import run_agent
+from budget import BudgetExhausted
+from pipeline import StageCancelled
 from policy_packs import inject_pack_context
 
 class Glossary(BaseModel):
@@ -50,73 +54,76 @@ _BASE_INSTRUCTIONS = [
     "OUTPUT JSON ONLY: {normalized_citations:[], redlines:[], unknown_refs:[], terminology_notes:[], summary}",
 ]
 
-def build_factcheck_verifier(active_pack_name: str) -> Agent:
+def build_factcheck_verifier(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="Fact-Check & Citation Verifier (US, Pack-Aware)",
         role="Normalizes references and terminology; proposes redlines for clarity and consistency.",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_BASE_INSTRUCTIONS, active_pack_name),
         add_datetime_to_context=True,
     )
 
+def _coerce_report(data: Any) -> Any:
+    """Map the shapes the model tends to drift into (dict citations/notes/refs, `location`) onto FactCheckReport."""
+    if not isinstance(data, dict):
+        return data
+    validated_data = {
+        "normalized_citations": [],
+        "redlines": [],
+        "unknown_refs": [],
+        "terminology_notes": [],
+        "summary": data.get("summary", "Fact-check completed with validation issues.")
+    }
+
+    # Fix redlines structure
+    for redline in data.get("redlines", []):
+        if isinstance(redline, dict):
+            validated_redline = {
+                "location_hint": redline.get("location", redline.get("location_hint", "Unknown location")),
+                "current_text": redline.get("current_text", ""),
+                "proposed_text": redline.get("proposed_text", ""),
+                "reason": redline.get("reason", "Validation issue")
+            }
+            validated_data["redlines"].append(validated_redline)
+
+    # Fix unknown_refs structure
+    for ref in data.get("unknown_refs", []):
+        if isinstance(ref, dict):
+            validated_data["unknown_refs"].append(ref.get("reference", str(ref)))
+        else:
+            validated_data["unknown_refs"].append(str(ref))
+
+    # Fix normalized_citations structure - convert dicts to strings
+    for citation in data.get("normalized_citations", []):
+        if isinstance(citation, dict):
+            # Extract the original text or format it nicely
+            original = citation.get("original", str(citation))
+            validated_data["normalized_citations"].append(original)
+        else:
+            validated_data["normalized_citations"].append(str(citation))
+
+    # Fix terminology_notes structure - convert dicts to strings
+    for note in data.get("terminology_notes", []):
+        if isinstance(note, dict):
+            # Extract the term and note content
+            term = note.get("term", "")
+            content = note.get("note", note.get("content", str(note)))
+            formatted_note = f"{term}: {content}" if term else content
+            validated_data["terminology_notes"].append(formatted_note)
+        else:
+            validated_data["terminology_notes"].append(str(note))
+
+    return validated_data
+
 def run_factcheck_verifier(agent: Agent, payload: FactCheckInput) -> FactCheckReport:
     try:
-        raw = agent.run("Return ONLY JSON.\n" + json.dumps(payload.model_dump(), ensure_ascii=False)).content.strip()
-        if "```" in raw:
-            raw = raw.split("```")[-2] if "```json" in raw else raw.split("```")[-2]
-        data = json.loads(raw)
-        
-        # Validate and fix the data structure
-        validated_data = {
-            "normalized_citations": data.get("normalized_citations", []),
-            "redlines": [],
-            "unknown_refs": [],
-            "terminology_notes": data.get("terminology_notes", []),
-            "summary": data.get("summary", "Fact-check completed with validation issues.")
-        }
-        
-        # Fix redlines structure
-        for redline in data.get("redlines", []):
-            if isinstance(redline, dict):
-                validated_redline = {
-                    "location_hint": redline.get("location", redline.get("location_hint", "Unknown location")),
-                    "current_text": redline.get("current_text", ""),
-                    "proposed_text": redline.get("proposed_text", ""),
-                    "reason": redline.get("reason", "Validation issue")
-                }
-                validated_data["redlines"].append(validated_redline)
-        
-        # Fix unknown_refs structure
-        for ref in data.get("unknown_refs", []):
-            if isinstance(ref, dict):
-                validated_data["unknown_refs"].append(ref.get("reference", str(ref)))
-            else:
-                validated_data["unknown_refs"].append(str(ref))
-        
-        # Fix normalized_citations structure - convert dicts to strings
-        for citation in data.get("normalized_citations", []):
-            if isinstance(citation, dict):
-                # Extract the original text or format it nicely
-                original = citation.get("original", str(citation))
-                validated_data["normalized_citations"].append(original)
-            else:
-                validated_data["normalized_citations"].append(str(citation))
-        
-        # Fix terminology_notes structure - convert dicts to strings
-        for note in data.get("terminology_notes", []):
-            if isinstance(note, dict):
-                # Extract the term and note content
-                term = note.get("term", "")
-                content = note.get("note", note.get("content", str(note)))
-                formatted_note = f"{term}: {content}" if term else content
-                validated_data["terminology_notes"].append(formatted_note)
-            else:
-                validated_data["terminology_notes"].append(str(note))
-        
-        return FactCheckReport.model_validate(validated_data)
-        
-    except json.JSONDecodeError as e:
+        raw = run_agent(agent, "Return ONLY JSON.\n" + json.dumps(payload.model_dump(), ensure_ascii=False)).content
+        return parse_model(agent, raw, FactCheckReport, coerce=_coerce_report)
+
+    except (StageCancelled, BudgetExhausted):
+        raise
+    except ValueError as e:
         print(f"⚠️  JSON decode error in fact-check: {e}")
         return FactCheckReport(
             normalized_citations=[],
@@ -1,7 +1,7 @@
 # === agents_outlining_compliance.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 import os
 
 llm_model = os.getenv("LLM_MODEL", "gpt-5")
@@ -23,7 +23,7 @@ def build_outlining_compliance_agent(model_id: str | None = None) -> Agent:
             "Extracts a detailed outline and compliance matrix from RFPs, mapping requirements "
             "to sections and ensuring all compliance items are captured. Outputs structured compliance matrix."
         ),
-        model=OpenAIChat(id=model_id or llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=_OUTLINING_COMPLIANCE_INSTRUCTIONS,
         add_datetime_to_context=True,
@@ -24,9 +24,11 @@ from typing import List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel, Field, validator
 
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 
+from json_repair import parse_model
+from llm_runtime import run_agent
 from policy_packs import inject_pack_context
 
 # -------------------------
@@ -99,12 +101,12 @@ _BASE_INSTRUCTIONS = [
     "Use short, high-signal phrasing; avoid confidential details.",
 ]
 
-def build_past_performance_weaver(active_pack_name: str) -> Agent:
+def build_past_performance_weaver(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="Past Performance Weaver (US, Pack-Aware)",
         role=("Selects and rewrites short past-performance vignettes; places them in the most relevant sections; "
               "outputs a vignette summary table; never fabricates client identities."),
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_BASE_INSTRUCTIONS, active_pack_name),
         add_datetime_to_context=True,
@@ -116,7 +118,7 @@ def build_past_performance_weaver(active_pack_name: str) -> Agent:
 
 def run_past_performance_weaver(agent: Agent, payload: PastPerfWeaverInput) -> PastPerfWeaverOutput:
     """
-    Serializes inputs, runs the agent, parses JSON, validates with Pydantic.
+    Serializes inputs, runs the agent, parses JSON (repaired locally where possible), validates with Pydantic.
     """
     import json
     prompt = {
@@ -125,26 +127,13 @@ def run_past_performance_weaver(agent: Agent, payload: PastPerfWeaverInput) -> P
         "LIBRARY": [pp.model_dump() for pp in payload.library],
         "MAX_SNIPPETS_PER_SECTION": payload.max_snippets_per_section,
     }
-    raw = agent.run(
+    raw = run_agent(
+        agent,
         "Return ONLY the JSON as specified. No prose.\n"
         + json.dumps(prompt, ensure_ascii=False, indent=2)
     ).content
 
-    # Normalize common code-fence wrappers
-    raw = raw.strip()
-    if "```json" in raw:
-        raw = raw.split("```json", 1)[-1].split("```", 1)[0].strip()
-    elif "```" in raw:
-        raw = raw.split("```", 1)[-1].split("```", 1)[0].strip()
-
-    data = __safe_json_loads(raw)
-    return PastPerfWeaverOutput.model_validate(data)
-
-def __safe_json_loads(raw: str) -> Dict[str, Any]:
-    import json
     try:
-        return json.loads(raw)
-    except Exception as e:
-        # Give a clearer error with preview
-        preview = raw[:500].replace("\n", " ")
-        raise ValueError(f"PastPerformanceWeaver JSON parse failed: {e}; preview={preview}")
+        return parse_model(agent, raw, PastPerfWeaverOutput)
+    except ValueError as e:
+        raise ValueError(f"PastPerformanceWeaver JSON parse failed: {e}")
@@ -1,7 +1,7 @@
 # === agents_proposal_outline.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 import os
 
 llm_model = os.getenv("LLM_MODEL", "gpt-5")
@@ -23,7 +23,7 @@ def build_proposal_outline_agent(model_id: str | None = None) -> Agent:
             "Generates a detailed, hierarchical proposal outline based on the structured RFP analysis, "
             "ensuring all customer requirements and best practices are addressed in the proposal structure."
         ),
-        model=OpenAIChat(id=model_id or llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=_PROPOSAL_OUTLINE_INSTRUCTIONS,
         add_datetime_to_context=True,
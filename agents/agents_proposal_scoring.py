@@ -1,7 +1,7 @@
 # === agents_proposal_scoring.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 import os
 
 llm_model = os.getenv("LLM_MODEL", "gpt-5")
@@ -23,7 +23,7 @@ def build_proposal_scoring_agent(model_id: str | None = None) -> Agent:
             "Scores the proposal against the RFP requirements and industry best practices. "
             "Provides a detailed breakdown of strengths, weaknesses, and actionable recommendations."
         ),
-        model=OpenAIChat(id=model_id or llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=_PROPOSAL_SCORING_INSTRUCTIONS,
         add_datetime_to_context=True,
@@ -9,8 +9,10 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
+from json_repair import parse_model
+from llm_runtime import run_agent
 from policy_packs import inject_pack_context
 
 # ---------- Schemas ----------
@@ -56,11 +58,11 @@ _BASE_INSTRUCTIONS = [
     "SCORING HEURISTIC: Start at 100; -15 per Critical, -7 per Major, -2 per Minor (floor 0); PASS requires 0 Critical and score≥85.",
 ]
 
-def build_qa_gatekeeper(active_pack_name: str) -> Agent:
+def build_qa_gatekeeper(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="QA Gatekeeper (US, Pack-Aware)",
         role="Final automated checklist and quality gate for any US proposal.",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_BASE_INSTRUCTIONS, active_pack_name),
         add_datetime_to_context=True,
@@ -68,10 +70,12 @@ def build_qa_gatekeeper(active_pack_name: str) -> Agent:
 
 # ---------- Runner ----------
 
+# Fields that stay the same across refinement passes go first, so repeated QA calls share a prompt prefix.
+_STABLE_FIELDS = ("active_pack_name", "compliance_crosswalk", "section_targets", "artifact_presence")
+
 def run_qa_gatekeeper(agent: Agent, payload: QAInputs) -> QAReport:
-    prompt = payload.model_dump()
-    raw = agent.run("Return ONLY JSON.\n" + json.dumps(prompt, ensure_ascii=False)).content.strip()
-    if "```" in raw:
-        raw = raw.split("```")[-2] if "```json" in raw else raw.split("```")[-2]
-    data = json.loads(raw)
-    return QAReport.model_validate(data)
+    data = payload.model_dump()
+    prompt = {**{k: data[k] for k in _STABLE_FIELDS}, **data}
+    raw = run_agent(agent, "Return ONLY JSON.\n" + json.dumps(prompt, ensure_ascii=False)).content
+    # Repairs fences, prose, trailing commas and truncation locally; re-asks only fields that fail validation.
+    return parse_model(agent, raw, QAReport)
@@ -1,7 +1,7 @@
 # === agents_rfp_analyzer.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 import os
 
 llm_model = os.getenv("LLM_MODEL", "gpt-5")
@@ -37,7 +37,7 @@ def build_rfp_analyzer_agent(model_id: str | None = None) -> Agent:
             "Extracts structured information from RFP text, including customer, scope, tasks, requirements, and key dates. "
             "Outputs structured JSON for downstream processing."
         ),
-        model=OpenAIChat(id=model_id or llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=_RFP_ANALYZER_INSTRUCTIONS,
         add_datetime_to_context=True,
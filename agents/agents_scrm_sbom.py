@@ -1,7 +1,7 @@
 # === agents_scrm_sbom.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 from policy_packs import inject_pack_context
 
 import dotenv, os
@@ -19,11 +19,11 @@ _base_instructions = [
     "Be specific about artifacts (attestation templates, SBOM filenames, locations) without referencing internal secrets.",
 ]
 
-def build_scrm_sbom_agent(active_pack_name: str) -> Agent:
+def build_scrm_sbom_agent(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="SCRM & SBOM Agent (US)",
         role="Drafts SBOM/SCRM SOP and summary with correct US toggles.",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_base_instructions, active_pack_name),
         add_datetime_to_context=True,
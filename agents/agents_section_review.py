@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Style Sheet & Per-Section Review
+Derives a compact style sheet (voice, tense, terminology) once per proposal, then runs the English
+and Tone passes section by section in parallel against it, merging results back in outline order.
+"""
+
+import os, json
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field
+
+from agno.agent import Agent
+from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
+
+from agent_registry import registry
+from json_repair import parse_model
+from llm_runtime import run_agent
+from prompt_layout import layout
+from sections import fan_out, section_sort_key, split_edit_notes
+from .agents_english import build_english_agent
+from .agents_tone import build_tone_agent
+
+# ---------- Schemas ----------
+
+class StyleSheet(BaseModel):
+    voice: str                      # e.g., "Confident first-person plural ('we'), warm, evaluator-facing"
+    tense: str                      # e.g., "Future tense for commitments, past tense for proof points"
+    terminology: Dict[str, str] = Field(default_factory=dict)  # preferred term -> variants to replace
+    acronyms: Dict[str, str] = Field(default_factory=dict)     # acronym -> expansion on first use
+    avoid: List[str] = Field(default_factory=list)             # phrases/patterns to remove
+    formatting: List[str] = Field(default_factory=list)        # heading/list/table conventions
+
+# ---------- Agent ----------
+
+llm_model = os.getenv("LLM_MODEL", "gpt-5")
+
+_STYLE_SHEET_INSTRUCTIONS = [
+    "ROLE: Editorial lead setting one house style for a multi-author proposal.",
+    "Read the section openings provided and decide the single voice, tense policy, preferred terminology, "
+    "acronym expansions, phrases to avoid, and formatting conventions every section must follow.",
+    "Resolve inconsistencies you see (e.g., 'Section 508' vs '508 compliance', 'we' vs company name) by choosing one form.",
+    "Keep it compact: at most 15 terminology entries, 15 acronyms, 10 avoid items, 6 formatting rules.",
+    "OUTPUT JSON ONLY: {voice, tense, terminology:{}, acronyms:{}, avoid:[], formatting:[]}",
+]
+
+def build_style_sheet_agent(model_id: str | None = None) -> Agent:
+    return Agent(
+        name="Style Sheet Agent",
+        role="Derives a compact, shared style sheet so parallel section reviews stay consistent.",
+        model=openai_model(model_id or llm_model),
+        tools=[ReasoningTools(add_instructions=True)],
+        instructions=_STYLE_SHEET_INSTRUCTIONS,
+        add_datetime_to_context=True,
+    )
+
+# ---------- Runners ----------
+
+def derive_style_sheet(agent: Agent, sections: Dict[str, str], excerpt_chars: int = 1200) -> StyleSheet:
+    """Build the style sheet from the opening of each section rather than the full proposal."""
+    excerpts = "\n\n".join(f"[{number}]\n{text[:excerpt_chars]}" for number, text in sections.items())
+    raw = run_agent(agent, "Return ONLY JSON.\n" + excerpts).content
+    # Repairs fences, prose and truncation locally; re-asks only fields that fail validation.
+    return parse_model(agent, raw, StyleSheet)
+
+
+def format_style_sheet(sheet: StyleSheet) -> str:
+    return "STYLE SHEET:\n" + json.dumps(sheet.model_dump(), ensure_ascii=False, indent=2)
+
+
+def review_sections(
+    sections: Dict[str, str],
+    style_sheet: StyleSheet,
+    english_model_id: str | None = None,
+    tone_model_id: str | None = None,
+    max_workers: Optional[int] = None,
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Run English then Tone on every section concurrently against the shared style sheet,
+    each on its own role's model.
+
+    Returns ({section_number: revised markdown}, {section_number: edit notes}) in section order.
+    """
+    style_text = format_style_sheet(style_sheet)
+
+    def _review(item) -> Tuple[str, str]:
+        number, text = item
+        with registry.lease(build_english_agent, english_model_id, per_section=True) as english:
+            body, english_notes = split_edit_notes(run_agent(english, layout(shared=style_text, specific=f"SECTION {number}:\n{text}")).content)
+        with registry.lease(build_tone_agent, tone_model_id, per_section=True) as tone:
+            body, tone_notes = split_edit_notes(run_agent(tone, layout(shared=style_text, specific=f"SECTION {number}:\n{body or text}")).content)
+        notes = "\n".join(n for n in (english_notes, tone_notes) if n)
+        return body or text, notes
+
+    items = sorted(sections.items(), key=lambda kv: section_sort_key(kv[0]))
+    results = fan_out(items, _review, max_workers)
+    revised = {number: body for (number, _), (body, _) in zip(items, results)}
+    notes = {number: note for (number, _), (_, note) in zip(items, results) if note}
+    return revised, notes
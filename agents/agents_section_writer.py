@@ -1,8 +1,14 @@
 # === agents_section_writer.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 import os
+from typing import Dict, Optional, Sequence
+
+from agent_registry import registry
+from llm_runtime import run_agent
+from prompt_layout import layout
+from sections import fan_out, section_sort_key, subsections_of
 
 llm_model = os.getenv("LLM_MODEL", "gpt-5")
 
@@ -25,16 +31,111 @@ _SECTION_WRITING_INSTRUCTIONS = [
 ]
 
 
-def build_section_writing_agent(model_id: str | None = None) -> Agent:
-    """Builds the section writing agent."""
+_PER_SECTION_OUTPUT_INSTRUCTION = (
+    "Draft ONLY the single outline section named in the request. Subsections listed there are drafted separately: "
+    "introduce them in a sentence but do not write their content. Return the markdown for that one section "
+    "(including its Coverage Log) with no preamble or surrounding JSON."
+)
+
+
+def build_section_writing_agent(model_id: str | None = None, per_section: bool = False) -> Agent:
+    """Builds the section writing agent.
+
+    With `per_section=True` the agent drafts one outline section per call instead of returning
+    every section in a single dictionary.
+    """
+    instructions = _SECTION_WRITING_INSTRUCTIONS
+    if per_section:
+        instructions = [
+            _PER_SECTION_OUTPUT_INSTRUCTION if i.startswith("Return a dictionary") else i
+            for i in _SECTION_WRITING_INSTRUCTIONS
+        ]
     return Agent(
         name="Section Writing Agent",
         role=(
             "Drafts complete proposal sections based on the provided outline, compliance matrix, and technology research. "
             "Integrates all requirements, best practices, and recommendations into clear, persuasive, and compliant proposal text."
         ),
-        model=OpenAIChat(id=model_id or llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
-        instructions=_SECTION_WRITING_INSTRUCTIONS,
+        instructions=instructions,
         add_datetime_to_context=True,
     )
+
+
+def _adaptation_block(reference: Optional[str]) -> str:
+    if not reference:
+        return ""
+    return f"""
+APPROVED SECTION TO ADAPT (from a previous proposal for similar work):
+Keep its proven structure and wording wherever it still applies. Replace customer names, dates, page references,
+staffing and any fact that does not hold for this RFP, and make sure every compliance row above is covered.
+{reference}
+"""
+
+
+def draft_sections(
+    sections: Sequence,
+    shared_context: str,
+    model_id: str | None = None,
+    section_notes: Optional[Dict[str, str]] = None,
+    max_workers: Optional[int] = None,
+    reference_sections: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    """Draft each outline section in its own agent call, at most `max_workers` at a time.
+
+    `sections` are outline entries with section_number/title/content; `shared_context` (RFP analysis,
+    crosswalk, technology, policy-pack directives) is read-only and identical for every job, while
+    `section_notes` adds per-section material such as that section's crosswalk rows, and
+    `reference_sections` a previously approved section (see section_library.py) to adapt rather
+    than draft from scratch. Returns {section_number: markdown} ordered by section number.
+    """
+    numbers = [s.section_number for s in sections]
+    section_notes = section_notes or {}
+    reference_sections = reference_sections or {}
+
+    def _draft(section) -> str:
+        children = subsections_of(section.section_number, numbers)
+        # Shared context first and byte-identical for every section, so calls share the provider's prompt cache.
+        prompt = layout(shared=shared_context, specific=f"""
+SECTION TO DRAFT: {section.section_number} {section.title}
+Outline guidance: {section.content or "(none)"}
+Subsections drafted separately: {", ".join(children) if children else "(none)"}
+{section_notes.get(section.section_number, "")}
+""" + _adaptation_block(reference_sections.get(section.section_number)))
+        # One agent per job: agents keep per-run state and are not shared across threads.
+        with registry.lease(build_section_writing_agent, model_id, per_section=True) as agent:
+            return run_agent(agent, prompt).content
+
+    drafts = fan_out(list(sections), _draft, max_workers)
+    ordered = sorted(zip(numbers, drafts), key=lambda pair: section_sort_key(pair[0]))
+    return dict(ordered)
+
+
+def revise_sections(
+    sections: Dict[str, str],
+    issues_by_section: Dict[str, Sequence[str]],
+    shared_context: str,
+    model_id: str | None = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, str]:
+    """Rewrite only the given sections so they resolve their open red-team/QA issues."""
+    def _revise(item) -> str:
+        number, text = item
+        open_issues = "\n".join(f"- {issue}" for issue in issues_by_section.get(number, []))
+        prompt = layout(shared=shared_context, specific=f"""
+SECTION TO REVISE: {number}
+Resolve every open issue below with surgical edits, keep everything that is not implicated, and update the
+Coverage Log to record each resolution.
+
+OPEN ISSUES:
+{open_issues}
+
+CURRENT DRAFT:
+{text}
+""")
+        with registry.lease(build_section_writing_agent, model_id, per_section=True) as agent:
+            return run_agent(agent, prompt).content
+
+    items = sorted(sections.items(), key=lambda kv: section_sort_key(kv[0]))
+    return dict(zip([n for n, _ in items], fan_out(items, _revise, max_workers)))
@@ -1,10 +1,22 @@
 # === agents_technology.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.duckduckgo import DuckDuckGoTools
-import os
+from model_factory import openai_model
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel, Field
+from typing import Any, List
+import os, threading
+
+from agent_registry import registry
+from budget import BudgetExhausted
+from json_repair import parse_model
+from llm_runtime import run_agent
+from pipeline import StageCancelled, check_cancelled, current_deadline, current_stage, stage_scope
+from research_cache import ResearchCache, normalize_term, research_technologies
 
 llm_model = os.getenv("LLM_MODEL", "gpt-5")
+# Streamed analysis items per early term-extraction call (see StreamingTermExtractor).
+ANALYSIS_STREAM_BATCH = int(os.getenv("ANALYSIS_STREAM_BATCH", "8"))
 
 _TECHNOLOGY_AGENT_INSTRUCTIONS = [
     "Produce structured insights that downstream agents can slot into each outline section. Return ONLY valid JSON with a top-level key 'sections' containing an array of objects with: outline_section_id, outline_section_title, technology_theme, insight, implementation_guidance, risk_flags (array), and sources (array of {name, url}).",
@@ -13,17 +25,137 @@ _TECHNOLOGY_AGENT_INSTRUCTIONS = [
     "Cite authoritative, recent sources (≤3 years old when possible) and include accessible URLs. Do not return prose outside the JSON structure.",
 ]
 
+# Used instead of web search tools when the research has already been gathered (research_cache.py).
+_PREFETCHED_RESEARCH_INSTRUCTION = (
+    "The web research has already been done: base your insights on the RESEARCH RESULTS block in the prompt "
+    "(one entry per technology) and cite its URLs as sources. Do not invent sources that are not listed there."
+)
+
 
-def build_technology_agent(model_id: str | None = None) -> Agent:
-    """Builds the technology research agent."""
+def build_technology_agent(model_id: str | None = None, with_search: bool = True) -> Agent:
+    """Builds the technology research agent. `with_search=False` drops the web search tool and
+    expects the research results in the prompt instead."""
     return Agent(
         name="Technology Agent",
         role=(
             "Research and summarize technologies relevant to the RFP, including recent trends, standards, "
             "and best practices. Provide concise, actionable insights with sources."
         ),
-        model=OpenAIChat(id=model_id or llm_model),
-        tools=[DuckDuckGoTools()],
-        instructions=_TECHNOLOGY_AGENT_INSTRUCTIONS,
+        model=openai_model(model_id or llm_model),
+        tools=[DuckDuckGoTools()] if with_search else [],
+        instructions=_TECHNOLOGY_AGENT_INSTRUCTIONS + ([] if with_search else [_PREFETCHED_RESEARCH_INSTRUCTION]),
         add_datetime_to_context=True,
     )
+
+
+# ---------- Technology term extraction ----------
+
+class TechnologyTerms(BaseModel):
+    terms: List[str] = Field(default_factory=list)  # products, platforms, standards, frameworks
+
+
+_TECHNOLOGY_TERMS_INSTRUCTIONS = [
+    "List the specific technologies the RFP names or clearly implies: products, platforms, standards, "
+    "compliance frameworks and methodologies (e.g., 'FedRAMP', 'Informatica PowerCenter', 'Section 508', 'Kubernetes').",
+    "Use the canonical name once per technology; no generic words such as 'cloud', 'software' or 'data'.",
+    "At most 15 terms, most important first.",
+    'OUTPUT JSON ONLY: {"terms": ["..."]}',
+]
+
+
+def build_technology_terms_agent(model_id: str | None = None) -> Agent:
+    """Builds the small extractor that turns the RFP analysis into one search term per technology."""
+    return Agent(
+        name="Technology Terms Extractor",
+        role="Extracts the technologies, standards and frameworks an RFP depends on.",
+        model=openai_model(model_id or llm_model),
+        instructions=_TECHNOLOGY_TERMS_INSTRUCTIONS,
+    )
+
+
+def _coerce_terms(data: Any) -> Any:
+    """Accept a bare list, and drop the empty slots a truncated reply leaves behind."""
+    if isinstance(data, list):
+        data = {"terms": data}
+    if isinstance(data, dict) and isinstance(data.get("terms"), list):
+        data = {**data, "terms": [t for t in data["terms"] if isinstance(t, str) and t.strip()]}
+    return data
+
+
+def extract_technology_terms(agent: Agent, analysis_text: str) -> List[str]:
+    """Technology terms named in the RFP analysis; empty when no valid JSON can be recovered from the answer."""
+    raw = run_agent(agent, "Return ONLY JSON.\n" + analysis_text).content
+    try:
+        return parse_model(agent, raw, TechnologyTerms, coerce=_coerce_terms).terms
+    except ValueError as e:
+        print(f"⚠️  Technology term extraction returned invalid JSON ({e}); researching without per-term lookups.")
+        return []
+
+
+class StreamingTermExtractor:
+    """Extracts technology terms from RFP analysis tasks/requirements while the analysis is still
+    streaming (`add` is the `ask_json` on_item callback) and warms the research cache for them, so the
+    Technology stage starts with its terms known and its web lookups done."""
+
+    def __init__(self, model_id: str | None = None, cache: ResearchCache | None = None, batch_size: int = ANALYSIS_STREAM_BATCH):
+        self.model_id = model_id or llm_model
+        self.cache = cache or ResearchCache()
+        self.batch_size = max(1, batch_size)
+        self.items = 0
+        self._pending: List[str] = []
+        self._seen: set = set()
+        self._futures: list = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="early-research")
+        # Batches run under the analysis stage's cancel event and deadline.
+        self._scope = current_stage() + (current_deadline(),)
+
+    def add(self, key: str, item: Any):
+        if key not in ("tasks", "requirements") or not isinstance(item, dict):
+            return
+        line = f"- {item.get('title') or item.get('category', '')}: {item.get('description', '')}"
+        with self._lock:
+            if line in self._seen:  # a retried attempt streams the same items again
+                return
+            self._seen.add(line)
+            self.items += 1
+            self._pending.append(line)
+            if len(self._pending) >= self.batch_size:
+                self._submit()
+
+    def _submit(self):
+        batch, self._pending = self._pending, []
+        self._futures.append(self._pool.submit(self._extract, "\n".join(batch)))
+
+    def _extract(self, text: str) -> List[str]:
+        with stage_scope(*self._scope):
+            check_cancelled()
+            with registry.lease(build_technology_terms_agent, self.model_id) as agent:
+                terms = extract_technology_terms(agent, "RFP TASKS AND REQUIREMENTS (partial):\n" + text)
+            research_technologies(terms, self.cache)
+            return terms
+
+    def finish(self) -> List[str]:
+        """Wait for the outstanding batches and return the distinct terms, in discovery order."""
+        with self._lock:
+            if self._pending:
+                self._submit()
+            futures = list(self._futures)
+        terms, keys = [], set()
+        for future in futures:
+            try:
+                batch_terms = future.result()
+            except (StageCancelled, BudgetExhausted):
+                raise
+            except Exception as e:
+                print(f"⚠️  Early technology term extraction failed for one batch: {e}")
+                continue
+            for term in batch_terms:
+                key = normalize_term(term)
+                if key and key not in keys:
+                    keys.add(key)
+                    terms.append(term)
+        return terms
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,7 +1,7 @@
 # === agents_tone.py ===
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 import os
 
 llm_model = os.getenv("LLM_MODEL", "gpt-5")
@@ -16,16 +16,32 @@ _TONE_AGENT_INSTRUCTIONS = [
 ]
 
 
-def build_tone_agent(model_id: str | None = None) -> Agent:
-    """Builds the tone harmonization agent."""
+_SECTION_REVIEW_OUTPUT_INSTRUCTION = (
+    "You receive ONE proposal section and the proposal STYLE SHEET. Harmonize tone against the style sheet rather than "
+    "against other sections, which are reviewed in parallel. Return the full harmonized section markdown, then a line "
+    "containing only '=== EDIT NOTES ===', then at most three short bullets on tone/style changes and remaining rough spots."
+)
+
+
+def build_tone_agent(model_id: str | None = None, per_section: bool = False) -> Agent:
+    """Builds the tone harmonization agent.
+
+    With `per_section=True` the agent reviews one section at a time against a shared style sheet.
+    """
+    instructions = _TONE_AGENT_INSTRUCTIONS
+    if per_section:
+        instructions = [
+            _SECTION_REVIEW_OUTPUT_INSTRUCTION if i.startswith("Output the harmonized text along with") else i
+            for i in _TONE_AGENT_INSTRUCTIONS
+        ]
     return Agent(
         name="Tone Agent",
         role=(
             "Ensures the proposal maintains a consistent, professional, and persuasive tone and style "
             "throughout all sections. Harmonizes voice, formality, and word choice."
         ),
-        model=OpenAIChat(id=model_id or llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
-        instructions=_TONE_AGENT_INSTRUCTIONS,
+        instructions=instructions,
         add_datetime_to_context=True,
     )
@@ -9,8 +9,9 @@ from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
+from llm_runtime import run_agent
 from policy_packs import inject_pack_context
 
 class RoadmapInput(BaseModel):
@@ -37,18 +38,18 @@ _BASE_INSTRUCTIONS = [
     "Caption: ≤120 words; include 2–3 milestone highlights.",
 ]
 
-def build_visual_roadmap_agent(active_pack_name: str) -> Agent:
+def build_visual_roadmap_agent(active_pack_name: str, model_id: str | None = None) -> Agent:
     return Agent(
         name="Executive Visual Roadmap (US, Pack-Aware)",
         role="Generates a one-page program view aligned to the active pack.",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(model_id or llm_model),
         tools=[ReasoningTools(add_instructions=True)],
         instructions=inject_pack_context(_BASE_INSTRUCTIONS, active_pack_name),
         add_datetime_to_context=True,
     )
 
 def run_visual_roadmap(agent: Agent, payload: RoadmapInput) -> RoadmapOutput:
-    raw = agent.run("Return ONLY JSON.\n" + json.dumps(payload.model_dump(), ensure_ascii=False)).content.strip()
+    raw = run_agent(agent, "Return ONLY JSON.\n" + json.dumps(payload.model_dump(), ensure_ascii=False)).content.strip()
     if "```" in raw:
         raw = raw.split("```")[-2] if "```json" in raw else raw.split("```")[-2]
     data = json.loads(raw)
@@ -1,40 +1,67 @@
 from agno.team.team import Team
-from agno.models.openai import OpenAIChat
 from agno.tools.reasoning import ReasoningTools
+from model_factory import openai_model
 
+from agent_registry import AgentCheckout, registry
+from llm_cache import active_cache
+from llm_runtime import run_agent
+from model_router import model_for
 from policy_packs import POLICY_PACKS, select_policy_pack
-from .agents_domain_profiler import domain_profiler
+from .agents_domain_profiler import build_domain_profiler
 from .agents_compliance_red_team import build_compliance_red_team
 from .agents_controls_mapper import build_controls_mapper
 from .agents_scrm_sbom import build_scrm_sbom_agent
 from .agents_accessibility import build_accessibility_agent
+from .team_controls import DelegationGovernor, TeamHistoryManager
+
+
+def profile_domain(rfp_text_or_draft: str):
+    """Run the domain profiler and return (profile, active_pack_name)."""
+    with registry.lease(build_domain_profiler, model_for("profiler")) as profiler:
+        profile_raw = run_agent(profiler, rfp_text_or_draft).content
+    import json
+    try:
+        profile = json.loads(profile_raw)
+    except Exception:
+        profile = {"domain": "US_COMMERCIAL", "frameworks": [], "flags": [], "open_questions": []}
+    return profile, select_policy_pack(profile)
 
 
 def assemble_team_with_us_upgrades(
     llm_model: str,
     base_members: list,
     rfp_text_or_draft: str,
+    profile: dict | None = None,
+    history: TeamHistoryManager | None = None,
+    governor: DelegationGovernor | None = None,
+    agents: AgentCheckout | None = None,
 ):
     """Assemble a pack-aware orchestration team layered on top of existing base members.
 
     Notes:
     - Avoids circular imports by NOT referencing symbols from agents.py directly.
     - Assumes `base_members` already includes your core pipeline agents (incl. scoring if desired).
+    - Pass a precomputed `profile` (e.g. profiled concurrently with RFP analysis) to skip the profiler call.
+    - Pass a `history` manager to bound the leader's context; expand the final answer with `history.expand`.
+    - Pass a `governor` to cap member invocations and stop coordinator loops; see `governor.report()`.
+    - With an active response cache (llm_cache.use_cache), member delegations are served from it when identical.
+    - Pass an `agents` checkout (agent_registry.registry.checkout()) to lease the pack-aware agents from the
+      warm pool instead of building them for every run.
     """
     # 1) Profile domain and select policy pack
-    profile_raw = domain_profiler.run(rfp_text_or_draft).content
-    import json
-    try:
-        profile = json.loads(profile_raw)
-    except Exception:
-        profile = {"domain": "US_COMMERCIAL", "frameworks": [], "flags": [], "open_questions": []}
-    active_pack_name = select_policy_pack(profile)
+    if profile is None:
+        profile, active_pack_name = profile_domain(rfp_text_or_draft)
+    else:
+        active_pack_name = select_policy_pack(profile)
 
     # 2) Build pack-aware agents
-    compliance_red = build_compliance_red_team(active_pack_name)
-    controls_mapper = build_controls_mapper(active_pack_name)
-    scrm_sbom = build_scrm_sbom_agent(active_pack_name)
-    accessibility = build_accessibility_agent(active_pack_name)
+    make = agents.get if agents is not None else (lambda builder, *args: builder(*args))
+    compliance_red = make(build_compliance_red_team, active_pack_name, model_for("red_team", active_pack_name))
+    controls_mapper = make(build_controls_mapper, active_pack_name, model_for("controls", active_pack_name))
+    scrm_sbom = make(build_scrm_sbom_agent, active_pack_name, model_for("scrm", active_pack_name))
+    accessibility = make(build_accessibility_agent, active_pack_name, model_for("accessibility", active_pack_name))
+
+    cache = active_cache()
 
     # 3) Assemble the full team (reuse provided base order, then augment)
     members = [
@@ -49,7 +76,7 @@ def assemble_team_with_us_upgrades(
     team = Team(
         name=f"US-Orchestration ({active_pack_name})",
         # mode="coordinate",
-        model=OpenAIChat(id=llm_model),
+        model=openai_model(llm_model),
         members=members,
         tools=[ReasoningTools(add_instructions=True)],
         instructions=[
@@ -58,7 +85,13 @@ def assemble_team_with_us_upgrades(
             "Then run Controls Mapper, Accessibility Agent, SCRM & SBOM Agent, and Compliance Red Team.",
             "Push every policy-pack directive and issue list back into the shared context before re-invoking Section Writing → English → Tone. Require the Section Writing Agent to update Coverage Logs to reflect resolutions.",
             "Finalize with the scoring agent if present in members. Deliver: (a) proposal, (b) Staff↔Control matrix, (c) Accessibility checklist + DoD snippet, (d) SCRM/SBOM SOP + Exec summary, (e) Compliance Red Team issue list with incorporated fixes, (f) final scoring aligned to policy-pack weights.",
+            *(history.instructions if history else []),
+            *(governor.instructions if governor else []),
         ],
+        # Governor first: hooks wrap in list order, so it sees the leader's raw task before references are expanded.
+        # The response cache is innermost so it keys on the task the member actually receives.
+        tool_hooks=[h for h in (governor and governor.hook, history and history.hook, cache and cache.delegation_hook(members)) if h] or None,
+        tool_call_limit=governor.tool_call_limit if governor else None,
         markdown=True,
         show_members_responses=False,
         # enable_agentic_context=True,
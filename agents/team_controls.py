@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Team Controls (tool hooks for the orchestration Team)
+Wraps the leader's member-delegation tool calls:
+- TeamHistoryManager keeps the leader's working context bounded: member outputs are stored as
+  artifacts and, once the inline budget is spent, returned as compact references (stage id +
+  summary + artifact key) instead of full text.
+- DelegationGovernor enforces per-member and per-run invocation budgets, blocks near-identical
+  repeat delegations, and forces the leader to finalize once the budget is spent.
+"""
+
+import os, re, threading
+from collections import Counter
+from difflib import SequenceMatcher
+from inspect import isgenerator
+from typing import Any, Callable, Dict, List, Optional
+
+TEAM_CONTEXT_TOKEN_CEILING = int(os.getenv("TEAM_CONTEXT_TOKEN_CEILING", "24000"))
+TEAM_INLINE_OUTPUT_TOKENS = int(os.getenv("TEAM_INLINE_OUTPUT_TOKENS", "1500"))
+TEAM_MAX_CALLS_PER_MEMBER = int(os.getenv("TEAM_MAX_CALLS_PER_MEMBER", "3"))
+TEAM_MAX_CALLS_PER_RUN = int(os.getenv("TEAM_MAX_CALLS_PER_RUN", "24"))
+TEAM_DUPLICATE_SIMILARITY = float(os.getenv("TEAM_DUPLICATE_SIMILARITY", "0.9"))
+TEAM_MAX_DUPLICATES = int(os.getenv("TEAM_MAX_DUPLICATES", "3"))
+
+_ARTIFACT_REF = re.compile(r"\[\[artifact:([A-Za-z0-9_.#-]+)\]\]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) — good enough for budgeting."""
+    return len(text or "") // 4 + 1
+
+
+def is_delegation(function_name: str) -> bool:
+    # agno >= 2 names the tool delegate_task_to_member(s); older releases used transfer_task_to_member.
+    return function_name.startswith(("delegate_task_to_member", "transfer_task_to_member"))
+
+
+def delegation_task_key(arguments: Dict[str, Any]) -> str:
+    """Argument holding the task text; its name differs across agno releases."""
+    for key in ("task", "task_description"):
+        if key in arguments:
+            return key
+    return ""
+
+
+def _consume(result, on_text: Callable[[str], str]):
+    """Run `on_text` over the textual output of a delegation call, preserving streamed events."""
+    if isinstance(result, str):
+        return on_text(result)
+    if not isgenerator(result):
+        return result
+
+    def _wrapped():
+        chunks: List[str] = []
+        for item in result:
+            if isinstance(item, str):
+                chunks.append(item)
+            else:
+                yield item
+        yield on_text("".join(chunks))
+
+    return _wrapped()
+
+
+class TeamHistoryManager:
+    """Keeps the team's working context under a token ceiling by replacing member outputs with references.
+
+    Outputs up to `inline_tokens` are returned in full while the running total of inlined output stays
+    below `max_context_tokens`; everything else comes back as `[[artifact:KEY]]` plus a short summary.
+    References inside delegated tasks are expanded before the member sees them, and `expand()` restores
+    them in the leader's final answer.
+    """
+
+    def __init__(self, max_context_tokens: int | None = None, inline_tokens: int | None = None, summary_chars: int = 400):
+        self.max_context_tokens = max_context_tokens or TEAM_CONTEXT_TOKEN_CEILING
+        self.inline_tokens = inline_tokens or TEAM_INLINE_OUTPUT_TOKENS
+        self.summary_chars = summary_chars
+        self.artifacts: Dict[str, str] = {}
+        self.references: List[Dict[str, Any]] = []
+        self.inlined_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def instructions(self) -> List[str]:
+        return [
+            "Member results may come back as [[artifact:KEY]] references with a short summary instead of full text. "
+            "Treat the summary as authoritative for planning; pass the reference verbatim inside later member tasks "
+            "(it is expanded to the full text automatically) and never ask a member to repeat work it already delivered.",
+            "In the final deliverable you may place [[artifact:KEY]] where a member's full output belongs; "
+            "references are expanded when the proposal is saved.",
+        ]
+
+    def expand(self, text: str) -> str:
+        return _ARTIFACT_REF.sub(lambda m: self.artifacts.get(m.group(1), m.group(0)), text or "")
+
+    def _summarize(self, text: str) -> str:
+        headings = [line.strip() for line in text.splitlines() if line.lstrip().startswith("#")][:8]
+        lead = " ".join(text.split())[: self.summary_chars]
+        return (("Headings: " + " | ".join(headings) + "\n") if headings else "") + f"Lead: {lead}…"
+
+    def record(self, member_id: str, text: str) -> str:
+        """Store a member output and return what the leader should see."""
+        tokens = estimate_tokens(text)
+        with self._lock:
+            slug = re.sub(r"[^A-Za-z0-9_-]+", "-", member_id or "member").strip("-").lower() or "member"
+            key = f"{slug}#{len(self.references) + 1}"
+            self.artifacts[key] = text
+            inline = tokens <= self.inline_tokens and self.inlined_tokens + tokens <= self.max_context_tokens
+            if inline:
+                self.inlined_tokens += tokens
+            self.references.append({"key": key, "member": member_id, "tokens": tokens, "inlined": inline})
+        if inline:
+            return f"{text}\n\n(stored as [[artifact:{key}]])"
+        return (
+            f"[[artifact:{key}]] output from {member_id} (~{tokens} tokens, stored out of context)\n"
+            f"{self._summarize(text)}"
+        )
+
+    def hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        """agno tool hook: expand references going to members, compact outputs coming back."""
+        if not is_delegation(function_name):
+            return function_call(**arguments)
+        args = dict(arguments)
+        task_key = delegation_task_key(args)
+        if task_key:
+            args[task_key] = self.expand(args[task_key])
+        member_id = args.get("member_id", "all-members")
+        return _consume(function_call(**args), lambda text: self.record(member_id, text))
+
+    def summary(self) -> str:
+        compacted = [r for r in self.references if not r["inlined"]]
+        return (
+            f"Team context: {len(self.references)} member outputs, {self.inlined_tokens} tokens inlined "
+            f"(ceiling {self.max_context_tokens}), {len(compacted)} compacted to references "
+            f"(~{sum(r['tokens'] for r in compacted)} tokens kept out of the leader's context)."
+        )
+
+
+_FINALIZE_NOW = (
+    "HARD STOP: the delegation budget for this run is exhausted. Do not delegate to any member again. "
+    "Finalize immediately with the outputs you already have, and list anything left incomplete under 'Open Items'."
+)
+
+
+class DelegationGovernor:
+    """Caps member invocations and detects coordinator loops.
+
+    - `max_calls_per_member` (overridable per member via `member_limits`) and `max_calls_per_run` bound
+      how often the leader can delegate.
+    - A task whose text is at least `similarity` alike a previous task for the same member is not run;
+      the leader is told to reuse the earlier result instead.
+    - After `max_duplicates` blocked repeats, or once the run budget is spent, every further delegation
+      returns a hard-stop message telling the leader to finalize.
+    """
+
+    def __init__(
+        self,
+        max_calls_per_member: Optional[int] = None,
+        max_calls_per_run: Optional[int] = None,
+        similarity: Optional[float] = None,
+        max_duplicates: Optional[int] = None,
+        member_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_calls_per_member = max_calls_per_member or TEAM_MAX_CALLS_PER_MEMBER
+        self.max_calls_per_run = max_calls_per_run or TEAM_MAX_CALLS_PER_RUN
+        self.similarity = similarity or TEAM_DUPLICATE_SIMILARITY
+        self.max_duplicates = max_duplicates or TEAM_MAX_DUPLICATES
+        self.member_limits = member_limits or {}
+        self.calls: Counter = Counter()
+        self.duplicates: Counter = Counter()
+        self.over_budget: Counter = Counter()
+        self.tasks: Dict[str, List[str]] = {}
+        self.stopped = False
+        self._lock = threading.Lock()
+
+    @property
+    def tool_call_limit(self) -> int:
+        """Hard ceiling for the Team's own tool-call limit, leaving room for refused calls and reasoning tools."""
+        return self.max_calls_per_run * 2 + self.max_duplicates + 10
+
+    @property
+    def instructions(self) -> List[str]:
+        return [
+            f"Delegation budget: at most {self.max_calls_per_member} calls per member and {self.max_calls_per_run} in total. "
+            "Plan delegations up front, give each member everything it needs in one task, and reuse results instead of re-asking.",
+            "If a delegation returns 'HARD STOP', stop delegating and produce the final deliverable immediately.",
+        ]
+
+    def _is_repeat(self, member_id: str, task: str) -> bool:
+        probe = task[:2000]
+        for previous in self.tasks.get(member_id, []):
+            matcher = SequenceMatcher(None, previous, probe)
+            if matcher.quick_ratio() >= self.similarity and matcher.ratio() >= self.similarity:
+                return True
+        return False
+
+    def _admit(self, member_id: str, task: str) -> Optional[str]:
+        """Return a refusal message, or None when the delegation may proceed."""
+        with self._lock:
+            if self.stopped or sum(self.calls.values()) >= self.max_calls_per_run:
+                self.stopped = True
+                self.over_budget[member_id] += 1
+                return _FINALIZE_NOW
+            if self.calls[member_id] >= self.member_limits.get(member_id, self.max_calls_per_member):
+                self.over_budget[member_id] += 1
+                return (
+                    f"BUDGET: {member_id} has used its {self.calls[member_id]} allowed calls. "
+                    "Use its earlier output or proceed without it."
+                )
+            if self._is_repeat(member_id, task):
+                self.duplicates[member_id] += 1
+                if sum(self.duplicates.values()) >= self.max_duplicates:
+                    self.stopped = True
+                    return _FINALIZE_NOW
+                return (
+                    f"REPEAT BLOCKED: this task is nearly identical to an earlier one sent to {member_id}. "
+                    "Reuse that result; only delegate again with materially new instructions or inputs."
+                )
+            self.calls[member_id] += 1
+            self.tasks.setdefault(member_id, []).append(task[:2000])
+            return None
+
+    def hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        """agno tool hook; register it before TeamHistoryManager.hook so it sees the leader's raw task."""
+        if not is_delegation(function_name):
+            return function_call(**arguments)
+        task_key = delegation_task_key(arguments)
+        member_id = arguments.get("member_id", "all-members")
+        refusal = self._admit(member_id, str(arguments.get(task_key, "")))
+        if refusal:
+            print(f"⛔ Delegation to {member_id} refused: {refusal.split(':')[0]}")
+            return refusal
+        return function_call(**arguments)
+
+    def report(self) -> str:
+        """Markdown table of delegation counts for the run summary."""
+        members = sorted(set(self.calls) | set(self.duplicates) | set(self.over_budget))
+        lines = ["| Member | Calls | Repeats blocked | Over budget |", "|---|---|---|---|"]
+        for m in members:
+            lines.append(f"| {m} | {self.calls[m]} | {self.duplicates[m]} | {self.over_budget[m]} |")
+        lines.append(
+            f"\nTotal delegations: {sum(self.calls.values())}/{self.max_calls_per_run}"
+            + (" — hard stop triggered, team finalized early." if self.stopped else ".")
+        )
+        return "\n".join(lines)
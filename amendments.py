@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+RFP Amendments (incremental re-run support)
+Compares a previous RFP version with its amendment and decides what must be regenerated:
+- `diff_text` lists the clauses that were added, changed or removed;
+- `diff_analysis` matches tasks, requirements and dates of the two RFPAnalysis objects and
+  reports which were added, removed or changed;
+- `match_previous_sections` carries previous drafts over to the new outline by title;
+- `affected_sections`, `affected_pack_artifacts` and `merge_crosswalk_rows` map those changes
+  onto the proposal so only dependent sections, crosswalk rows and pack artifacts are re-run.
+Pure functions over duck-typed objects; the amendment workflow itself lives in maestro.py.
+"""
+
+import os, re
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher, ndiff
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+AMENDMENT_MATCH_RATIO = float(os.getenv("AMENDMENT_MATCH_RATIO", "0.6"))
+AMENDMENT_TERM_OVERLAP = int(os.getenv("AMENDMENT_TERM_OVERLAP", "2"))
+
+_STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "shall", "will", "must", "should", "have", "been",
+    "into", "such", "each", "other", "their", "them", "they", "than", "then", "also", "under", "within",
+    "upon", "page", "section", "contractor", "offeror", "government", "provide", "including", "required",
+    "requirement", "requirements", "support", "services", "work", "task", "tasks", "all", "any", "are",
+}
+
+# Words whose presence in a change means a pack artifact (or technology research) depends on it.
+PACK_ARTIFACT_TERMS = {
+    "controls": ("personnel", "clearance", "security", "access", "staff", "role", "nist", "fedramp", "iso", "soc"),
+    "accessibility": ("508", "accessib", "wcag", "assistive", "usability", "user interface"),
+    "scrm": ("supply chain", "sbom", "889", "kaspersky", "software", "hardware", "vendor", "component"),
+    "technology": ("technology", "platform", "cloud", "software", "system", "tool", "architecture", "data"),
+}
+
+
+def significant_terms(text: str) -> Set[str]:
+    """Lower-cased content words (4+ letters) and numbers/dates — the vocabulary used for matching."""
+    words = re.findall(r"[A-Za-z][A-Za-z0-9\-]{3,}|\d[\d/\-.,:]*\d|\d", (text or "").lower())
+    return {w for w in words if w not in _STOPWORDS}
+
+
+# ---------- Text diff ----------
+
+def _clauses(text: str) -> List[str]:
+    return [" ".join(p.split()) for p in re.split(r"\n\s*\n|\n(?=\s*(?:\d+(?:\.\d+)*[.)]?|[-*•])\s)", text or "") if p.strip()]
+
+
+def diff_text(old_text: str, new_text: str) -> List[str]:
+    """Clauses that differ between two RFP versions, prefixed `+ ` (new or changed) or `- ` (removed)."""
+    changes = []
+    for line in ndiff(_clauses(old_text), _clauses(new_text)):
+        if line.startswith(("+ ", "- ")):
+            changes.append(line)
+    return changes
+
+
+# ---------- Structured diff ----------
+
+@dataclass
+class SectionView:
+    """What `affected_sections` needs to know about one outline section."""
+    title: str
+    guidance: str = ""   # outline description of what the section covers
+    text: str = ""       # previous draft, empty for sections new to the outline
+
+
+@dataclass
+class ItemChange:
+    kind: str                     # task | requirement | date | clause
+    change: str                   # added | removed | changed
+    before: Optional[str] = None
+    after: Optional[str] = None
+    category: str = ""            # requirement category, when known
+
+    @property
+    def text(self) -> str:
+        return " ".join(t for t in (self.before, self.after) if t)
+
+    @property
+    def terms(self) -> Set[str]:
+        return significant_terms(self.text)
+
+
+@dataclass
+class AnalysisDiff:
+    changes: List[ItemChange] = field(default_factory=list)
+    text_changes: List[str] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.changes and not self.text_changes
+
+    @property
+    def tasks_changed(self) -> bool:
+        """Tasks were added or removed, so the outline itself may need new or fewer sections."""
+        return any(c.kind == "task" and c.change in ("added", "removed") for c in self.changes)
+
+    @property
+    def stale_requirements(self) -> List[str]:
+        """Previous requirement texts whose crosswalk rows no longer hold."""
+        return [c.before for c in self.changes if c.kind == "requirement" and c.before]
+
+    @property
+    def new_requirements(self) -> List[str]:
+        return [c.after for c in self.changes if c.kind == "requirement" and c.after]
+
+    def summary(self) -> str:
+        if self.empty:
+            return "No differences between the RFP versions."
+        lines = ["| Item | Change | Before | After |", "|---|---|---|---|"]
+        for c in self.changes:
+            lines.append(
+                f"| {c.kind} | {c.change} | {(c.before or '').replace('|', '/')[:160]} | {(c.after or '').replace('|', '/')[:160]} |"
+            )
+        lines.append(f"\n{len(self.text_changes)} clause-level text change(s) between the RFP versions.")
+        return "\n".join(lines)
+
+
+def _render(kind: str, item: Any) -> str:
+    if kind == "task":
+        return f"{item.title}: {item.description}"
+    if kind == "requirement":
+        return item.description
+    return f"{item.event}: {item.date}"
+
+
+def _similarity(before: str, after: str) -> float:
+    """Character similarity, or word containment when one wording extends the other
+    ("PM" → "PM with Secret clearance")."""
+    a, b = set(re.findall(r"\w+", before.lower())), set(re.findall(r"\w+", after.lower()))
+    containment = len(a & b) / min(len(a), len(b)) if a and b else 0.0
+    return max(SequenceMatcher(None, before, after).ratio(), containment)
+
+
+def diff_items(kind: str, old_items: Sequence[Any], new_items: Sequence[Any]) -> List[ItemChange]:
+    """Identical items are unchanged; the remaining ones are paired by similarity (changed) or left
+    over as added/removed."""
+    old = {_render(kind, i): i for i in old_items}
+    new = {_render(kind, i): i for i in new_items}
+    removed = [t for t in old if t not in new]
+    added = [t for t in new if t not in old]
+    changes: List[ItemChange] = []
+    for before in list(removed):
+        scored = [(_similarity(before, after), after) for after in added]
+        ratio, after = max(scored, default=(0.0, None))
+        if after is not None and ratio >= AMENDMENT_MATCH_RATIO:
+            removed.remove(before)
+            added.remove(after)
+            changes.append(ItemChange(kind, "changed", before, after, getattr(new[after], "category", "")))
+    changes += [ItemChange(kind, "removed", before=t, category=getattr(old[t], "category", "")) for t in removed]
+    changes += [ItemChange(kind, "added", after=t, category=getattr(new[t], "category", "")) for t in added]
+    return changes
+
+
+def diff_analysis(old: Any, new: Any, old_text: str = "", new_text: str = "") -> AnalysisDiff:
+    """Differences between two RFPAnalysis objects (tasks, requirements, dates) plus the raw text diff.
+
+    Given the RFP texts, a structured change only counts when it is grounded in a changed clause
+    (re-analysis rewords untouched items too), and changed clauses that no structured change
+    explains are reported as `clause` changes so they still reach the sections that cite them.
+    """
+    changes = (
+        diff_items("task", old.tasks, new.tasks)
+        + diff_items("requirement", old.requirements, new.requirements)
+        + diff_items("date", old.dates, new.dates)
+    )
+    if not (old_text or new_text):
+        return AnalysisDiff(changes=changes)
+    text_changes = diff_text(old_text, new_text)
+    clause_terms = [significant_terms(line[2:]) for line in text_changes]
+    changed_vocabulary = set().union(*clause_terms) if clause_terms else set()
+    grounded = [c for c in changes if len(c.terms & changed_vocabulary) >= min(AMENDMENT_TERM_OVERLAP, len(c.terms))]
+    explained = set().union(*(c.terms for c in grounded)) if grounded else set()
+    for line, terms in zip(text_changes, clause_terms):
+        if terms and len(terms & explained) < min(AMENDMENT_TERM_OVERLAP, len(terms)):
+            kind = "added" if line.startswith("+ ") else "removed"
+            grounded.append(ItemChange("clause", kind, **({"after": line[2:]} if kind == "added" else {"before": line[2:]})))
+    return AnalysisDiff(changes=grounded, text_changes=text_changes)
+
+
+# ---------- Mapping changes onto the proposal ----------
+
+def _title_key(title: str) -> str:
+    return " ".join(re.findall(r"\w+", (title or "").lower()))
+
+
+def match_previous_sections(titles: Dict[str, str], previous_titles: Dict[str, str]) -> Dict[str, str]:
+    """{section_number: previous section_number} for outline sections whose previous draft carries over.
+
+    Drafts are matched on title: under the same number first, then under any number (a renumbered
+    section keeps its own text). A section whose title matches no previous one gets no draft.
+    """
+    matched: Dict[str, str] = {}
+    unclaimed = dict(previous_titles)
+    for number, title in titles.items():
+        if number in unclaimed and _title_key(unclaimed[number]) == _title_key(title):
+            matched[number] = number
+            del unclaimed[number]
+    for number, title in titles.items():
+        if number in matched:
+            continue
+        previous = next((n for n, t in unclaimed.items() if _title_key(t) == _title_key(title)), None)
+        if previous is not None:
+            matched[number] = previous
+            del unclaimed[previous]
+    return matched
+
+
+def affected_sections(
+    diff: AnalysisDiff,
+    sections: Dict[str, SectionView],
+    crosswalk_rows: Iterable[Any] = (),
+    previous_titles: Optional[Dict[str, str]] = None,
+) -> Dict[str, List[str]]:
+    """{section_number: [reasons]} for every outline section that depends on a change.
+
+    A section is affected when a crosswalk row ties it to a changed requirement, when its
+    title/guidance shares AMENDMENT_TERM_OVERLAP terms with a change, when its previous draft quotes
+    the old value of a changed date, or when no previous draft carries over to it (a new section, or
+    one whose title changed; see `match_previous_sections`). A change that matches nothing is
+    assigned to the section whose draft overlaps it most.
+    """
+    affected: Dict[str, List[str]] = {}
+
+    def mark(number: str, reason: str):
+        reasons = affected.setdefault(number, [])
+        if reason not in reasons:
+            reasons.append(reason)
+
+    if previous_titles is not None:
+        carried = match_previous_sections({n: s.title for n, s in sections.items()}, previous_titles)
+        for number, section in sections.items():
+            if number in carried:
+                continue
+            if number in previous_titles:
+                mark(number, f"title changed (was {previous_titles[number][:80]!r})")
+            else:
+                mark(number, "new outline section")
+
+    stale = set(diff.stale_requirements)
+    for row in crosswalk_rows:
+        if row.requirement in stale:
+            number = (row.section.split() or [""])[0].rstrip(".")
+            if number in sections:
+                mark(number, f"crosswalk row: {row.requirement[:80]}")
+
+    for change in diff.changes:
+        label = f"{change.kind} {change.change}: {(change.after or change.before or '')[:80]}"
+        hit = False
+        if not change.terms:
+            continue  # nothing to match on; crosswalk rows above are the only link
+        for number, section in sections.items():
+            guidance = significant_terms(f"{section.title} {section.guidance}")
+            quoted = change.kind == "date" and change.before and change.before.split(": ", 1)[-1] in section.text
+            if len(change.terms & guidance) >= min(AMENDMENT_TERM_OVERLAP, len(change.terms)) or quoted:
+                mark(number, label)
+                hit = True
+        if not hit and sections:
+            best = max(sections, key=lambda n: len(change.terms & significant_terms(sections[n].text or sections[n].title)))
+            mark(best, label)
+    return affected
+
+
+def affected_pack_artifacts(diff: AnalysisDiff) -> List[str]:
+    """Pack artifacts (and technology research) whose inputs mention a changed item."""
+    names = []
+    for name, keywords in PACK_ARTIFACT_TERMS.items():
+        for change in diff.changes:
+            text = f"{change.category} {change.text}".lower()
+            if (name == "controls" and change.kind == "task") or any(k in text for k in keywords):
+                names.append(name)
+                break
+    return names
+
+
+def merge_crosswalk_rows(old_rows: Sequence[Any], new_rows: Sequence[Any], stale_requirements: Iterable[str]) -> List[Any]:
+    """Keep old rows for unchanged requirements, drop rows for changed/removed ones, append the re-mapped rows."""
+    stale = set(stale_requirements)
+    refreshed = {row.requirement for row in new_rows}
+    kept = [row for row in old_rows if row.requirement not in stale and row.requirement not in refreshed]
+    return kept + list(new_rows)
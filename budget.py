@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Token Budget (per-run spend governor)
+Every model call made through llm_runtime.run_agent reports its prompt/completion tokens here,
+attributed to the pipeline stage that made it. As the run budget drains the workflow degrades
+instead of overspending:
+- conserve (BUDGET_CONSERVE_AT of the budget used): review stages switch to BUDGET_REVIEW_MODEL
+  and refinement is capped at one rewrite pass;
+- critical (BUDGET_CRITICAL_AT used): refinement only measures open issues, and optional
+  augmenters (technology research, controls, accessibility, SCRM) are deferred;
+- exhausted: further model calls raise BudgetExhausted, so the run ends with a partial result.
+"""
+
+import os, json, threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+RUN_TOKEN_BUDGET = int(os.getenv("RUN_TOKEN_BUDGET", "0"))           # 0 = unlimited
+RUN_COST_BUDGET = float(os.getenv("RUN_COST_BUDGET", "0"))           # USD, 0 = unlimited
+BUDGET_CONSERVE_AT = float(os.getenv("BUDGET_CONSERVE_AT", "0.6"))
+BUDGET_CRITICAL_AT = float(os.getenv("BUDGET_CRITICAL_AT", "0.85"))
+BUDGET_REVIEW_MODEL = os.getenv("BUDGET_REVIEW_MODEL", "gpt-5-mini")
+BUDGET_OPTIONAL_STAGES = {"technology", "controls", "accessibility", "scrm"}
+
+# USD per 1M tokens (input, output); MODEL_PRICES overrides or extends it, e.g. {"gpt-5": [1.25, 10]}.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-5": (1.25, 10.0),
+    "gpt-5-mini": (0.25, 2.0),
+    "gpt-5-nano": (0.05, 0.40),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.60),
+    "claude-opus-4-1": (15.0, 75.0),
+    "claude-sonnet-4-5": (3.0, 15.0),
+    "claude-haiku-4-5": (1.0, 5.0),
+}
+MODEL_PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("MODEL_PRICES", "{}")).items()})
+# Share of the input price charged for prompt tokens served from the provider's prefix cache.
+CACHED_INPUT_PRICE_FACTOR = float(os.getenv("CACHED_INPUT_PRICE_FACTOR", "0.1"))
+
+LEVELS = ("normal", "conserve", "critical", "exhausted")
+
+
+class BudgetExhausted(Exception):
+    """Raised before a model call once the run has spent its whole token or cost budget."""
+
+
+def estimate_cost(model_id: Optional[str], input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    prices = MODEL_PRICES.get(model_id or "")
+    if prices is None:
+        # Dated snapshots (gpt-5-2025-08-07) price like their base model.
+        prices = next((p for name, p in sorted(MODEL_PRICES.items(), key=lambda kv: -len(kv[0]))
+                       if (model_id or "").startswith(name)), (0.0, 0.0))
+    billed_input = input_tokens - cached_tokens + cached_tokens * CACHED_INPUT_PRICE_FACTOR
+    return (billed_input * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def _costlier(model_id: str, than: str) -> bool:
+    """True when `model_id` is priced above `than`, or has no known price (it may be a large custom model)."""
+    cost = estimate_cost(model_id, 1_000_000, 1_000_000)
+    return cost == 0 or cost > estimate_cost(than, 1_000_000, 1_000_000)
+
+
+def response_usage(response: Any) -> Tuple[int, int, Optional[float]]:
+    """(input tokens, output tokens, provider-reported cost or None) of an agent or team run,
+    including the runs of team members."""
+    metrics = getattr(response, "metrics", None)
+    input_tokens = int(getattr(metrics, "input_tokens", 0) or 0)
+    output_tokens = int(getattr(metrics, "output_tokens", 0) or 0)
+    cost = getattr(metrics, "cost", None)
+    for member in getattr(response, "member_responses", None) or []:
+        m_in, m_out, m_cost = response_usage(member)
+        input_tokens, output_tokens = input_tokens + m_in, output_tokens + m_out
+        cost = None if cost is None or m_cost is None else cost + m_cost
+    return input_tokens, output_tokens, cost
+
+
+def response_cached_tokens(response: Any) -> int:
+    """Prompt tokens the provider served from its prefix cache, including team members' runs."""
+    cached = int(getattr(getattr(response, "metrics", None), "cache_read_tokens", 0) or 0)
+    return cached + sum(response_cached_tokens(m) for m in getattr(response, "member_responses", None) or [])
+
+
+class TokenBudget:
+    """Thread-safe per-run ledger of token spend by stage, with degradation levels."""
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None):
+        self.max_tokens = RUN_TOKEN_BUDGET if max_tokens is None else max_tokens
+        self.max_cost = RUN_COST_BUDGET if max_cost is None else max_cost
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0}
+        )
+        self.agents: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "input_tokens": 0, "cached_tokens": 0})
+        self.events: List[str] = []
+        self._announced = 0
+        self._lock = threading.Lock()
+
+    @property
+    def tokens_used(self) -> int:
+        return int(sum(s["input_tokens"] + s["output_tokens"] for s in self.stages.values()))
+
+    @property
+    def cost_used(self) -> float:
+        return sum(s["cost"] for s in self.stages.values())
+
+    @property
+    def fraction_used(self) -> float:
+        fractions = [0.0]
+        if self.max_tokens:
+            fractions.append(self.tokens_used / self.max_tokens)
+        if self.max_cost:
+            fractions.append(self.cost_used / self.max_cost)
+        return max(fractions)
+
+    @property
+    def level(self) -> str:
+        used = self.fraction_used
+        if used >= 1.0:
+            return "exhausted"
+        if used >= BUDGET_CRITICAL_AT:
+            return "critical"
+        if used >= BUDGET_CONSERVE_AT:
+            return "conserve"
+        return "normal"
+
+    def _note(self, message: str):
+        if message not in self.events:
+            self.events.append(message)
+            print(f"💸 {message}")
+
+    def record(self, stage: Optional[str], model_id: Optional[str], input_tokens: int, output_tokens: int,
+               cost: Optional[float] = None, cached_tokens: int = 0, agent_name: Optional[str] = None):
+        with self._lock:
+            entry = self.stages[stage or "unstaged"]
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["cost"] += cost if cost is not None else estimate_cost(model_id, input_tokens, output_tokens, cached_tokens)
+            prompts = self.agents[agent_name or "unnamed agent"]
+            prompts["calls"] += 1
+            prompts["input_tokens"] += input_tokens
+            prompts["cached_tokens"] += cached_tokens
+            rank = LEVELS.index(self.level)
+            if rank > self._announced:
+                self._announced = rank
+                self._note(f"Budget {LEVELS[rank]} after '{stage}': {self.fraction_used:.0%} used")
+
+    def check(self, stage: Optional[str] = None):
+        """Call before a model call; refuses it once the budget is spent."""
+        if self.level == "exhausted":
+            raise BudgetExhausted(
+                f"Run budget exhausted ({self.tokens_used} tokens, ${self.cost_used:.2f}); "
+                f"stage '{stage or '?'}' cannot make further model calls"
+            )
+
+    # ---------- degradation policy ----------
+
+    def review_model(self, default: str) -> str:
+        """BUDGET_REVIEW_MODEL once spend runs high, unless `default` is already no more expensive."""
+        if self.level == "normal" or not _costlier(default, BUDGET_REVIEW_MODEL):
+            return default
+        self._note(f"Review stages switched to {BUDGET_REVIEW_MODEL}")
+        return BUDGET_REVIEW_MODEL
+
+    def refinement_passes(self, default: int) -> int:
+        level = self.level
+        passes = {"conserve": min(default, 1), "critical": 0, "exhausted": 0}.get(level, default)
+        if passes < default:
+            self._note(f"Refinement capped at {passes} rewrite pass(es)")
+        return passes
+
+    def defer_reason(self, stage_name: str) -> Optional[str]:
+        """Reason to defer an optional stage, or None to run it."""
+        if stage_name.split("[")[0] in BUDGET_OPTIONAL_STAGES and self.level in ("critical", "exhausted"):
+            self._note(f"Skipped optional augmenter {stage_name}")
+            return f"deferred: token budget {self.level} ({self.fraction_used:.0%} used)"
+        return None
+
+    def summary(self) -> str:
+        """Markdown table of spend per stage against the budget."""
+        limit = self.max_tokens or 0
+        lines = ["| Stage | Calls | Input tokens | Output tokens | Cost (USD) | % of budget |", "|---|---|---|---|---|---|"]
+        for name, s in sorted(self.stages.items(), key=lambda kv: -(kv[1]["input_tokens"] + kv[1]["output_tokens"])):
+            tokens = s["input_tokens"] + s["output_tokens"]
+            share = f"{tokens / limit:.1%}" if limit else "-"
+            lines.append(
+                f"| {name} | {int(s['calls'])} | {int(s['input_tokens'])} | {int(s['output_tokens'])} | {s['cost']:.4f} | {share} |"
+            )
+        budget_text = f"{limit} tokens" if limit else "no token limit"
+        if self.max_cost:
+            budget_text += f", ${self.max_cost:.2f}"
+        lines.append(
+            f"\nTotal: {self.tokens_used} tokens, ${self.cost_used:.4f} against {budget_text} — level: {self.level}."
+        )
+        if self.events:
+            lines.append("\n" + "\n".join(f"- {e}" for e in self.events))
+        return "\n".join(lines)
+
+    def prompt_cache_summary(self) -> str:
+        """Markdown table of cached vs. uncached prompt tokens per agent (provider prefix cache)."""
+        lines = ["| Agent | Calls | Prompt tokens | Cached | Uncached | Cached % |", "|---|---|---|---|---|---|"]
+        for name, a in sorted(self.agents.items(), key=lambda kv: -kv[1]["input_tokens"]):
+            share = f"{a['cached_tokens'] / a['input_tokens']:.0%}" if a["input_tokens"] else "-"
+            lines.append(
+                f"| {name} | {a['calls']} | {a['input_tokens']} | {a['cached_tokens']} | {a['input_tokens'] - a['cached_tokens']} | {share} |"
+            )
+        total = sum(a["input_tokens"] for a in self.agents.values())
+        cached = sum(a["cached_tokens"] for a in self.agents.values())
+        lines.append(f"\nTotal: {cached} of {total} prompt tokens served from the provider cache ({cached / total:.0%})." if total else "\nNo prompt tokens recorded.")
+        return "\n".join(lines)
+
+
+_active: Optional[TokenBudget] = None
+
+
+def active_budget() -> Optional[TokenBudget]:
+    """Budget of the run in progress, or None when spend is not being tracked."""
+    return _active
+
+
+@contextmanager
+def use_budget(budget: Optional[TokenBudget]):
+    """Make `budget` the process-wide ledger for the duration of one run."""
+    global _active
+    previous, _active = _active, budget
+    try:
+        yield budget
+    finally:
+        _active = previous
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Stage Checkpoints (persist and resume pipeline stages)
+After a stage succeeds its outputs are written to CHECKPOINT_DIR under a key derived from the
+stage name, a run salt (model id) and a hash of every input it received. Upstream artifacts are
+part of that hash, so a checkpoint stays valid exactly as long as the RFP text, pack, model and
+everything upstream are unchanged. With `--resume`, the pipeline loads valid checkpoints instead
+of re-running the stage. Finished runs are also snapshotted whole (`save_run`) so an amended RFP
+can be diffed against the previous version's artifacts.
+"""
+
+import os, json, hashlib, importlib, threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", ".checkpoints")
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS", "1").lower() in ("1", "true", "yes", "on")
+
+
+# ---------- Encoding (pydantic-aware JSON) ----------
+
+def encode(value: Any) -> Any:
+    """JSON-able form of an artifact; pydantic models keep their class so `decode` can rebuild them."""
+    if hasattr(value, "model_dump") and isinstance(type(value), type):
+        cls = type(value)
+        return {"__model__": f"{cls.__module__}:{cls.__qualname__}", "data": value.model_dump(mode="json")}
+    if isinstance(value, dict):
+        return {str(k): encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Cannot checkpoint value of type {type(value).__name__}")
+
+
+def _model_class(path: str):
+    module_name, _, qualname = path.partition(":")
+    candidates = [module_name] + (["maestro"] if module_name == "__main__" else ["__main__"] if module_name == "maestro" else [])
+    for name in candidates:
+        try:
+            obj = importlib.import_module(name)
+            for part in qualname.split("."):
+                obj = getattr(obj, part)
+            return obj
+        except (ImportError, AttributeError):
+            continue
+    raise LookupError(f"Checkpointed model class {path} is no longer importable")
+
+
+def decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "__model__" in value and set(value) == {"__model__", "data"}:
+            return _model_class(value["__model__"]).model_validate(value["data"])
+        return {k: decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    return value
+
+
+def _fingerprint(value: Any) -> Any:
+    """Encoded form without module paths, so `python maestro.py` and `import maestro` hash alike."""
+    if isinstance(value, dict):
+        if "__model__" in value and set(value) == {"__model__", "data"}:
+            return {"__model__": value["__model__"].rpartition(":")[2], "data": _fingerprint(value["data"])}
+        return {k: _fingerprint(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fingerprint(v) for v in value]
+    return value
+
+
+def content_hash(value: Any) -> str:
+    payload = json.dumps(_fingerprint(encode(value)), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------- Store ----------
+
+class CheckpointStore:
+    """Reads and writes stage checkpoints; `resume=False` only writes (so a later run can resume)."""
+
+    def __init__(self, directory: Optional[str] = None, salt: str = "", resume: bool = False):
+        self.directory = Path(directory or CHECKPOINT_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.salt = salt
+        self.resume = resume
+        self.restored: list = []
+        self.saved: list = []
+        self._lock = threading.Lock()
+
+    def _path(self, stage_name: str, inputs: Dict[str, Any]) -> Path:
+        digest = content_hash({"stage": stage_name, "salt": self.salt, "inputs": inputs})[:32]
+        slug = "".join(c if c.isalnum() or c in "-_" else "_" for c in stage_name)
+        return self.directory / f"{slug}-{digest}.json"
+
+    def load(self, stage_name: str, inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Outputs saved for this stage and exactly these inputs, or None."""
+        if not self.resume:
+            return None
+        try:
+            path = self._path(stage_name, inputs)
+            outputs = decode(json.loads(path.read_text(encoding="utf-8"))["outputs"])
+        except (OSError, ValueError, KeyError, LookupError, TypeError):
+            return None
+        with self._lock:
+            self.restored.append(stage_name)
+        return outputs
+
+    def save(self, stage_name: str, inputs: Dict[str, Any], outputs: Dict[str, Any]):
+        try:
+            path = self._path(stage_name, inputs)
+            data = json.dumps({"stage": stage_name, "salt": self.salt, "outputs": encode(outputs)}, ensure_ascii=False)
+        except TypeError as e:
+            print(f"⚠️  Checkpoint skipped for {stage_name}: {e}")
+            return
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            self.saved.append(stage_name)
+
+    # ---------- whole-run snapshots (amendment baselines) ----------
+
+    def save_run(self, rfp_text: str, artifacts: Dict[str, Any]):
+        """Snapshot a finished run's artifacts under the RFP text hash, as the baseline for amendments."""
+        encoded = {}
+        for name, value in artifacts.items():
+            try:
+                encoded[name] = encode(value)
+            except TypeError:
+                continue
+        path = self.directory / "runs" / f"{content_hash({'rfp_text': rfp_text, 'salt': self.salt})[:32]}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"salt": self.salt, "artifacts": encoded}, ensure_ascii=False), encoding="utf-8")
+
+    def load_run(self, rfp_text: str) -> Optional[Dict[str, Any]]:
+        """Artifacts of the last run over exactly this RFP text, or None."""
+        path = self.directory / "runs" / f"{content_hash({'rfp_text': rfp_text, 'salt': self.salt})[:32]}.json"
+        try:
+            return decode(json.loads(path.read_text(encoding="utf-8"))["artifacts"])
+        except (OSError, ValueError, KeyError, LookupError, TypeError):
+            return None
+
+    def summary(self) -> str:
+        restored = ", ".join(self.restored) or "none"
+        return f"Checkpoints: {len(self.restored)} stage(s) resumed ({restored}), {len(self.saved)} saved to {self.directory}."
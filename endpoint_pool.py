@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Endpoint Pool (several API keys and providers behind one logical model)
+A logical model id — the one an agent is built with, e.g. the deep tier's `gpt-5` — can be served by a
+pool of interchangeable endpoints: more OpenAI keys or organizations, an OpenAI-compatible gateway, or
+Anthropic. MODEL_ENDPOINTS (JSON, or a JSON file named by MODEL_ENDPOINTS_FILE) lists them:
+
+    {"gpt-5": [
+        {"name": "openai-main", "provider": "openai", "model": "gpt-5", "rpm": 500, "tpm": 800000},
+        {"name": "openai-batch", "provider": "openai", "model": "gpt-5", "api_key_env": "OPENAI_API_KEY_2", "rpm": 500},
+        {"name": "claude", "provider": "anthropic", "model": "claude-sonnet-4-5", "api_key_env": "ANTHROPIC_API_KEY", "rpm": 50}
+    ]}
+
+Each attempt of a call (see llm_runtime.run_agent) goes to the endpoint with the best score:
+its free quota and concurrency in the rate-limit scheduler (each endpoint has its own limiter, sized
+by `rpm` / `tpm` / `concurrency`), scaled by `weight`, divided by its observed latency.
+When an endpoint fails, the retry fails over to another one at once instead of backing off, and the
+failing endpoint is skipped for ENDPOINT_FAILURE_COOLDOWN seconds. An endpoint rejected for
+authentication is dropped for the rest of the process. Models without an entry run as before.
+
+The response cache keys on the logical model id, so a reply is reused whichever endpoint produced it.
+"""
+
+import os, json, time, threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from model_factory import anthropic_model, clone_agent, openai_model
+from rate_limits import LLM_MAX_CONCURRENCY, scheduler
+
+ENDPOINT_FAILURE_COOLDOWN = float(os.getenv("ENDPOINT_FAILURE_COOLDOWN", "30"))
+# Weight of the newest latency sample in an endpoint's moving average.
+ENDPOINT_LATENCY_ALPHA = float(os.getenv("ENDPOINT_LATENCY_ALPHA", "0.3"))
+
+
+def _load_config() -> Dict[str, List[Dict[str, Any]]]:
+    path = os.getenv("MODEL_ENDPOINTS_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(os.getenv("MODEL_ENDPOINTS", "{}"))
+
+
+@dataclass
+class Endpoint:
+    """One provider/key/model combination that can serve a logical model."""
+    name: str
+    provider: str = "openai"
+    model: str = ""
+    api_key_env: Optional[str] = None
+    base_url: Optional[str] = None
+    rpm: float = 0
+    tpm: float = 0
+    concurrency: int = LLM_MAX_CONCURRENCY
+    weight: float = 1.0
+    calls: int = 0
+    failures: int = 0
+    latency: Optional[float] = None
+    unhealthy_until: float = 0.0
+    disabled: bool = False
+
+    def build_model(self) -> Any:
+        api_key = os.getenv(self.api_key_env) if self.api_key_env else None
+        # No SDK-level retries: a failing endpoint should hand the call to the next one at once.
+        if self.provider == "anthropic":
+            model = anthropic_model(self.model, base_url=self.base_url, api_key=api_key, client_params={"max_retries": 0})
+        elif self.provider == "openai":
+            model = openai_model(self.model, api_key=api_key, base_url=self.base_url, max_retries=0)
+        else:
+            raise ValueError(f"Endpoint {self.name}: unknown provider {self.provider!r} (openai or anthropic)")
+        model.rate_limit_key = self.name
+        return model
+
+    def available(self, now: float) -> bool:
+        return not self.disabled and self.unhealthy_until <= now
+
+
+class EndpointPool:
+    """Endpoints per logical model id, with health and latency tracking."""
+
+    def __init__(self, config: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.pools: Dict[str, List[Endpoint]] = {}
+        self._lock = threading.Lock()
+        for model_id, entries in (_load_config() if config is None else config).items():
+            for entry in entries:
+                self.add(model_id, Endpoint(**{"model": model_id, **entry}))
+
+    def add(self, model_id: str, endpoint: Endpoint):
+        """Serve `model_id` from `endpoint` as well; its limits go to the rate-limit scheduler."""
+        scheduler.configure(endpoint.name, rpm=endpoint.rpm, tpm=endpoint.tpm, max_concurrency=endpoint.concurrency)
+        with self._lock:
+            self.pools.setdefault(model_id, []).append(endpoint)
+
+    def endpoints(self, agent: Any) -> List[Endpoint]:
+        return self.pools.get(getattr(getattr(agent, "model", None), "id", None) or "", [])
+
+    def choose(self, agent: Any) -> Optional[Endpoint]:
+        """Best endpoint for the next attempt of `agent`'s call, or None when its model has no pool."""
+        endpoints = self.endpoints(agent)
+        if not endpoints:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in endpoints if e.available(now)]
+            # All cooling down: the least recently failed usable endpoint is still better than none.
+            candidates = candidates or sorted((e for e in endpoints if not e.disabled), key=lambda e: e.unhealthy_until)[:1]
+            if not candidates:
+                raise RuntimeError(f"Every endpoint for {agent.model.id} was rejected for authentication")
+            known = sorted(e.latency for e in candidates if e.latency is not None)
+            typical = known[len(known) // 2] if known else 1.0
+
+        def score(endpoint: Endpoint) -> float:
+            latency = endpoint.latency if endpoint.latency is not None else typical
+            return endpoint.weight * (scheduler.headroom(endpoint.name) + 0.05) / max(latency, 0.01)
+
+        return max(candidates, key=score)
+
+    def has_alternative(self, agent: Any, endpoint: Endpoint) -> bool:
+        now = time.monotonic()
+        return any(e is not endpoint and e.available(now) for e in self.endpoints(agent))
+
+    def runner(self, agent: Any, endpoint: Optional[Endpoint]) -> Any:
+        """`agent` itself without an endpoint, else a copy of it on `endpoint`'s model.
+
+        One copy per attempt: `agent` is never changed, so an abandoned or hedged call and concurrent
+        leases of the same agent cannot see each other's endpoint.
+        """
+        if endpoint is None:
+            return agent
+        runner = clone_agent(agent)
+        runner.model = endpoint.build_model()
+        return runner
+
+    def succeeded(self, endpoint: Optional[Endpoint], seconds: float):
+        if endpoint is None:
+            return
+        with self._lock:
+            endpoint.calls += 1
+            endpoint.unhealthy_until = 0.0
+            endpoint.latency = seconds if endpoint.latency is None else (
+                ENDPOINT_LATENCY_ALPHA * seconds + (1 - ENDPOINT_LATENCY_ALPHA) * endpoint.latency
+            )
+
+    def failed(self, endpoint: Optional[Endpoint], kind: str):
+        """Record a failed attempt; `kind` is llm_runtime.classify_error's verdict."""
+        if endpoint is None or kind == "content":  # the reply was bad, not the endpoint
+            return
+        with self._lock:
+            endpoint.failures += 1
+            if kind == "fatal":
+                endpoint.disabled = True
+            elif kind != "rate_limit":  # the scheduler already pauses a throttled endpoint
+                endpoint.unhealthy_until = time.monotonic() + ENDPOINT_FAILURE_COOLDOWN
+        if kind == "fatal":
+            print(f"⚠️  Endpoint {endpoint.name} disabled for this run (authentication or permission error)")
+
+    def summary(self) -> str:
+        if not self.pools:
+            return "Endpoints: no pools configured."
+        parts = []
+        for model_id, endpoints in sorted(self.pools.items()):
+            described = ", ".join(
+                f"{e.name} {e.calls} ok/{e.failures} failed"
+                + (f" ~{e.latency:.1f}s" if e.latency is not None else "")
+                + (" (disabled)" if e.disabled else "")
+                for e in endpoints
+            )
+            parts.append(f"{model_id} → {described}")
+        return "Endpoints: " + "; ".join(parts) + "."
+
+
+endpoints = EndpointPool()
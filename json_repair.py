@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+JSON Repair (tolerant parsing of model output before re-asking)
+Malformed model JSON used to cost a full round-trip: the whole prompt went back to the model.
+`parse_model` fixes what can be fixed locally first:
+- code fences and prose around the JSON are dropped and the largest parseable object is kept;
+- trailing commas, single-quoted strings, smart quotes, comments and Python literals
+  (True/False/None) are rewritten;
+- truncated output is closed (open string, dangling member, missing brackets).
+The result is validated against the Pydantic model; when only some fields fail validation, the
+model is asked to re-emit just those fields (with their sub-schema), not the whole document; an
+agent on a cheaper model tier is escalated to the next tier for that re-ask (see model_router.py).
+
+Outcomes are counted per agent (`repair_stats`): clean, repaired locally, fields re-asked, failed,
+so prompts that keep producing broken JSON show up in the run summary.
+"""
+
+import json, re, threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from budget import BudgetExhausted
+from llm_runtime import run_agent
+from model_router import escalate
+from pipeline import StageCancelled
+from structured_output import schema_dict
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.S)
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "‘": "'", "’": "'"})
+_LITERALS = {"True": "true", "False": "false", "None": "null", "undefined": "null", "NaN": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+# Candidate start positions tried per response when looking for the largest JSON value.
+MAX_SCAN_STARTS = 50
+
+
+# ---------- local repair ----------
+
+def _close(text: str, stack: List[str]) -> str:
+    return text + "".join(_CLOSERS[c] for c in reversed(stack))
+
+
+def _scan(text: str, start: int) -> Tuple[str, List[str], int]:
+    """Rewrite the JSON-ish value starting at `text[start]` into strict JSON, closing it if truncated.
+
+    Returns the rewritten text, the repairs applied and the index just past the consumed input.
+    """
+    out: List[str] = []
+    fixes: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []  # (output length, open containers) at each comma
+    i, n = start, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "\"'":
+            # A string; single-quoted ones are re-emitted with double quotes.
+            quote, j, chars = ch, i + 1, []
+            while j < n and text[j] != quote:
+                c = text[j]
+                if c == "\\":
+                    if j + 1 < n:
+                        chars.append("'" if quote == "'" and text[j + 1] == "'" else text[j:j + 2])
+                    j += 2
+                    continue
+                chars.append('\\"' if c == '"' else json.dumps(c)[1:-1] if ord(c) < 0x20 else c)
+                j += 1
+            if quote == "'":
+                fixes.append("single quotes")
+            out.append('"' + "".join(chars) + '"')
+            i = j + 1
+            continue
+        if ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            while out and out[-1].strip() == "":
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                fixes.append("trailing commas")
+            if stack and _CLOSERS[stack[-1]] == ch:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                break
+        elif ch == ",":
+            cuts.append((len(out), tuple(stack)))
+            out.append(ch)
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+            fixes.append("comments")
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i)
+            i = n if end < 0 else end + 2
+            fixes.append("comments")
+            continue
+        elif ch.isalpha() or ch == "_":
+            word = re.match(r"\w+", text[i:]).group(0)
+            if word in _LITERALS:
+                out.append(_LITERALS[word])
+                fixes.append("python literals")
+            elif re.match(r"\s*:", text[i + len(word):]):
+                out.append(f'"{word}"')
+                fixes.append("unquoted keys")
+            else:
+                out.append(word)
+            i += len(word)
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    if not stack:
+        return "".join(out), fixes, i + 1
+    # Truncated: close what is open, else fill a dangling value, else cut back to an earlier comma.
+    fixes.append("truncated")
+    body = "".join(out).rstrip()
+    attempts = [_close(body, stack), _close(body + " null", stack)]
+    attempts += [_close("".join(out[:length]), list(open_)) for length, open_ in reversed(cuts[-20:])]
+    for attempt in attempts:
+        try:
+            json.loads(attempt)
+            return attempt, fixes, n
+        except ValueError:
+            continue
+    return attempts[0], fixes, n
+
+
+def extract_json(text: str) -> Tuple[Any, List[str]]:
+    """The largest JSON object/array recoverable from `text`, and the repairs that were needed.
+
+    Raises ValueError when nothing parseable is found.
+    """
+    text = (text or "").strip()
+    try:
+        return json.loads(text), []
+    except ValueError:
+        pass
+    fixes: List[str] = []
+    fenced = _FENCE_PATTERN.search(text)
+    if fenced:
+        try:
+            return json.loads(fenced.group(1).strip()), ["code fences"]
+        except ValueError:
+            text = fenced.group(1).strip()
+            fixes.append("code fences")
+    normalized = text.translate(_SMART_QUOTES)
+    best, best_len, best_fixes = None, -1, []
+    consumed = tries = 0
+    for match in re.finditer(r"[\[{]", normalized):
+        # Brackets inside an object already recovered are part of it; cap the scans on bracket-heavy prose.
+        if match.start() < consumed or tries >= MAX_SCAN_STARTS:
+            continue
+        tries += 1
+        candidate, candidate_fixes, end = _scan(normalized, match.start())
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        consumed = end
+        if len(candidate) <= best_len:
+            continue
+        best, best_len, best_fixes = value, len(candidate), candidate_fixes
+        if match.start() > 0 and normalized[:match.start()].strip():
+            best_fixes = best_fixes + ["surrounding prose"]
+    if best_len < 0:
+        raise ValueError(f"No JSON object found in model output; preview={text[:300]!r}")
+    if normalized != text:
+        best_fixes = ["smart quotes"] + best_fixes
+    return best, sorted(set(fixes + best_fixes))
+
+
+# ---------- stats ----------
+
+@dataclass
+class RepairStats:
+    """Per-agent counts of how structured responses were obtained."""
+    agents: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    fixes: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, agent_name: Optional[str], outcome: str, fixes: List[str] = ()):
+        name = agent_name or "agent"
+        with self._lock:
+            counts = self.agents.setdefault(name, {"clean": 0, "repaired": 0, "reasked": 0, "failed": 0})
+            counts[outcome] += 1
+            for fix in fixes:
+                self.fixes.setdefault(name, {})[fix] = self.fixes.get(name, {}).get(fix, 0) + 1
+
+    def summary(self) -> str:
+        if not self.agents:
+            return "No structured responses parsed."
+        lines = ["| Agent | Clean | Repaired locally | Fields re-asked | Failed | Most common defects |", "|---|---|---|---|---|---|"]
+        for name, c in sorted(self.agents.items()):
+            common = ", ".join(f"{k} ({v})" for k, v in sorted(self.fixes.get(name, {}).items(), key=lambda kv: -kv[1])[:3])
+            lines.append(f"| {name} | {c['clean']} | {c['repaired']} | {c['reasked']} | {c['failed']} | {common or '-'} |")
+        return "\n".join(lines)
+
+
+repair_stats = RepairStats()
+
+
+# ---------- validation with field-level re-ask ----------
+
+def _failed_fields(error: ValidationError) -> List[str]:
+    return sorted({str(e["loc"][0]) for e in error.errors() if e.get("loc")})
+
+
+def _field_schema(schema_model: Type[BaseModel], fields: List[str]) -> Dict[str, Any]:
+    schema = schema_dict(schema_model)
+    sub: Dict[str, Any] = {
+        "type": "object",
+        "properties": {f: schema.get("properties", {}).get(f, {}) for f in fields},
+        "required": fields,
+    }
+    if "$defs" in schema and "$ref" in json.dumps(sub):
+        sub["$defs"] = schema["$defs"]
+    return sub
+
+
+def parse_model(
+    agent: Any,
+    raw: str,
+    schema_model: Type[BaseModel],
+    coerce: Optional[Callable[[Any], Any]] = None,
+    reask: bool = True,
+) -> BaseModel:
+    """Validated `schema_model` from a raw model reply: local repair, optional `coerce` of the data,
+    then a re-ask limited to the fields that still fail validation.
+
+    Raises ValueError when no JSON can be recovered or the re-asked fields still do not validate;
+    callers fall back to re-asking for the whole document.
+    """
+    name = getattr(agent, "name", None)
+    try:
+        data, fixes = extract_json(raw)
+    except ValueError:
+        repair_stats.record(name, "failed")
+        raise
+    if coerce is not None:
+        data = coerce(data)
+    try:
+        result = schema_model.model_validate(data)
+        repair_stats.record(name, "repaired" if fixes else "clean", fixes)
+        return result
+    except ValidationError as e:
+        error = e
+    if not reask or not isinstance(data, dict) or not hasattr(agent, "run"):
+        repair_stats.record(name, "failed", fixes)
+        raise ValueError(f"{schema_model.__name__} validation failed: {error}")
+
+    fields = _failed_fields(error)
+    prompt = (
+        f"Your JSON for {schema_model.__name__} was valid except for these fields: {', '.join(fields)}.\n"
+        f"VALIDATION ERRORS:\n{error}\n"
+        f"CURRENT VALUES:\n{json.dumps({f: data.get(f) for f in fields}, ensure_ascii=False, default=str)}\n"
+        f"SCHEMA FOR THESE FIELDS:\n{json.dumps(_field_schema(schema_model, fields), ensure_ascii=False)}\n"
+        "Return ONLY a JSON object with exactly these fields, corrected. No prose, no code fences."
+    )
+    try:
+        # A cheaper tier's invalid fields are re-asked from the next tier's model.
+        patch, patch_fixes = extract_json(run_agent(escalate(agent) or agent, prompt).content)
+        merged = {**data, **{k: v for k, v in patch.items() if k in fields}} if isinstance(patch, dict) else data
+        if coerce is not None:
+            merged = coerce(merged)
+        result = schema_model.model_validate(merged)
+    except (StageCancelled, BudgetExhausted):
+        raise
+    except (ValueError, ValidationError) as e:
+        repair_stats.record(name, "failed", fixes)
+        raise ValueError(f"{schema_model.__name__} still invalid after re-asking {', '.join(fields)}: {e}")
+    repair_stats.record(name, "reasked", sorted(set(fixes + patch_fixes)))
+    return result
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+LLM Response Cache (content-addressed, disk-backed)
+Responses are stored under LLM_CACHE_DIR as one JSON file per key, where the key is a SHA-256 of
+the model id, the agent's rendered instruction fingerprint (description, instructions, expected
+output, context, tools, output schema, injected datetime) and the prompt. Reads touch the file,
+so eviction drops the least recently used entries once the directory outgrows LLM_CACHE_MAX_MB.
+
+Every agent sets `add_datetime_to_context=True`, which would make every prompt unique; with the
+cache on, the injected datetime is pinned for the run (LLM_CACHE_PIN_DATETIME: `day` pins to the
+run's date, `off` keeps the live clock, any other value is used verbatim) so repeated runs hit.
+"""
+
+import os, json, time, hashlib, threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from structured_output import schema_dict
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "0").lower() in ("1", "true", "yes", "on")
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+LLM_CACHE_PIN_DATETIME = os.getenv("LLM_CACHE_PIN_DATETIME", "day")
+
+
+@dataclass
+class CachedResponse:
+    """Stand-in for an agent run response served from the cache (no tokens were spent)."""
+    content: str
+    model: Optional[str] = None
+    metrics: Any = None
+    cached: bool = True
+
+
+def _describe(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_describe(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _describe(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, type):
+        return schema_dict(value) if issubclass(value, BaseModel) else value.__name__
+    if callable(value):
+        return getattr(value, "__qualname__", repr(value))
+    return getattr(value, "name", None) or type(value).__name__
+
+
+def agent_fingerprint(agent: Any) -> Dict[str, Any]:
+    """Everything about an Agent/Team that shapes its system prompt, in a stable JSON-able form."""
+    model = getattr(agent, "model", None)
+    return {
+        "model": getattr(model, "id", None),
+        "system_message": _describe(getattr(agent, "system_message", None)),
+        "description": getattr(agent, "description", None),
+        "role": getattr(agent, "role", None),
+        "instructions": _describe(getattr(agent, "instructions", None)),
+        "expected_output": getattr(agent, "expected_output", None),
+        "additional_context": getattr(agent, "additional_context", None),
+        "markdown": getattr(agent, "markdown", None),
+        "datetime": (getattr(agent, "datetime_format", None) if getattr(agent, "add_datetime_to_context", False) else None),
+        "tools": _describe(getattr(agent, "tools", None)),
+        "output_schema": _describe(getattr(agent, "output_schema", None)),
+        "members": [agent_fingerprint(m) for m in getattr(agent, "members", None) or []],
+    }
+
+
+class LLMCache:
+    """Size-bounded LRU response cache on disk, with per-run hit/miss statistics."""
+
+    def __init__(self, directory: Optional[str] = None, max_mb: Optional[float] = None, pin_datetime: Optional[str] = None):
+        self.directory = Path(directory or LLM_CACHE_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int((max_mb if max_mb is not None else LLM_CACHE_MAX_MB) * 1024 * 1024)
+        pin = pin_datetime if pin_datetime is not None else LLM_CACHE_PIN_DATETIME
+        self.pinned_datetime = None if pin == "off" else (datetime.now().strftime("%Y-%m-%d") if pin == "day" else pin)
+        self.hits = self.misses = self.writes = self.evictions = 0
+        self._lock = threading.Lock()
+        self._bytes = sum(p.stat().st_size for p in self.directory.glob("*.json"))
+
+    # ---------- keys ----------
+
+    def pin(self, agent: Any):
+        """Replace the live clock injected by `add_datetime_to_context` with the run's pinned value."""
+        if self.pinned_datetime is None:
+            return
+        for member in getattr(agent, "members", None) or []:
+            self.pin(member)
+        if getattr(agent, "add_datetime_to_context", False):
+            # agno formats datetime.now() with datetime_format; a format without directives is a constant.
+            agent.datetime_format = self.pinned_datetime.replace("%", "%%")
+
+    def key(self, agent: Any, prompt: Any, **kwargs) -> str:
+        payload = {
+            "agent": agent_fingerprint(agent),
+            "prompt": _describe(prompt),
+            "options": _describe({k: v for k, v in kwargs.items() if k != "stream"}),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    # ---------- storage ----------
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.directory / f"{key}.json"
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry["content"]
+
+    def put(self, key: str, content: Any, model: Optional[str] = None):
+        if isinstance(content, BaseModel):
+            content = content.model_dump_json()  # native structured output; served back as its JSON text
+        if not isinstance(content, str) or not content.strip():
+            return
+        path = self.directory / f"{key}.json"
+        data = json.dumps({"model": model, "created": time.time(), "content": content}, ensure_ascii=False)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        old = path.stat().st_size if path.exists() else 0
+        os.replace(tmp, path)
+        with self._lock:
+            self.writes += 1
+            self._bytes += len(data.encode("utf-8")) - old
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of its bound."""
+        entries = []
+        for p in self.directory.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        self._bytes = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if self._bytes <= self.max_bytes * 0.9:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            self._bytes -= size
+            self.evictions += 1
+
+    # ---------- call sites ----------
+
+    def run(self, agent: Any, prompt: Any, call: Callable[[], Any], **kwargs) -> Any:
+        """Serve `agent.run(prompt, **kwargs)` from the cache, or make the call via `call()` and store it."""
+        self.pin(agent)
+        key = self.key(agent, prompt, **kwargs)
+        content = self.get(key)
+        if content is not None:
+            return CachedResponse(content=content, model=getattr(getattr(agent, "model", None), "id", None))
+        response = call()
+        self.put(key, getattr(response, "content", None), getattr(getattr(agent, "model", None), "id", None))
+        return response
+
+    def delegation_hook(self, members: list) -> Callable:
+        """agno tool hook caching member delegations; register it after the history/governor hooks so it
+        keys on the task the member actually receives."""
+        from agents.team_controls import _consume, delegation_task_key, is_delegation
+
+        by_id = {}
+        for m in members:
+            self.pin(m)
+            for ident in (getattr(m, "id", None), getattr(m, "name", None)):
+                if ident:
+                    by_id[ident] = m
+                    by_id[ident.lower().replace(" ", "-")] = m
+
+        def hook(function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+            if not is_delegation(function_name):
+                return function_call(**arguments)
+            member_id = arguments.get("member_id", "all-members")
+            member = by_id.get(member_id)
+            task = arguments.get(delegation_task_key(arguments), "")
+            key = self.key(member, task, member_id=member_id) if member is not None else None
+            cached = self.get(key) if key else None
+            if cached is not None:
+                print(f"♻️  Cache hit for delegation to {member_id}")
+                return cached
+            model_id = getattr(getattr(member, "model", None), "id", None)
+
+            def _store(text: str) -> str:
+                if key:
+                    self.put(key, text, model_id)
+                return text
+
+            return _consume(function_call(**arguments), _store)
+
+        return hook
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "-"
+        return (
+            f"LLM cache: {self.hits} hit(s), {self.misses} miss(es) (hit rate {rate}), {self.writes} write(s), "
+            f"{self.evictions} eviction(s); {self._bytes / 1024 / 1024:.1f}/{self.max_bytes / 1024 / 1024:.0f} MB in {self.directory}"
+            + (f"; datetime pinned to {self.pinned_datetime}" if self.pinned_datetime else "")
+            + "."
+        )
+
+
+_active: Optional[LLMCache] = None
+
+
+def active_cache() -> Optional[LLMCache]:
+    """Cache of the run in progress, or None when caching is off."""
+    return _active
+
+
+@contextmanager
+def use_cache(cache: Optional[LLMCache]):
+    """Route every run_agent call through `cache` for the duration of one run."""
+    global _active
+    previous, _active = _active, cache
+    try:
+        yield cache
+    finally:
+        _active = previous
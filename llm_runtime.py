@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+"""
+LLM Runtime (single entry point for agent and team runs)
+Every model call in the pipeline goes through `run_agent`, which honours the calling stage's
+cancel event and deadline (see pipeline.stage_scope):
+- the provider request gets an HTTP timeout equal to the time the stage has left, so a stalled
+  call is aborted at the transport level instead of hanging the CLI;
+- the caller polls for cancellation while the call is in flight and raises StageTimeout /
+  StageCancelled as soon as the stage is stopped, abandoning the worker thread.
+Outside a pipeline stage (no deadline, no cancel event) it is a plain `agent.run`.
+Token usage of every run is charged to the active run budget (see budget.py), and with the
+response cache on (see llm_cache.py) identical calls are served from disk without a model call.
+The injected datetime is coarsened first (see prompt_layout.stabilize) so repeated calls share
+their prompt prefix with the provider's cache.
+Each attempt first takes a slot from the rate-limit scheduler (see rate_limits.py), which queues
+it by stage priority within the model's RPM/TPM quota and concurrency limit. When the agent's model
+has an endpoint pool (see endpoint_pool.py), the attempt first runs on the pool's best endpoint,
+whose limiter it then queues on, and a failed attempt fails over to another endpoint without backoff.
+With `on_delta`, the response is streamed and each text chunk is passed to the callback as it
+arrives (see streaming_json.py); the return value is still the complete run response.
+
+Failures are classified (`classify_error`): transient transport errors, rate limits and server
+errors are retried up to LLM_MAX_RETRIES times with exponential backoff and full jitter
+(LLM_BACKOFF_BASE / LLM_BACKOFF_MAX seconds, at least the provider's Retry-After); content and
+parse errors are left to the caller (ask_json re-prompts, json_repair repairs) and fatal ones
+(authentication) are raised at once. agno reports provider errors as an error-status run rather
+than an exception; `run_agent` raises them as ModelCallError so they are not mistaken for content.
+
+With LLM_HEDGE=1, a call still running after the p95 latency of its agent (over the last
+LLM_LATENCY_WINDOW calls, once LLM_HEDGE_MIN_SAMPLES are known, never before LLM_HEDGE_MIN_SECONDS)
+gets a duplicate request on a copy of the agent; whichever finishes first is used. Both are charged
+to the budget. Streamed calls and teams are not hedged, and neither is a call whose model has no
+rate-limit headroom left.
+"""
+
+import os, re, time, queue, random, threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from budget import active_budget, response_cached_tokens, response_usage
+from endpoint_pool import endpoints
+from llm_cache import active_cache
+from model_factory import clone_agent
+from pipeline import check_cancelled, current_stage, remaining_time
+from prompt_layout import stabilize
+from rate_limits import Slot, scheduler
+
+LLM_POLL_SECONDS = float(os.getenv("LLM_POLL_SECONDS", "0.25"))
+# Floor for the per-request HTTP timeout so a nearly spent deadline still lets the request start.
+LLM_MIN_REQUEST_TIMEOUT = float(os.getenv("LLM_MIN_REQUEST_TIMEOUT", "1"))
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0").lower() in ("1", "true", "yes", "on")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "8"))
+LLM_HEDGE_MIN_SECONDS = float(os.getenv("LLM_HEDGE_MIN_SECONDS", "5"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "50"))
+
+
+# ---------- Error classification ----------
+
+TRANSIENT, RATE_LIMIT, SERVER, CONTENT, FATAL = "transient", "rate_limit", "server", "content", "fatal"
+RETRYABLE = (TRANSIENT, RATE_LIMIT, SERVER)
+
+_TRANSPORT_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "TimeoutException", "ConnectError", "ConnectTimeout",
+    "ReadTimeout", "WriteTimeout", "PoolTimeout", "ReadError", "WriteError", "RemoteProtocolError",
+}
+# agno turns provider exceptions into an error-status run whose content is the message.
+_MESSAGE_KINDS = (
+    (RATE_LIMIT, re.compile(r"\b(429|529)\b|rate.?limit|overloaded|quota", re.I)),
+    (TRANSIENT, re.compile(r"timed out|timeout|connection (error|reset|aborted|refused)|remote ?protocol|temporarily unavailable", re.I)),
+    (SERVER, re.compile(r"error code: 5\d\d|\b50[0234]\b|server error|server had an error|bad gateway|service unavailable", re.I)),
+    (FATAL, re.compile(r"error code: 40[13]|authentication|(invalid|incorrect) (api key|x-api-key)|permission denied", re.I)),
+)
+
+
+class ModelCallError(Exception):
+    """A model call that failed at the provider (reported by agno as an error-status run)."""
+
+    def __init__(self, message: str, kind: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status_code = status_code
+
+
+def _chain(error: BaseException):
+    seen = 0
+    while error is not None and seen < 6:
+        yield error
+        error, seen = error.__cause__ or error.__context__, seen + 1
+
+
+def classify_error(error: BaseException) -> str:
+    """transient | rate_limit | server | content | fatal."""
+    for e in _chain(error):
+        if isinstance(e, ModelCallError):
+            return e.kind
+        if type(e).__name__ in _TRANSPORT_ERRORS or isinstance(e, (TimeoutError, ConnectionError)):
+            return TRANSIENT
+    for e in _chain(error):
+        status = getattr(e, "status_code", None)
+        if not isinstance(status, int):
+            continue
+        if status in (429, 529):
+            return RATE_LIMIT
+        if status == 408:
+            return TRANSIENT
+        if status >= 500:
+            return SERVER
+        if status in (401, 403):
+            return FATAL
+        if status >= 400:
+            return CONTENT
+    return CONTENT if isinstance(error, ValueError) else FATAL
+
+
+def _from_provider(error: BaseException) -> bool:
+    """True when `error` came from the provider or the transport, not from the pipeline or a bug."""
+    for e in _chain(error):
+        if isinstance(e, ModelCallError) or isinstance(getattr(e, "status_code", None), int):
+            return True
+        if type(e).__name__ in _TRANSPORT_ERRORS or isinstance(e, (TimeoutError, ConnectionError)):
+            return True
+    return False
+
+
+def _error_from_run(response: Any) -> Optional[ModelCallError]:
+    """ModelCallError for an agno run that ended in error status, else None."""
+    status = getattr(response, "status", None)
+    if getattr(status, "value", status) != "ERROR":
+        return None
+    message = str(getattr(response, "content", None) or "model call failed")
+    kind = next((k for k, pattern in _MESSAGE_KINDS if pattern.search(message)), CONTENT)
+    code = re.search(r"error code: (\d{3})", message, re.I)
+    return ModelCallError(message, kind, int(code.group(1)) if code else None)
+
+
+def _retry_after(error: BaseException) -> float:
+    for e in _chain(error):
+        headers = getattr(getattr(e, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after", 0))
+        except (TypeError, ValueError):
+            continue
+    return 0.0
+
+
+def backoff_delay(attempt: int, error: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff for retry `attempt` (0-based), never below Retry-After."""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    return max(delay, _retry_after(error)) if error is not None else delay
+
+
+def _sleep(seconds: float):
+    """Cancellable sleep that never outlasts the calling stage's deadline."""
+    end = time.monotonic() + seconds
+    while True:
+        check_cancelled()
+        left = end - time.monotonic()
+        remaining = remaining_time()
+        if left <= 0 or (remaining is not None and remaining <= 0):
+            check_cancelled()
+            return
+        time.sleep(min(left, LLM_POLL_SECONDS, remaining if remaining is not None else left))
+
+
+# ---------- Latency and retry statistics ----------
+
+def _stats_key(agent: Any) -> Tuple[str, str]:
+    return (getattr(agent, "name", None) or "agent", getattr(getattr(agent, "model", None), "id", None) or "?")
+
+
+class CallStats:
+    """Per-agent latency window (for the hedging threshold), retries by error kind and hedges."""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self.window = window
+        self.latencies: Dict[Tuple[str, str], deque] = {}
+        self.retries: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self.failovers: Dict[str, int] = {}
+        self.hedges = self.hedge_wins = 0
+        self._inflight: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, agent: Any, seconds: float):
+        with self._lock:
+            self.latencies.setdefault(_stats_key(agent), deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, agent: Any, q: float = LLM_HEDGE_PERCENTILE) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.latencies.get(_stats_key(agent), ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def count(self, table: Dict[str, int], kind: str):
+        with self._lock:
+            table[kind] = table.get(kind, 0) + 1
+
+    def hedged(self, won: bool = False):
+        with self._lock:
+            if won:
+                self.hedge_wins += 1
+            else:
+                self.hedges += 1
+
+    @contextmanager
+    def running(self, agent: Any):
+        with self._lock:
+            self._inflight[id(agent)] = self._inflight.get(id(agent), 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                left = self._inflight.pop(id(agent)) - 1
+                if left:
+                    self._inflight[id(agent)] = left
+
+    def in_flight(self, agent: Any) -> bool:
+        """True while a call on `agent` is still running (e.g. the slower side of a hedge)."""
+        with self._lock:
+            return id(agent) in self._inflight
+
+    def summary(self) -> str:
+        retries = ", ".join(f"{k} {v}" for k, v in sorted(self.retries.items())) or "none"
+        failures = ", ".join(f"{k} {v}" for k, v in sorted(self.failures.items())) or "none"
+        hedging = f"{self.hedges} hedged request(s), {self.hedge_wins} won" if LLM_HEDGE_ENABLED else "hedging off"
+        failovers = f"; failovers {', '.join(f'{k} {v}' for k, v in sorted(self.failovers.items()))}" if self.failovers else ""
+        return f"Model calls: retries {retries}; failed {failures}{failovers}; {hedging}."
+
+
+call_stats = CallStats()
+
+
+# ---------- Entry point ----------
+
+@contextmanager
+def request_timeout(agent: Any, seconds: Optional[float]):
+    """Temporarily bound the provider request of `agent` (Agent or Team) to `seconds`."""
+    model = getattr(agent, "model", None)
+    if seconds is None or model is None or not hasattr(model, "request_params"):
+        yield
+        return
+    previous = model.request_params
+    model.request_params = {**(previous or {}), "timeout": max(seconds, LLM_MIN_REQUEST_TIMEOUT)}
+    try:
+        yield
+    finally:
+        model.request_params = previous
+
+
+def run_agent(agent: Any, prompt: Any, on_delta: Optional[Callable[[str], None]] = None, **kwargs) -> Any:
+    """Run `agent.run(prompt, **kwargs)` under the calling stage's deadline and cancel event.
+
+    Returns the agent's run response; raises StageTimeout / StageCancelled when the stage is stopped
+    before the call returns, BudgetExhausted when the run budget is already spent, and ModelCallError
+    (or the provider's exception) once a failure is not retryable or the retries are used up.
+    `on_delta` streams the reply: it is called with each content chunk (from the worker thread), or
+    once with the whole content when the response cache serves the call.
+    """
+    check_cancelled()
+    stabilize(agent)
+    stage_name, _ = current_stage()
+    budget = active_budget()
+    cache = active_cache()
+
+    def _record(runner: Any, response: Any):
+        if budget is None:
+            return
+        input_tokens, output_tokens, cost = response_usage(response)
+        model_id = getattr(getattr(runner, "model", None), "id", None)
+        budget.record(
+            stage_name, model_id, input_tokens, output_tokens, cost,
+            cached_tokens=response_cached_tokens(response), agent_name=getattr(runner, "name", None),
+        )
+
+    def _call():
+        if budget is not None:
+            budget.check(stage_name)
+        return _run_with_retries(agent, prompt, on_delta, _record, budget, stage_name, **kwargs)
+
+    if cache is None:
+        return _call()
+    response = cache.run(agent, prompt, _call, **kwargs)
+    if on_delta is not None and getattr(response, "cached", False):
+        on_delta(response.content)
+    return response
+
+
+def _run_with_retries(agent, prompt, on_delta, record, budget, stage_name, **kwargs) -> Any:
+    delivered = []
+
+    def _deliver(chunk: str):
+        delivered.append(True)
+        on_delta(chunk)
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        endpoint = endpoints.choose(agent)
+        try:
+            runner = endpoints.runner(agent, endpoint)
+            slot = scheduler.acquire(runner, prompt)
+            started = time.monotonic()
+            response = _run_bounded(runner, prompt, _deliver if on_delta is not None else None, record, slot, **kwargs)
+            endpoints.succeeded(endpoint, time.monotonic() - started)
+            return response
+        except Exception as e:
+            kind = classify_error(e)
+            # Stage cancellation, budget exhaustion and local bugs say nothing about the endpoint.
+            if not _from_provider(e):
+                endpoint = None
+            endpoints.failed(endpoint, kind)
+            # A streamed reply cannot be replayed to the consumer once chunks went out.
+            if attempt == LLM_MAX_RETRIES or delivered:
+                call_stats.count(call_stats.failures, kind)
+                raise
+            if endpoint is not None and kind != CONTENT and endpoints.has_alternative(agent, endpoint):
+                # Another endpoint serves the same model: switch now instead of waiting this one out.
+                call_stats.count(call_stats.failovers, kind)
+                print(f"🔀 {kind.replace('_', ' ')} error from {getattr(agent, 'name', None) or 'agent'} on "
+                      f"{endpoint.name}; failing over to another endpoint: {str(e)[:160]}")
+                if budget is not None:
+                    budget.check(stage_name)
+                continue
+            if kind not in RETRYABLE:
+                call_stats.count(call_stats.failures, kind)
+                raise
+            delay = backoff_delay(attempt, e)
+            call_stats.count(call_stats.retries, kind)
+            print(f"🔁 {kind.replace('_', ' ')} error from {getattr(agent, 'name', None) or 'agent'}; "
+                  f"retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.1f}s: {str(e)[:160]}")
+            _sleep(delay)
+            if budget is not None:
+                budget.check(stage_name)
+
+
+def _execute(agent: Any, prompt: Any, on_delta: Optional[Callable[[str], None]], record: Callable, slot: Slot, **kwargs) -> Any:
+    """One attempt; releases `slot` when the call is really over, even on an abandoned worker thread."""
+    started, response = time.monotonic(), None
+    try:
+        with call_stats.running(agent):
+            if on_delta is None:
+                response = agent.run(prompt, **kwargs)
+            else:
+                from agno.run.agent import RunContentEvent, RunOutput
+
+                for event in agent.run(prompt, stream=True, yield_run_output=True, **kwargs):
+                    if isinstance(event, RunOutput):
+                        response = event
+                    elif isinstance(event, RunContentEvent) and isinstance(event.content, str):
+                        on_delta(event.content)
+        record(agent, response)
+        error = _error_from_run(response)
+        if error is not None:
+            raise error
+    except BaseException as e:
+        slot.release(_used_tokens(response), throttled=classify_error(e) == RATE_LIMIT, retry_after=_retry_after(e))
+        raise
+    slot.release(_used_tokens(response))
+    call_stats.observe(agent, time.monotonic() - started)
+    return response
+
+
+def _used_tokens(response: Any) -> Optional[int]:
+    if response is None:
+        return None
+    input_tokens, output_tokens, _ = response_usage(response)
+    return input_tokens + output_tokens or None
+
+
+def _hedge_after(agent: Any, on_delta: Optional[Callable]) -> Optional[float]:
+    """Seconds after which a duplicate request is sent, or None when this call is not hedged."""
+    if not LLM_HEDGE_ENABLED or on_delta is not None or getattr(agent, "members", None) or not hasattr(agent, "deep_copy"):
+        return None
+    p95 = call_stats.percentile(agent)
+    return None if p95 is None else max(p95, LLM_HEDGE_MIN_SECONDS)
+
+
+def _run_bounded(agent: Any, prompt: Any, on_delta: Optional[Callable[[str], None]], record: Callable, slot: Slot, **kwargs) -> Any:
+    _, cancel_event = current_stage()
+    remaining = remaining_time()
+    hedge_after = _hedge_after(agent, on_delta)
+    if cancel_event is None and remaining is None and hedge_after is None:
+        return _execute(agent, prompt, on_delta, record, slot, **kwargs)
+
+    done: queue.Queue = queue.Queue()
+
+    def _start(runner: Any, label: str, runner_slot: Slot):
+        def _call():
+            try:
+                done.put((label, _execute(runner, prompt, on_delta, record, runner_slot, **kwargs), None))
+            except BaseException as e:  # re-raised in the caller's thread
+                done.put((label, None, e))
+
+        name = f"llm-{label}-{getattr(agent, 'name', None) or 'agent'}"
+        threading.Thread(target=_call, name=name, daemon=True).start()
+
+    with request_timeout(agent, remaining):
+        _start(agent, "primary", slot)
+        started, inflight, first_error = time.monotonic(), 1, None
+        while True:
+            try:
+                label, response, error = done.get(timeout=LLM_POLL_SECONDS)
+            except queue.Empty:
+                check_cancelled()
+                if hedge_after is not None and time.monotonic() - started >= hedge_after:
+                    hedge_after = None
+                    hedge_slot = scheduler.try_acquire(agent, prompt)
+                    if hedge_slot is None:
+                        continue  # no rate-limit headroom; a duplicate would only compete with queued calls
+                    call_stats.hedged()
+                    print(f"🪁 Hedging {getattr(agent, 'name', None) or 'agent'}: no reply after p95 "
+                          f"({time.monotonic() - started:.1f}s); sending a duplicate request")
+                    _start(clone_agent(agent), "hedge", hedge_slot)
+                    inflight += 1
+                continue
+            inflight -= 1
+            if error is None:
+                if label == "hedge":
+                    call_stats.hedged(won=True)
+                return response
+            first_error = first_error or error
+            if not inflight:
+                raise first_error
@@ -1,24 +1,51 @@
 from agno.models.anthropic import Claude
-from agno.models.openai import OpenAIChat
 from agno.team.team import Team
 from agno.tools.reasoning import ReasoningTools
 # from agno.tools.yfinance import YFinanceTools
 
 import argparse
 import dotenv, os
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import re
 import json
 import textwrap
 from pathlib import Path
 from rich.console import Console
+from rich.markdown import Markdown
 from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional
 
-from agents.orchestration_integration import assemble_team_with_us_upgrades
+from agents.orchestration_integration import assemble_team_with_us_upgrades, profile_domain
+from agents.team_controls import DelegationGovernor, TeamHistoryManager
+from agent_registry import registry
+from amendments import (
+    SectionView, affected_pack_artifacts, affected_sections, diff_analysis, diff_text, match_previous_sections, merge_crosswalk_rows,
+)
+from budget import BUDGET_OPTIONAL_STAGES, RUN_COST_BUDGET, RUN_TOKEN_BUDGET, BudgetExhausted, TokenBudget, active_budget, use_budget
+from checkpoints import CHECKPOINTS_ENABLED, CheckpointStore
+from llm_cache import LLM_CACHE_ENABLED, LLMCache, use_cache
+from json_repair import parse_model, repair_stats
+from llm_runtime import CONTENT, call_stats, classify_error, run_agent
+from endpoint_pool import endpoints
+from model_factory import openai_model, pool_summary
+from model_router import escalate, fingerprint, model_for, routing_summary
+from rate_limits import scheduler
+from prompt_layout import layout
+from pipeline import Pipeline, Stage, StageCancelled, StageTimeout, check_cancelled, stage_scope, wait_for
+from refinement import REFINE_MAX_ITERATIONS, IssueCheckFailed, OpenIssue, refine_until_converged
+from research_cache import ResearchCache, format_research, research_technologies
+from section_library import ReuseReport, customer_type, open_library
+from sections import fan_out, resolve_section_number
+from streaming_json import IncrementalJSONParser
+from structured_output import STRUCTURED_OUTPUT_MODE, native_supported, parse_content, record_rejection, schema_prompt, streamed_text
 from policy_packs import POLICY_PACKS, select_policy_pack
 from agents.agents_domain_profiler import domain_profiler
-from agents.agents_compliance_red_team import build_compliance_red_team
+from agents.agents_compliance_red_team import build_compliance_red_team, run_compliance_red_team
+from agents.agents_qa_gatekeeper import QAInputs, build_qa_gatekeeper, run_qa_gatekeeper
 from agents.agents_controls_mapper import build_controls_mapper
 from agents.agents_scrm_sbom import build_scrm_sbom_agent
 from agents.agents_accessibility import build_accessibility_agent
@@ -27,17 +54,15 @@ from agents.agents_english import build_english_agent
 from agents.agents_tone import build_tone_agent
 from agents.agents_proposal_scoring import build_proposal_scoring_agent
 from agents.agents_rfp_analyzer import build_rfp_analyzer_agent
-from agents.agents_technology import build_technology_agent
-from agents.agents_section_writer import build_section_writing_agent
+from agents.agents_technology import StreamingTermExtractor, build_technology_agent, build_technology_terms_agent, extract_technology_terms
+from agents.agents_section_writer import build_section_writing_agent, draft_sections, revise_sections
 from agents.agents_proposal_outline import build_proposal_outline_agent
+from agents.agents_section_review import StyleSheet, build_style_sheet_agent, derive_style_sheet, review_sections
 
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
 dotenv.load_dotenv(dotenv_path, override=True)
 
-llm_model = "gpt-4.1"
-llm_model = "gpt-5"
-# llm_model = "gpt-5-mini"
-# llm_model = "gpt-5-nano"
+# Each agent role runs on the model of its tier (fast/standard/deep); see model_router.py.
     
 # import os, re
 
@@ -71,9 +96,13 @@ class DateItem(BaseModel):
     date: str
     page: int
 
+class ScopeItem(BaseModel):
+    text: str
+    page: Optional[int] = None
+
 class RFPAnalysis(BaseModel):
     customer: str
-    scope: dict  # {"text": str, "page": int}
+    scope: ScopeItem  # typed (was a free-form dict) so strict native JSON-schema output can fill it
     tasks: List[TaskItem]
     requirements: List[Requirement]
     dates: List[DateItem]
@@ -97,47 +126,70 @@ class ProposalSection(BaseModel):
 class ProposalOutline(BaseModel):
     sections: List[ProposalSection]
 
+class ComplianceMatrix(BaseModel):
+    rows: List[ComplianceRow]
+
 # JSON-only helper with schema validation and retry logic
-def ask_json(agent, user_prompt: str, schema_model: type[BaseModel], max_retries: int = 2):
-    """Ask an agent for structured JSON output with schema validation and auto-retry."""
-    schema_hint = schema_model.model_json_schema()
+def ask_json(agent, user_prompt: str, schema_model: type[BaseModel], max_retries: int = 2, on_item=None):
+    """Ask an agent for structured JSON output with schema validation and auto-retry.
+
+    Uses the provider's native JSON-schema response mode when the agent's model supports it (one
+    round-trip, no parse retries); otherwise the schema goes into the prompt and the reply is parsed.
+    Output that fails validation is retried on the next model tier when the agent runs on a cheaper one
+    (see model_router.escalate). With `on_item(key, item)` the reply is streamed and every element of a top-level array (e.g. each
+    task and requirement) is passed on as soon as it is complete; the validated model is returned as usual.
+    """
+    request = f"USER REQUEST:\n{user_prompt}"
+
+    def _stream():
+        return IncrementalJSONParser(on_item).feed if on_item is not None else None
+
+    if native_supported(agent, schema_model):
+        try:
+            if on_item is None:
+                response = run_agent(agent, layout(specific=request), output_schema=schema_model)
+            else:
+                with streamed_text(agent):
+                    response = run_agent(agent, layout(specific=request), on_delta=_stream(), output_schema=schema_model)
+            return parse_content(response.content, schema_model)
+        except (StageCancelled, BudgetExhausted):
+            raise
+        except Exception as e:
+            if classify_error(e) != CONTENT:
+                raise  # transport, rate-limit and server failures were already retried in run_agent
+            if record_rejection(agent, schema_model, e):
+                print(f"⚠️  Native structured output rejected for {schema_model.__name__}; using prompt-and-parse from now on: {e}")
+            elif STRUCTURED_OUTPUT_MODE == "native":
+                raise
+            else:
+                print(f"⚠️  Native structured output failed for {schema_model.__name__}; retrying with prompt-and-parse: {e}")
+                agent = escalate(agent) or agent
     system_guard = (
         "Return ONLY valid JSON matching the provided schema. "
         "No prose, no markdown, no code fences. Do not include comments."
     )
-    prompt = f"""
-{system_guard}
-SCHEMA (JSON Schema):
-{json.dumps(schema_hint, ensure_ascii=False, indent=2)}
-
-USER REQUEST:
-{user_prompt}
-"""
+    # Guard and schema lead so retries and repeat calls share the prompt prefix; the request follows.
+    guard = f"{system_guard}\n{schema_prompt(schema_model)}"
+    prompt = layout(guard=guard, specific=request)
     for attempt in range(max_retries + 1):
+        check_cancelled()
         try:
-            raw = agent.run(prompt).content if hasattr(agent, "run") else agent.print_response(prompt)
-            # Clean the response - remove any markdown code fences or extra text
-            if "```json" in raw:
-                raw = raw.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw:
-                raw = raw.split("```")[1].split("```")[0].strip()
-            
-            data = json.loads(raw)
-            return schema_model.model_validate(data)
+            raw = run_agent(agent, prompt, on_delta=_stream()).content if hasattr(agent, "run") else agent.print_response(prompt)
+            # Repairs fences, prose, trailing commas, truncation locally; re-asks only fields that fail validation.
+            return parse_model(agent, raw, schema_model)
+        except (StageCancelled, BudgetExhausted):
+            raise
         except Exception as e:
+            if classify_error(e) != CONTENT:
+                raise  # re-prompting cannot fix a transport failure
             err = str(e)
             if attempt < max_retries:
-                prompt = f"""
-{system_guard}
-Your previous output did not parse with error: {err}
-Re-emit ONLY valid JSON that strictly matches the schema.
-
-SCHEMA:
-{json.dumps(schema_hint, ensure_ascii=False, indent=2)}
-
-USER REQUEST:
-{user_prompt}
-"""
+                # A cheaper tier that produced invalid output retries on the next tier's model.
+                agent = escalate(agent) or agent
+                prompt = layout(guard=guard, specific=[
+                    request,
+                    f"Your previous output did not parse with error: {err}\nRe-emit ONLY valid JSON that strictly matches the schema.",
+                ])
             else:
                 raise ValueError(f"Failed to obtain valid JSON after {max_retries + 1} attempts. Last error: {err}")
 
@@ -165,50 +217,47 @@ def save_structured_output(data: BaseModel, filename: str, dir_name: str = "rfp_
 # 7. Maestor Agent: This is the orchestrating agent that will be responsible for coordinating the other agents and making sure the final proposal is correct and complete.
 
 
-# Core agent builders
-rfp_analyzer_agent = build_rfp_analyzer_agent(llm_model)
-proposal_outline_agent = build_proposal_outline_agent(llm_model)
-outlining_compliance_agent = build_outlining_compliance_agent(llm_model)
-technology_agent = build_technology_agent(llm_model)
-section_writing_agent = build_section_writing_agent(llm_model)
-english_agent = build_english_agent(llm_model)
-tone_agent = build_tone_agent(llm_model)
-proposal_scoring_agent = build_proposal_scoring_agent(llm_model)
-
-# Maestor Agent: Orchestrates all specialized agents to produce a complete, high-quality proposal
-maestor_team = Team(
-    name="Maestor Orchestration Team",
-    model=OpenAIChat(id=llm_model),
-    members=[
-        rfp_analyzer_agent,  # 1. Analyze RFP and extract structured info
-        proposal_outline_agent,  # 2. Generate detailed proposal outline from RFP analysis
-        outlining_compliance_agent,  # 3. Extract compliance matrix and map requirements
-        technology_agent,  # 4. Research relevant technologies
-        section_writing_agent,  # 5. Draft proposal sections using outline, compliance, and research
-        english_agent,  # 6. Review language/clarity
-        tone_agent,  # 7. Harmonize tone/style
-        proposal_scoring_agent,  # 8. Score proposal
-    ],
-    tools=[ReasoningTools(add_instructions=True)],
-    instructions=[
-        "Coordinate all member agents to analyze the RFP, generate a detailed proposal outline, extract structure and compliance, research technologies, draft full proposal sections, review language, harmonize tone, and score the proposal.",
-        "Ensure the Proposal Outline Agent uses the output of the RFP Analyzer Agent to generate a comprehensive outline before compliance, technology, and section writing steps.",
-        "Each step should be completed in logical order and outputs passed between agents as needed.",
-        "Capture structured artifacts (JSON, tables) from each agent and attach them to shared memory keyed by outline section so downstream members can reference them without recomputing.",
-        "If any agent flags missing or ambiguous information, log it in the Section Writing Coverage Logs and highlight it in the final output until resolved.",
-        "Produce a SINGLE, consolidated proposal package with all required sections, compliance matrix, technology research, language review, tone harmonization, and scoring summary. Ensure Coverage Logs are present for every section.",
-        "DO NOT duplicate content - each section should appear only once in the final output.",
-        "Output all tables (including Coverage Logs and scoring summaries) as markdown tables for easy rendering.",
-        "Be explicit and clear in the final summary and recommendations.",
-        "Ensure the final output is clean, well-structured, and free of redundant information.",
-        "CRITICAL: Do not finish until EVERY section in the proposal outline has been fully written out with complete content. No placeholders, summaries, or incomplete sections are acceptable. The Section Writing Agent must produce full drafts of every section before proceeding to review and harmonization steps.",
-    ],
-    markdown=True,
-    show_members_responses=False,
-    enable_agentic_state=True,
-    add_datetime_to_context=True,
-    # success_criteria="The team has produced a COMPLETE proposal with ALL required sections written, reviewed, and harmonized. The proposal must include: 1) Full RFP analysis with structured JSON output, 2) Complete proposal outline with all sections numbered, 3) Detailed compliance matrix mapping all requirements, 4) Technology research summary, 5) FULL DRAFT of every section in the outline (not just summaries), 6) Language review and corrections applied, 7) Tone harmonization across all sections, 8) Final scoring and recommendations. NO section may be left as placeholder, summary, or incomplete. The proposal must be submission-ready with all content written out in full.",
-)
+# Core agent builders, in pipeline order. Agents are built lazily and pooled by agent_registry
+# (per builder and model id) instead of at import time; stages lease them per call.
+# (builder, model_router role)
+CORE_AGENT_BUILDERS = [
+    (build_rfp_analyzer_agent, "analyzer"),  # 1. Analyze RFP and extract structured info
+    (build_proposal_outline_agent, "outline"),  # 2. Generate detailed proposal outline from RFP analysis
+    (build_outlining_compliance_agent, "crosswalk"),  # 3. Extract compliance matrix and map requirements
+    (build_technology_agent, "technology"),  # 4. Research relevant technologies
+    (build_section_writing_agent, "writer"),  # 5. Draft proposal sections using outline, compliance, and research
+    (build_english_agent, "english"),  # 6. Review language/clarity
+    (build_tone_agent, "tone"),  # 7. Harmonize tone/style
+    (build_proposal_scoring_agent, "scoring"),  # 8. Score proposal
+]
+
+
+def build_maestor_team(members: list, model_id: str = model_for("orchestrator")) -> Team:
+    """Maestor Agent: Orchestrates all specialized agents to produce a complete, high-quality proposal."""
+    return Team(
+        name="Maestor Orchestration Team",
+        model=openai_model(model_id),
+        members=members,
+        tools=[ReasoningTools(add_instructions=True)],
+        instructions=[
+            "Coordinate all member agents to analyze the RFP, generate a detailed proposal outline, extract structure and compliance, research technologies, draft full proposal sections, review language, harmonize tone, and score the proposal.",
+            "Ensure the Proposal Outline Agent uses the output of the RFP Analyzer Agent to generate a comprehensive outline before compliance, technology, and section writing steps.",
+            "Each step should be completed in logical order and outputs passed between agents as needed.",
+            "Capture structured artifacts (JSON, tables) from each agent and attach them to shared memory keyed by outline section so downstream members can reference them without recomputing.",
+            "If any agent flags missing or ambiguous information, log it in the Section Writing Coverage Logs and highlight it in the final output until resolved.",
+            "Produce a SINGLE, consolidated proposal package with all required sections, compliance matrix, technology research, language review, tone harmonization, and scoring summary. Ensure Coverage Logs are present for every section.",
+            "DO NOT duplicate content - each section should appear only once in the final output.",
+            "Output all tables (including Coverage Logs and scoring summaries) as markdown tables for easy rendering.",
+            "Be explicit and clear in the final summary and recommendations.",
+            "Ensure the final output is clean, well-structured, and free of redundant information.",
+            "CRITICAL: Do not finish until EVERY section in the proposal outline has been fully written out with complete content. No placeholders, summaries, or incomplete sections are acceptable. The Section Writing Agent must produce full drafts of every section before proceeding to review and harmonization steps.",
+        ],
+        markdown=True,
+        show_members_responses=False,
+        enable_agentic_state=True,
+        add_datetime_to_context=True,
+        # success_criteria="The team has produced a COMPLETE proposal with ALL required sections written, reviewed, and harmonized. The proposal must include: 1) Full RFP analysis with structured JSON output, 2) Complete proposal outline with all sections numbered, 3) Detailed compliance matrix mapping all requirements, 4) Technology research summary, 5) FULL DRAFT of every section in the outline (not just summaries), 6) Language review and corrections applied, 7) Tone harmonization across all sections, 8) Final scoring and recommendations. NO section may be left as placeholder, summary, or incomplete. The proposal must be submission-ready with all content written out in full.",
+    )
 
 
 def _slugify_filename(text: str) -> str:
@@ -322,38 +371,12 @@ def _format_transcript(messages) -> str:
 
 #     print(f"Saved clean output to {out_filename}\nSaved conversation transcript to {transcript_filename}")
 
-def main(argv=None):
-    parser = argparse.ArgumentParser(description="Run Maestor proposal workflow against an RFP text file.")
-    parser.add_argument(
-        "--rfp-file",
-        dest="rfp_file",
-        help="Path to an RFP .txt file. Defaults to sample_rfp_dev.txt.",
-    )
-    args = parser.parse_args(argv)
-
-    try:
-        rfp_text, rfp_path = load_rfp_text(args.rfp_file)
-    except FileNotFoundError as err:
-        print(f"❌ {err}")
-        return
-
-    print(f"Using RFP file: {rfp_path}")
-    console = Console(record=True)
-    
-    # First, get structured RFP analysis
-    print("Analyzing RFP with structured output...")
-    try:
-        rfp_analysis = ask_json(rfp_analyzer_agent, rfp_text, RFPAnalysis)
-        print(f"✅ RFP Analysis completed: {len(rfp_analysis.tasks)} tasks, {len(rfp_analysis.requirements)} requirements, {len(rfp_analysis.dates)} dates")
-        
-        # Save structured output
-        save_structured_output(rfp_analysis, "rfp_analysis")
-        
-        # Convert structured analysis back to text for the team
-        analysis_text = f"""
+def format_analysis_text(rfp_analysis: RFPAnalysis, rfp_text: Optional[str] = None) -> str:
+    """Render a structured RFP analysis as the plain-text brief agents consume."""
+    text = f"""
 RFP Analysis Results:
 Customer: {rfp_analysis.customer}
-Scope: {rfp_analysis.scope['text']} (Page {rfp_analysis.scope['page']})
+Scope: {rfp_analysis.scope.text} (Page {rfp_analysis.scope.page or '?'})
 
 Tasks:
 {chr(10).join([f"- {task.title}: {task.description} (Page {task.page})" for task in rfp_analysis.tasks])}
@@ -363,61 +386,920 @@ Requirements:
 
 Key Dates:
 {chr(10).join([f"- {date.event}: {date.date} (Page {date.page})" for date in rfp_analysis.dates])}
-
+"""
+    if rfp_text:
+        text += f"""
 Original RFP Text:
 {rfp_text}
 """
-        
-        # Assemble upgraded orchestrated team and run
-        base_members = [
-            rfp_analyzer_agent,
-            proposal_outline_agent,
-            outlining_compliance_agent,
-            technology_agent,
-            section_writing_agent,
-            english_agent,
-            tone_agent,
-            proposal_scoring_agent,
+    return text
+
+
+def format_outline(outline: ProposalOutline) -> str:
+    return "\n".join(
+        f"{s.section_number} {s.title}" + (f" — {s.content}" if s.content else "")
+        for s in outline.sections
+    )
+
+
+def format_crosswalk(crosswalk: Optional[ComplianceMatrix]) -> str:
+    if not crosswalk or not crosswalk.rows:
+        return "(no compliance crosswalk available)"
+    lines = ["| Requirement | Section | Page | Status | Owner | Artifact |", "|---|---|---|---|---|---|"]
+    for row in crosswalk.rows:
+        lines.append(
+            f"| {row.requirement} | {row.section} | {row.page} | {row.status} | {row.owner or ''} | {row.artifact or ''} |"
+        )
+    return "\n".join(lines)
+
+
+# ---------- Pipeline stages ----------
+# Each stage wraps one agent call. `build_proposal_pipeline` wires them into a dependency graph so
+# members that do not consume each other's output (technology, crosswalk, pack augmenters, red team)
+# run concurrently instead of waiting on a leader model to sequence them.
+
+def _stage_analyze(rfp_text: str, stream: bool = False):
+    """RFP analysis. With `stream`, the analyzer's reply is parsed as it is generated and technology
+    terms are extracted (and researched) from each batch of completed tasks/requirements, so the
+    Technology stage does not wait for a second extraction pass; returns `technology_terms` as well."""
+    extractor = StreamingTermExtractor(model_for("technology_terms")) if stream else None
+    try:
+        with registry.lease(build_rfp_analyzer_agent, model_for("analyzer")) as agent:
+            rfp_analysis = ask_json(agent, rfp_text, RFPAnalysis, on_item=extractor.add if extractor else None)
+        terms = extractor.finish() if extractor else None
+    finally:
+        if extractor:
+            extractor.close()
+    print(f"✅ RFP Analysis completed: {len(rfp_analysis.tasks)} tasks, {len(rfp_analysis.requirements)} requirements, {len(rfp_analysis.dates)} dates")
+    save_structured_output(rfp_analysis, "rfp_analysis")
+    if extractor is None:
+        return rfp_analysis
+    print(f"🔎 Early technology research: {len(terms)} term(s) from {extractor.items} streamed task(s)/requirement(s)")
+    return {"rfp_analysis": rfp_analysis, "technology_terms": terms}
+
+
+def _stage_profile(rfp_text: str) -> dict:
+    profile, active_pack_name = profile_domain(rfp_text)
+    print(f"✅ Policy pack selected: {active_pack_name}")
+    return {"profile": profile, "pack": active_pack_name}
+
+
+def _stage_outline(rfp_analysis: RFPAnalysis) -> ProposalOutline:
+    prompt = layout(
+        analysis="RFP ANALYSIS (JSON):\n" + rfp_analysis.model_dump_json(indent=2),
+        specific="Generate the proposal outline. Use `content` for a one-line description of what each section must cover.",
+    )
+    with registry.lease(build_proposal_outline_agent, model_for("outline")) as agent:
+        return ask_json(agent, prompt, ProposalOutline)
+
+
+def _stage_crosswalk(rfp_analysis: RFPAnalysis, outline: ProposalOutline) -> ComplianceMatrix:
+    prompt = layout(
+        analysis=format_analysis_text(rfp_analysis),
+        shared=f"PROPOSAL OUTLINE:\n{format_outline(outline)}",
+        specific="Map every requirement to the proposal outline above. Use the outline section number in `section`.",
+    )
+    with registry.lease(build_outlining_compliance_agent, model_for("crosswalk")) as agent:
+        return ask_json(agent, prompt, ComplianceMatrix)
+
+
+def _stage_technology(rfp_analysis: RFPAnalysis, outline: ProposalOutline, technology_terms: Optional[List[str]] = None) -> str:
+    """One cached web lookup per extracted technology, run concurrently, then a single synthesis call.
+    Terms already extracted while the analysis streamed (`technology_terms`) skip the extraction call."""
+    analysis_text = format_analysis_text(rfp_analysis)
+    terms = technology_terms
+    if not terms:
+        with registry.lease(build_technology_terms_agent, model_for("technology_terms")) as agent:
+            terms = extract_technology_terms(agent, analysis_text)
+    cache = ResearchCache()
+    lookups = research_technologies(terms, cache)
+    print(f"🔎 Technology research: {len(lookups)} term(s), {sum(l.cached for l in lookups)} served from cache")
+    prompt = layout(
+        analysis=analysis_text,
+        shared=f"PROPOSAL OUTLINE:\n{format_outline(outline)}",
+        specific=format_research(lookups),
+    )
+    with registry.lease(build_technology_agent, model_for("technology"), with_search=False) as agent:
+        return run_agent(agent, prompt).content
+
+
+def _stage_controls(pack: str, rfp_analysis: RFPAnalysis) -> str:
+    personnel = [r for r in rfp_analysis.requirements if r.category.lower().startswith("personnel")]
+    prompt = (
+        "Staffing roles and responsibilities implied by the RFP:\n"
+        + "\n".join(f"- {r.description} (Page {r.page})" for r in personnel or rfp_analysis.requirements)
+        + "\n\nTasks:\n"
+        + "\n".join(f"- {t.title}: {t.description}" for t in rfp_analysis.tasks)
+    )
+    with registry.lease(build_controls_mapper, pack, model_for("controls", pack)) as agent:
+        return run_agent(agent, prompt).content
+
+
+def _stage_accessibility(pack: str, rfp_analysis: RFPAnalysis) -> str:
+    with registry.lease(build_accessibility_agent, pack, model_for("accessibility", pack)) as agent:
+        return run_agent(agent, format_analysis_text(rfp_analysis)).content
+
+
+def _stage_scrm(pack: str, rfp_analysis: RFPAnalysis) -> str:
+    with registry.lease(build_scrm_sbom_agent, pack, model_for("scrm", pack)) as agent:
+        return run_agent(agent, format_analysis_text(rfp_analysis)).content
+
+
+def _crosswalk_notes(crosswalk: Optional[ComplianceMatrix]) -> dict:
+    """Group crosswalk rows by the outline section number they map to."""
+    notes: dict = {}
+    for row in (crosswalk.rows if crosswalk else []):
+        key = (row.section.split() or [""])[0].rstrip(".")
+        notes.setdefault(key, ["COMPLIANCE ROWS FOR THIS SECTION:"]).append(
+            f"- {row.requirement} (page {row.page}, status {row.status})"
+        )
+    return {k: "\n".join(v) for k, v in notes.items()}
+
+
+def format_sections(sections: List[ProposalSection]) -> str:
+    return "\n\n".join(s.content for s in sections)
+
+
+def _library_matches(sections: list, rfp_analysis: RFPAnalysis, crosswalk: Optional[ComplianceMatrix], pack: Optional[str]) -> ReuseReport:
+    """Approved sections from the section library close enough to adapt, per outline section number."""
+    library = open_library()
+    if library is None:
+        return ReuseReport(fresh=[s.section_number for s in sections])
+    requirements: dict = {}
+    for row in (crosswalk.rows if crosswalk else []):
+        requirements.setdefault((row.section.split() or [""])[0].rstrip("."), []).append(row.requirement)
+    try:
+        report = library.match_outline(sections, requirements, pack=pack, customer_type=customer_type(rfp_analysis.customer, pack))
+    finally:
+        library.close()
+    print(f"📚 Section library: {len(report.reused)} of {len(sections)} section(s) will be adapted from approved text")
+    return report
+
+
+def _stage_draft(
+    rfp_analysis: RFPAnalysis,
+    outline: ProposalOutline,
+    crosswalk: Optional[ComplianceMatrix] = None,
+    technology: Optional[str] = None,
+    controls: Optional[str] = None,
+    accessibility: Optional[str] = None,
+    scrm: Optional[str] = None,
+    pack: Optional[str] = None,
+) -> dict:
+    shared_context = _drafting_context(rfp_analysis, outline, crosswalk, technology, controls, accessibility, scrm)
+    titles = {s.section_number: s.title for s in outline.sections}
+    reuse = _library_matches(outline.sections, rfp_analysis, crosswalk, pack)
+    drafted = draft_sections(
+        outline.sections,
+        shared_context,
+        model_id=model_for("writer", pack),
+        section_notes=_crosswalk_notes(crosswalk),
+        reference_sections={number: match.body for number, match in reuse.reused.items()},
+    )
+    section_drafts = [
+        ProposalSection(section_number=number, title=titles[number], content=text, word_count=len(text.split()))
+        for number, text in drafted.items()
+    ]
+    return {
+        "section_drafts": section_drafts,
+        "drafts": format_sections(section_drafts),
+        "drafting_context": shared_context,
+        "section_reuse": reuse.summary(),
+    }
+
+
+def _drafting_context(
+    rfp_analysis: RFPAnalysis,
+    outline: ProposalOutline,
+    crosswalk: Optional[ComplianceMatrix] = None,
+    technology: Optional[str] = None,
+    controls: Optional[str] = None,
+    accessibility: Optional[str] = None,
+    scrm: Optional[str] = None,
+) -> str:
+    """Read-only context shared by every per-section drafting call."""
+    missing = "(not available for this run)"
+    return f"""
+{format_analysis_text(rfp_analysis)}
+PROPOSAL OUTLINE:
+{format_outline(outline)}
+
+COMPLIANCE CROSSWALK:
+{format_crosswalk(crosswalk)}
+
+TECHNOLOGY INSIGHTS:
+{technology or missing}
+
+POLICY-PACK DIRECTIVES:
+Controls Mapper:
+{controls or missing}
+
+Accessibility:
+{accessibility or missing}
+
+SCRM & SBOM:
+{scrm or missing}
+"""
+
+
+def _review_model(role: str, pack: Optional[str] = None) -> str:
+    """Model for an editorial role; one priced above the budget's review model drops to it once spend runs high."""
+    budget = active_budget()
+    model_id = model_for(role, pack)
+    return budget.review_model(model_id) if budget else model_id
+
+
+def _review_models(pack: Optional[str] = None) -> dict:
+    """review_sections keyword arguments: the English and Tone passes each on their own role's model."""
+    return {"english_model_id": _review_model("english", pack), "tone_model_id": _review_model("tone", pack)}
+
+
+def _stage_style_sheet(section_drafts: List[ProposalSection]) -> StyleSheet:
+    with registry.lease(build_style_sheet_agent, _review_model("style_sheet")) as agent:
+        sheet = derive_style_sheet(agent, {s.section_number: s.content for s in section_drafts})
+    print(f"✅ Style sheet derived: {len(sheet.terminology)} terms, {len(sheet.acronyms)} acronyms")
+    return sheet
+
+
+def _stage_review(pack: str, section_drafts: List[ProposalSection], style_sheet: StyleSheet) -> dict:
+    revised, notes = review_sections({s.section_number: s.content for s in section_drafts}, style_sheet, **_review_models(pack))
+    reviewed = [
+        s.model_copy(update={"content": revised[s.section_number], "word_count": len(revised[s.section_number].split())})
+        for s in section_drafts
+    ]
+    return {
+        "reviewed_sections": reviewed,
+        "review_notes": "\n\n".join(f"**{number}**\n{note}" for number, note in notes.items()),
+    }
+
+
+def _format_open_issues(issues: List[OpenIssue]) -> str:
+    if not issues:
+        return "No open red-team or QA issues."
+    lines = ["| Source | Section | Issue |", "|---|---|---|"]
+    for issue in issues:
+        lines.append(f"| {issue.source} | {issue.section or 'General'} | {issue.description.replace('|', '/')} |")
+    return "\n".join(lines)
+
+
+def _stage_refine(
+    pack: str,
+    rfp_analysis: RFPAnalysis,
+    drafting_context: str,
+    reviewed_sections: List[ProposalSection],
+    style_sheet: StyleSheet,
+    crosswalk: Optional[ComplianceMatrix] = None,
+) -> dict:
+    """Red team + QA → rewrite only the sections with open issues, until the issue count converges."""
+    titles = {s.section_number: s.title for s in reviewed_sections}
+    requirements_text = format_analysis_text(rfp_analysis)
+
+    def _qa(sections: dict) -> list:
+        payload = QAInputs(
+            active_pack_name=pack,
+            final_draft_text="\n\n".join(sections.values()),
+            compliance_crosswalk=crosswalk.model_dump() if crosswalk else {},
+            artifact_presence={"ComplianceCrosswalk": bool(crosswalk and crosswalk.rows), "StyleSheet": True},
+            section_lengths={n: len(t.split()) for n, t in sections.items()},
+            section_targets={},
+            citation_samples=[l.strip() for t in sections.values() for l in t.splitlines() if "page" in l.lower()][:20],
+            unresolved_red_team=[],
+        )
+        with registry.lease(build_qa_gatekeeper, pack, model_for("qa", pack)) as qa_agent:
+            report = run_qa_gatekeeper(qa_agent, payload)
+        return [
+            OpenIssue("QA", f"[{f.severity}/{f.area}] {f.description} — fix: {f.fix}", resolve_section_number(f.evidence_anchor, titles), f.fix)
+            for f in report.findings
+            if f.severity.lower() in ("critical", "major")
         ]
-        upgraded_team, active_pack_name, profile = assemble_team_with_us_upgrades(
-            llm_model=llm_model,
-            base_members=base_members,
-            rfp_text_or_draft=analysis_text,
+
+    def _red_team(sections: dict) -> list:
+        with registry.lease(build_compliance_red_team, pack, model_for("red_team", pack)) as red_team_agent:
+            issues = run_compliance_red_team(red_team_agent, requirements_text, "\n\n".join(sections.values()))
+        return [
+            OpenIssue("RedTeam", f"{i.finding} — fix: {i.fix or 'n/a'}", resolve_section_number(i.section, titles), i.fix or "")
+            for i in issues
+        ]
+
+    def _run_check(check, sections: dict) -> tuple:
+        try:
+            return check(sections), None
+        except (StageCancelled, BudgetExhausted):
+            raise
+        except Exception as e:
+            label = "QA gatekeeper" if check is _qa else "red team"
+            print(f"⚠️  {label} check failed: {e}")
+            return [], f"{label}: {str(e)[:160]}"
+
+    def find_issues(sections: dict) -> List[OpenIssue]:
+        results = fan_out([_red_team, _qa], lambda check: _run_check(check, sections), max_workers=2)
+        found = [issue for issues, _ in results for issue in issues]
+        errors = [error for _, error in results if error]
+        if errors:
+            # A failed check is not a clean one: the loop must not read it as fewer open issues.
+            raise IssueCheckFailed("; ".join(errors), found)
+        return found
+
+    def rewrite(subset: dict, issues_by_section: dict) -> dict:
+        revised = revise_sections(
+            subset,
+            {n: [i.description for i in issues] for n, issues in issues_by_section.items()},
+            drafting_context,
+            model_id=model_for("writer", pack),
         )
+        reviewed, _ = review_sections(revised, style_sheet, **_review_models(pack))
+        return reviewed
+
+    budget = active_budget()
+    outcome = refine_until_converged(
+        {s.section_number: s.content for s in reviewed_sections},
+        find_issues,
+        rewrite,
+        max_iterations=budget.refinement_passes(REFINE_MAX_ITERATIONS) if budget else None,
+    )
+    print(f"✅ {outcome.summary()}")
+    refined = [
+        s.model_copy(update={"content": outcome.sections[s.section_number], "word_count": len(outcome.sections[s.section_number].split())})
+        for s in reviewed_sections
+    ]
+    return {
+        "refined_sections": refined,
+        "final_draft": format_sections(refined),
+        "red_team": _format_open_issues(outcome.open_issues),
+        "refinement_log": outcome.summary(),
+    }
+
+
+def _stage_english(drafts: str) -> str:
+    with registry.lease(build_english_agent, _review_model("english")) as agent:
+        return run_agent(agent, drafts).content
+
+
+def _stage_tone(english: str) -> str:
+    with registry.lease(build_tone_agent, _review_model("tone")) as agent:
+        return run_agent(agent, english).content
+
+
+def _stage_red_team(pack: str, rfp_analysis: RFPAnalysis, drafts: str) -> str:
+    prompt = layout(
+        analysis="BUYER REQUIREMENTS:\n" + format_analysis_text(rfp_analysis),
+        specific=f"CURRENT PROPOSAL DRAFT:\n{drafts}",
+    )
+    with registry.lease(build_compliance_red_team, pack, model_for("red_team", pack)) as agent:
+        return run_agent(agent, prompt).content
+
 
-        upgraded_team.print_response(
-            analysis_text,
-            stream=False,
-            show_full_reasoning=False,
-            stream_intermediate_steps=False,
-            console=console,
+def _stage_scoring(pack: str, final_draft: str, red_team: str) -> str:
+    prompt = layout(
+        pack=pack,
+        specific=[f"PROPOSAL:\n{final_draft}", f"OPEN COMPLIANCE RED TEAM ISSUES:\n{red_team}"],
+    )
+    with registry.lease(build_proposal_scoring_agent, model_for("scoring", pack)) as agent:
+        return run_agent(agent, prompt).content
+
+
+def _pack_stages(speculate_pack: bool) -> list:
+    """Pack-aware augmenters. With speculation, one branch per policy pack starts as soon as the
+    RFP analysis exists; the pipeline keeps the branch matching the profiler's pack and cancels the rest."""
+    augmenters = [
+        ("controls", _stage_controls),
+        ("accessibility", _stage_accessibility),
+        ("scrm", _stage_scrm),
+    ]
+    if not speculate_pack:
+        return [Stage(name, fn, inputs=("pack", "rfp_analysis"), outputs=(name,)) for name, fn in augmenters]
+    return [
+        Stage(
+            f"{name}[{pack_name}]",
+            functools.partial(fn, pack_name),
+            inputs=("rfp_analysis",),
+            outputs=(name,),
+            speculative=("pack", pack_name),
         )
-        
-    except Exception as e:
-        print(f"❌ Structured analysis failed: {e}")
-        print("Falling back to original approach...")
-        base_members = [
-            rfp_analyzer_agent,
-            proposal_outline_agent,
-            outlining_compliance_agent,
-            technology_agent,
-            section_writing_agent,
-            english_agent,
-            tone_agent,
-            proposal_scoring_agent,
+        for name, fn in augmenters
+        for pack_name in POLICY_PACKS
+    ]
+
+
+def _review_stages(review_mode: str) -> list:
+    """`section`: style sheet once, English → Tone per section in parallel, then a red team/QA refinement loop
+    that rewrites only sections with open issues. `document`: one pass each over the full draft plus a single red team."""
+    if review_mode == "document":
+        return [
+            Stage("english", _stage_english, inputs=("drafts",), outputs=("english",)),
+            Stage("tone", _stage_tone, inputs=("english",), outputs=("final_draft",)),
+            Stage("red_team", _stage_red_team, inputs=("pack", "rfp_analysis", "drafts"), outputs=("red_team",)),
         ]
-        upgraded_team, active_pack_name, profile = assemble_team_with_us_upgrades(
-            llm_model=llm_model,
-            base_members=base_members,
-            rfp_text_or_draft=rfp_text,
+    return [
+        Stage("style_sheet", _stage_style_sheet, inputs=("section_drafts",), outputs=("style_sheet",)),
+        Stage(
+            "review",
+            _stage_review,
+            inputs=("pack", "section_drafts", "style_sheet"),
+            outputs=("reviewed_sections", "review_notes"),
+        ),
+        Stage(
+            "refine",
+            _stage_refine,
+            inputs=("pack", "rfp_analysis", "drafting_context", "reviewed_sections", "style_sheet"),
+            optional_inputs=("crosswalk",),
+            outputs=("refined_sections", "final_draft", "red_team", "refinement_log"),
+        ),
+    ]
+
+
+# Typical GPT-5 latency per stage (seconds), used to project whether optional stages fit a fast-mode SLA.
+STAGE_ESTIMATES = {
+    "analyze": 90, "profile": 20, "outline": 40, "crosswalk": 60, "technology": 120,
+    "controls": 45, "accessibility": 45, "scrm": 45, "draft": 180, "style_sheet": 20,
+    "review": 120, "refine": 240, "english": 90, "tone": 90, "red_team": 60, "scoring": 60,
+}
+STAGE_ESTIMATES.update(json.loads(os.getenv("STAGE_ESTIMATES", "{}")))
+
+# Stages a fast run may defer; analysis, profiling, outline and per-section drafting always run.
+FAST_MODE_OPTIONAL_STAGES = {
+    "crosswalk", "technology", "controls", "accessibility", "scrm", "style_sheet",
+    "review", "refine", "english", "tone", "red_team", "scoring",
+}
+# The required chain (analyze → outline → draft) alone is ~310s at the estimates above. At 600s a fast run
+# keeps crosswalk, research, pack augmenters, style sheet and per-section review and defers refine and scoring.
+FAST_MODE_SLA_SECONDS = float(os.getenv("FAST_MODE_SLA_SECONDS", "600"))
+
+# Hard limits for unattended runs (0 = unbounded). STAGE_TIMEOUTS overrides the default per stage, e.g. {"draft": 900}.
+STAGE_TIMEOUT_SECONDS = float(os.getenv("STAGE_TIMEOUT_SECONDS", "0"))
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "0"))
+STAGE_TIMEOUTS = json.loads(os.getenv("STAGE_TIMEOUTS", "{}"))
+
+# Stream the analyzer's JSON and start technology research on partial results (see --stream-analysis).
+ANALYSIS_STREAMING = os.getenv("ANALYSIS_STREAMING", "0").lower() in ("1", "true", "yes", "on")
+
+
+def build_proposal_pipeline(
+    speculate_pack: bool = False, review_mode: str = "section", mode: str = "full", stream_analysis: bool = False
+) -> Pipeline:
+    """Declare the proposal workflow as a stage graph keyed by artifact name.
+
+    With `stream_analysis`, the analyze stage streams the analyzer's JSON and also produces `technology_terms`
+    (extracted and researched while the analysis is generated), which the technology stage then reuses.
+
+    In `fast` mode the stages in FAST_MODE_OPTIONAL_STAGES become optional, so `Pipeline.run(sla_seconds=...)`
+    can defer them when the projected wall time would exceed the SLA. The augmenters in BUDGET_OPTIONAL_STAGES
+    are always optional so the token budget can defer them through `Pipeline.run(admit=...)`.
+    """
+    stages = [
+        Stage("analyze", _stage_analyze, inputs=("rfp_text",), outputs=("rfp_analysis",))
+        if not stream_analysis
+        else Stage(
+            "analyze", functools.partial(_stage_analyze, stream=True), inputs=("rfp_text",),
+            outputs=("rfp_analysis", "technology_terms"),
+        ),
+        Stage("profile", _stage_profile, inputs=("rfp_text",), outputs=("profile", "pack")),
+        Stage("outline", _stage_outline, inputs=("rfp_analysis",), outputs=("outline",)),
+        Stage("crosswalk", _stage_crosswalk, inputs=("rfp_analysis", "outline"), outputs=("crosswalk",)),
+        Stage(
+            "technology", _stage_technology, inputs=("rfp_analysis", "outline"),
+            optional_inputs=("technology_terms",), outputs=("technology",),
+        ),
+        *_pack_stages(speculate_pack),
+        Stage(
+            "draft",
+            _stage_draft,
+            inputs=("rfp_analysis", "outline"),
+            optional_inputs=("crosswalk", "technology", "controls", "accessibility", "scrm", "pack"),
+            outputs=("section_drafts", "drafts", "drafting_context", "section_reuse"),
+        ),
+        *_review_stages(review_mode),
+        Stage("scoring", _stage_scoring, inputs=("pack", "final_draft", "red_team"), outputs=("scoring",)),
+    ]
+    for stage in stages:
+        base_name = stage.name.split("[")[0]
+        stage.estimate = STAGE_ESTIMATES.get(base_name, 0.0)
+        stage.optional = base_name in (FAST_MODE_OPTIONAL_STAGES if mode == "fast" else BUDGET_OPTIONAL_STAGES)
+        stage.timeout = STAGE_TIMEOUTS.get(base_name)
+        # Optional stages queue behind the critical path when the provider's rate limits are the bottleneck.
+        scheduler.set_lane(base_name, "optional" if stage.optional else "critical")
+    return Pipeline(stages)
+
+
+def format_proposal_package(artifacts: dict) -> str:
+    """Assemble the deliverables produced by the pipeline into one markdown document."""
+    parts = [f"# Proposal Package ({artifacts.get('pack', 'unknown pack')})"]
+    proposal = (
+        artifacts.get("final_draft")
+        or artifacts.get("english")
+        or (format_sections(artifacts["reviewed_sections"]) if artifacts.get("reviewed_sections") else None)
+        or artifacts.get("drafts")
+    )
+    deliverables = [
+        ("Proposal", proposal),
+        ("Compliance Crosswalk", format_crosswalk(artifacts["crosswalk"]) if "crosswalk" in artifacts else None),
+        ("Staff ↔ Control Matrix", artifacts.get("controls")),
+        ("Accessibility Checklist", artifacts.get("accessibility")),
+        ("SCRM & SBOM", artifacts.get("scrm")),
+        ("Technology Research", artifacts.get("technology")),
+        ("Editorial Notes", artifacts.get("review_notes")),
+        ("Compliance Red Team Issues", artifacts.get("red_team")),
+        ("Refinement", artifacts.get("refinement_log")),
+        ("Amendment", artifacts.get("amendment_log")),
+        ("Section Reuse", artifacts.get("section_reuse")),
+        ("Scoring", artifacts.get("scoring")),
+    ]
+    for title, body in deliverables:
+        if body:
+            parts.append(f"## {title}\n\n{body}")
+    return "\n\n".join(parts)
+
+
+def run_team_workflow(
+    rfp_text: str,
+    console: Console,
+    speculate_pack: bool = False,
+    deadline_seconds: Optional[float] = None,
+    skip_analysis: bool = False,
+):
+    """Legacy path: hand the whole brief to the pack-aware Team and let its leader sequence members.
+
+    With `speculate_pack`, domain profiling runs alongside the RFP analysis instead of after it.
+    With `deadline_seconds`, the run stops at the deadline and prints the member outputs gathered so far.
+    With `skip_analysis` (the DAG engine's analysis already failed), the team gets the raw RFP text
+    straight away instead of paying for the failed structured analysis a second time.
+    """
+    # Members are leased from the agent pool for this run and returned (state reset) when it ends.
+    with registry.checkout() as agents:
+        base_members = [agents.get(builder, model_for(role)) for builder, role in CORE_AGENT_BUILDERS]
+        history = TeamHistoryManager()
+        governor = DelegationGovernor()
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        profile_future = None
+        if speculate_pack and not skip_analysis:
+            profile_pool = ThreadPoolExecutor(max_workers=1)
+            profile_future = profile_pool.submit(profile_domain, rfp_text)
+            profile_pool.shutdown(wait=False)
+
+        def _run_on_raw_text():
+            upgraded_team, _, _ = assemble_team_with_us_upgrades(
+                llm_model=model_for("orchestrator"),
+                base_members=base_members,
+                rfp_text_or_draft=rfp_text,
+                history=history,
+                governor=governor,
+                agents=agents,
+            )
+            return run_agent(upgraded_team, rfp_text, stream=False)
+
+        with stage_scope("team", threading.Event(), deadline):
+            try:
+                if skip_analysis:
+                    print("Running the team on the raw RFP text...")
+                    response = _run_on_raw_text()
+                else:
+                    try:
+                        # First, get structured RFP analysis
+                        print("Analyzing RFP with structured output...")
+                        rfp_analysis = _stage_analyze(rfp_text)
+                        analysis_text = format_analysis_text(rfp_analysis, rfp_text)
+
+                        # Assemble upgraded orchestrated team and run
+                        upgraded_team, active_pack_name, profile = assemble_team_with_us_upgrades(
+                            llm_model=model_for("orchestrator"),
+                            base_members=base_members,
+                            rfp_text_or_draft=analysis_text,
+                            profile=wait_for(profile_future)[0] if profile_future else None,
+                            history=history,
+                            governor=governor,
+                            agents=agents,
+                        )
+                        response = run_agent(upgraded_team, analysis_text, stream=False)
+
+                    except StageCancelled:
+                        raise
+                    except Exception as e:
+                        print(f"❌ Structured analysis failed: {e}")
+                        print("Falling back to original approach...")
+                        response = _run_on_raw_text()
+            except StageTimeout:
+                agents.close(discard=True)  # the abandoned team call may still be using its members
+                print(f"⏱️  Team run stopped at the {deadline_seconds:.0f}s deadline; saving partial member outputs.")
+                partial = "\n\n".join(f"### {key}\n\n{text}" for key, text in history.artifacts.items())
+                console.print(Markdown(
+                    f"# Partial Proposal (team run timed out after {deadline_seconds:.0f}s)\n\n"
+                    + (partial or "_No member finished before the deadline._")
+                ))
+                console.print(Markdown("## Delegation Summary\n\n" + governor.report()))
+                return
+
+        # Member outputs kept out of the leader's context come back as references; restore them for the saved proposal.
+        console.print(Markdown(history.expand(getattr(response, "content", None) or "")))
+        print(history.summary())
+        console.print(Markdown("## Delegation Summary\n\n" + governor.report()))
+
+
+def _run_engine(args, rfp_text: str, console: Console, budget: TokenBudget, previous_text: Optional[str] = None):
+    """Run the selected engine and print its deliverables into the recorded console."""
+    if args.engine == "team":
+        run_team_workflow(rfp_text, console, speculate_pack=args.speculate_pack, deadline_seconds=args.deadline_seconds or None)
+    else:
+        use_checkpoints = CHECKPOINTS_ENABLED or args.resume or previous_text is not None
+        checkpoints = CheckpointStore(salt=fingerprint(), resume=args.resume) if use_checkpoints else None
+        if previous_text is not None:
+            deadline = time.monotonic() + args.deadline_seconds if args.deadline_seconds else None
+            with stage_scope("amendment", threading.Event(), deadline):
+                amended = run_amendment_workflow(previous_text, rfp_text, checkpoints)
+            if amended is not None:
+                checkpoints.save_run(rfp_text, amended)
+                console.print(Markdown(format_proposal_package(amended)))
+                return
+            print("⚠️  No saved run of the previous RFP version; running the full pipeline instead.")
+        pipeline = build_proposal_pipeline(
+            speculate_pack=args.speculate_pack,
+            review_mode=args.review_mode,
+            mode=args.mode,
+            stream_analysis=args.stream_analysis,
         )
-        upgraded_team.print_response(
-            rfp_text,
-            stream=False,
-            show_full_reasoning=False,
-            stream_intermediate_steps=False,
-            console=console,
+        started = time.monotonic()
+        result = pipeline.run(
+            {"rfp_text": rfp_text},
+            sla_seconds=args.sla_seconds if args.mode == "fast" else None,
+            stage_timeout=args.stage_timeout or None,
+            deadline_seconds=args.deadline_seconds or None,
+            admit=lambda stage: budget.defer_reason(stage.name),
+            checkpoints=checkpoints,
         )
+        if checkpoints is not None:
+            print(checkpoints.summary())
+        if "rfp_analysis" not in result.artifacts and (result.deadline_hit or "analyze" in result.timed_out):
+            print(f"⏱️  RFP analysis did not finish in time: {result.errors.get('analyze')}")
+            console.print(Markdown("## Pipeline Summary\n\n" + result.summary()))
+        elif "rfp_analysis" not in result.artifacts:
+            print(f"❌ Structured analysis failed: {result.errors.get('analyze')}")
+            # The fallback gets what is left of the run's deadline, not a fresh unbounded run.
+            remaining = args.deadline_seconds - (time.monotonic() - started) if args.deadline_seconds else None
+            if remaining is not None and remaining <= 0:
+                print("⏱️  No time left before the deadline for the team fallback.")
+                console.print(Markdown("## Pipeline Summary\n\n" + result.summary()))
+                return
+            print("Falling back to team orchestration...")
+            run_team_workflow(rfp_text, console, speculate_pack=args.speculate_pack, deadline_seconds=remaining, skip_analysis=True)
+        else:
+            if checkpoints is not None:
+                checkpoints.save_run(rfp_text, result.artifacts)
+            console.print(Markdown(format_proposal_package(result.artifacts)))
+            console.print(Markdown("## Pipeline Summary\n\n" + result.summary()))
+            if result.deferred:
+                reasons = "; ".join(f"{n} ({result.errors.get(n, 'deferred')})" for n in result.deferred)
+                console.print(Markdown(
+                    f"**Deferred:** {reasons}. Run again in full mode, or with a larger token budget, to fill in these stages."
+                ))
+            if result.timed_out or result.deadline_hit:
+                console.print(Markdown(
+                    "**Partial result:** the proposal above contains every stage completed before the time limit. "
+                    f"Timed out: {', '.join(result.timed_out) or 'none'}."
+                ))
+
+
+def run_amendment_workflow(previous_text: str, rfp_text: str, checkpoints: CheckpointStore) -> Optional[dict]:
+    """Re-run only what an RFP amendment touches, starting from the previous version's saved run.
+
+    The amended RFP is re-analyzed and diffed against the previous analysis; the outline is regenerated
+    only when tasks were added or removed, only changed requirements are re-mapped in the crosswalk,
+    pack artifacts are refreshed only when a change mentions their subject, and only the sections that
+    depend on a change are redrafted and reviewed. Returns the amended artifacts, or None when no run
+    over `previous_text` was saved.
+    """
+    baseline = checkpoints.load_run(previous_text)
+    if not baseline or "rfp_analysis" not in baseline or "outline" not in baseline:
+        return None
+    artifacts = dict(baseline)
+    if not diff_text(previous_text, rfp_text):
+        print("✅ Amendment: RFP text unchanged; reusing the previous run.")
+        artifacts["amendment_log"] = "No differences between the RFP versions; every artifact was reused."
+        return artifacts
+
+    rerun = ["analyze"]
+    analysis = _stage_analyze(rfp_text)
+    diff = diff_analysis(baseline["rfp_analysis"], analysis, previous_text, rfp_text)
+    print(f"🔎 Amendment: {len(diff.changes)} grounded change(s) across {len(diff.text_changes)} changed clause(s)")
+    artifacts["rfp_analysis"] = analysis
+    pack = baseline.get("pack") or _stage_profile(rfp_text)["pack"]
+
+    outline = baseline["outline"]
+    if diff.tasks_changed:
+        outline = _stage_outline(analysis)
+        rerun.append("outline")
+    artifacts["outline"] = outline
+
+    crosswalk = baseline.get("crosswalk")
+    changed_requirements = set(diff.new_requirements)
+    if changed_requirements or diff.stale_requirements:
+        subset = analysis.model_copy(update={"requirements": [r for r in analysis.requirements if r.description in changed_requirements]})
+        new_rows = _stage_crosswalk(subset, outline).rows if subset.requirements else []
+        crosswalk = ComplianceMatrix(rows=merge_crosswalk_rows(crosswalk.rows if crosswalk else [], new_rows, diff.stale_requirements))
+        rerun.append(f"crosswalk ({len(new_rows)} row(s) re-mapped)")
+    artifacts["crosswalk"] = crosswalk
+
+    refreshers = {
+        "technology": lambda: _stage_technology(analysis, outline),
+        "controls": lambda: _stage_controls(pack, analysis),
+        "accessibility": lambda: _stage_accessibility(pack, analysis),
+        "scrm": lambda: _stage_scrm(pack, analysis),
+    }
+    refresh = affected_pack_artifacts(diff)
+    for name, value in zip(refresh, fan_out(refresh, lambda name: refreshers[name]())):
+        artifacts[name] = value
+    rerun += refresh
+
+    drafts = baseline.get("refined_sections") or baseline.get("reviewed_sections") or baseline.get("section_drafts") or []
+    previous_titles = {s.section_number: s.title for s in drafts}
+    by_number = {s.section_number: s for s in drafts}
+    # Drafts follow their section's title, so a renumbered outline does not hand one section another's text.
+    previous = {
+        number: by_number[old]
+        for number, old in match_previous_sections({s.section_number: s.title for s in outline.sections}, previous_titles).items()
+    }
+    views = {
+        s.section_number: SectionView(s.title, s.content or "", previous[s.section_number].content if s.section_number in previous else "")
+        for s in outline.sections
+    }
+    affected = affected_sections(diff, views, crosswalk.rows if crosswalk else [], previous_titles=previous_titles)
+    targets = [s for s in outline.sections if s.section_number in affected]
+    shared_context = _drafting_context(
+        analysis, outline, crosswalk,
+        artifacts.get("technology"), artifacts.get("controls"), artifacts.get("accessibility"), artifacts.get("scrm"),
+    ) + f"\nAMENDMENT CHANGES (this RFP version vs. the previous one):\n{diff.summary()}\n"
+    notes = _crosswalk_notes(crosswalk)
+    for number, reasons in affected.items():
+        notes[number] = (notes.get(number, "") + "\nAMENDMENT CHANGES AFFECTING THIS SECTION:\n"
+                         + "\n".join(f"- {reason}" for reason in reasons)).strip()
+    print(f"✍️  Amendment: redrafting {len(targets)} of {len(outline.sections)} section(s)")
+    redrafted = {}
+    if targets:
+        # Same writer tier and library references as a fresh run's draft stage.
+        reuse = _library_matches(targets, analysis, crosswalk, pack)
+        redrafted = draft_sections(
+            targets,
+            shared_context,
+            model_id=model_for("writer", pack),
+            section_notes=notes,
+            reference_sections={number: match.body for number, match in reuse.reused.items()},
+        )
+    if redrafted and baseline.get("style_sheet"):
+        redrafted, _ = review_sections(redrafted, baseline["style_sheet"], **_review_models(pack))
+
+    sections = [
+        ProposalSection(section_number=s.section_number, title=s.title, content=text, word_count=len(text.split()))
+        for s in outline.sections
+        for text in [redrafted.get(s.section_number) or (previous[s.section_number].content if s.section_number in previous else "")]
+        if text
+    ]
+    artifacts.update({
+        "refined_sections": sections,
+        "final_draft": format_sections(sections),
+        "drafting_context": shared_context,
+    })
+    stale_note = f"_Carried over from the previous RFP version; sections {', '.join(affected) or 'none'} have since been redrafted._"
+    for name in ("red_team", "scoring"):
+        if artifacts.get(name):
+            artifacts[name] = f"{stale_note}\n\n{artifacts[name]}"
+    artifacts["amendment_log"] = (
+        f"{diff.summary()}\n\nRe-ran: {', '.join(rerun)}.\n\n"
+        f"Redrafted {len(targets)} of {len(outline.sections)} section(s):\n"
+        + ("\n".join(f"- {n}: {'; '.join(reasons)}" for n, reasons in affected.items()) or "- none")
+    )
+    return artifacts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Maestor proposal workflow against an RFP text file.")
+    parser.add_argument(
+        "--rfp-file",
+        dest="rfp_file",
+        help="Path to an RFP .txt file. Defaults to sample_rfp_dev.txt.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["dag", "team"],
+        default="dag",
+        help="dag: run stages as an explicit dependency graph (default). team: legacy leader-coordinated Team.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["full", "fast"],
+        default="full",
+        help="full: every stage (default). fast: analysis, outline and per-section drafting, plus optional stages "
+        "only while the projected wall time fits --sla-seconds.",
+    )
+    parser.add_argument(
+        "--sla-seconds",
+        type=float,
+        default=FAST_MODE_SLA_SECONDS,
+        help="Wall-clock target for --mode fast (default: FAST_MODE_SLA_SECONDS or 600). At typical latencies "
+        "(STAGE_ESTIMATES) 600s keeps crosswalk, technology research, pack augmenters, style sheet and per-section "
+        "review, and defers refinement and scoring; below ~310s only analysis, outline and drafting fit.",
+    )
+    parser.add_argument(
+        "--review-mode",
+        choices=["section", "document"],
+        default="section",
+        help="section: derive a style sheet once, then run English and Tone per section in parallel (default). "
+        "document: one English and one Tone pass over the whole draft.",
+    )
+    parser.add_argument(
+        "--speculate-pack",
+        action="store_true",
+        help="Profile the domain concurrently with RFP analysis and start pack-aware work for every policy pack, "
+        "keeping only the branch that matches the selected pack.",
+    )
+    parser.add_argument(
+        "--stream-analysis",
+        action=argparse.BooleanOptionalAction,
+        default=ANALYSIS_STREAMING,
+        help="Stream the RFP analysis and start technology term extraction and research on each batch of "
+        "completed tasks/requirements while the analysis is still being generated (default: ANALYSIS_STREAMING env).",
+    )
+    parser.add_argument(
+        "--stage-timeout",
+        type=float,
+        default=STAGE_TIMEOUT_SECONDS,
+        help="Seconds any single stage may run before it is stopped and marked timed_out "
+        "(default: STAGE_TIMEOUT_SECONDS; 0 = no limit). STAGE_TIMEOUTS overrides it per stage.",
+    )
+    parser.add_argument(
+        "--deadline-seconds",
+        type=float,
+        default=RUN_DEADLINE_SECONDS,
+        help="Deadline for the whole run; completed stages are kept and the rest are marked timed_out or skipped "
+        "(default: RUN_DEADLINE_SECONDS; 0 = no limit).",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=RUN_TOKEN_BUDGET,
+        help="Prompt + completion tokens this run may spend; review stages, refinement and optional augmenters "
+        "degrade as it drains (default: RUN_TOKEN_BUDGET; 0 = unlimited).",
+    )
+    parser.add_argument(
+        "--cost-budget",
+        type=float,
+        default=RUN_COST_BUDGET,
+        help="USD this run may spend, priced with MODEL_PRICES (default: RUN_COST_BUDGET; 0 = unlimited).",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        action=argparse.BooleanOptionalAction,
+        default=LLM_CACHE_ENABLED,
+        help="Serve identical agent calls from the disk cache in LLM_CACHE_DIR (default: LLM_CACHE env). "
+        "The injected datetime is pinned per LLM_CACHE_PIN_DATETIME so repeated runs hit.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse stage checkpoints from CHECKPOINT_DIR whose inputs (RFP text, pack, model, upstream artifacts) "
+        "are unchanged; only stages after the first changed or missing one are re-run.",
+    )
+    parser.add_argument(
+        "--amend-from",
+        dest="amend_from",
+        help="Path to the previous version of this RFP. Diffs it against --rfp-file and re-runs only the sections, "
+        "crosswalk rows and pack artifacts affected by the amendment (needs a saved run of the previous version; "
+        "dag engine only).",
+    )
+    args = parser.parse_args(argv)
+    if args.amend_from and args.engine == "team":
+        parser.error("--amend-from needs the dag engine; the team engine has no stage checkpoints to amend")
+
+    try:
+        rfp_text, rfp_path = load_rfp_text(args.rfp_file)
+    except FileNotFoundError as err:
+        print(f"❌ {err}")
+        return
+
+    print(f"Using RFP file: {rfp_path}")
+    previous_text = None
+    if args.amend_from:
+        try:
+            previous_text, previous_path = load_rfp_text(args.amend_from)
+        except FileNotFoundError as err:
+            print(f"❌ {err}")
+            return
+        print(f"Amending from previous RFP version: {previous_path}")
+    console = Console(record=True)
+    budget = TokenBudget(max_tokens=args.token_budget, max_cost=args.cost_budget)
+
+    cache = LLMCache() if args.llm_cache else None
+
+    with use_budget(budget), use_cache(cache):
+        _run_engine(args, rfp_text, console, budget, previous_text)
+    console.print(Markdown("## Token Budget\n\n" + budget.summary()))
+    console.print(Markdown("## Prompt Cache\n\n" + budget.prompt_cache_summary()))
+    console.print(Markdown("## JSON Repair\n\n" + repair_stats.summary()))
+    if cache:
+        console.print(cache.summary())
+    print(call_stats.summary())
+    print(scheduler.summary())
+    print(pool_summary())
+    print(endpoints.summary())
+    print(routing_summary())
+    print(registry.summary())
 
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     base_output_dir = Path("output_proposals")
@@ -439,4 +1321,3 @@ Original RFP Text:
 
 if __name__ == "__main__":
     main()
-    
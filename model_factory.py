@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Model Factory (one shared HTTP client and connection pool per provider)
+Agent builders create their models through `openai_model(model_id)` instead of `OpenAIChat(id=...)`
+(and endpoint pools through `anthropic_model` for Claude).
+Every model of a provider then shares one httpx client, so concurrent stages reuse warm keep-alive
+connections instead of each agent opening its own pool and paying fresh TLS handshakes, and the
+total number of sockets is capped in one place:
+- LLM_HTTP_MAX_CONNECTIONS (default 64) open connections, LLM_HTTP_MAX_KEEPALIVE (32) of them
+  kept idle for LLM_HTTP_KEEPALIVE_EXPIRY seconds;
+- LLM_HTTP_CONNECT_TIMEOUT / LLM_HTTP_READ_TIMEOUT / LLM_HTTP_POOL_TIMEOUT (waiting for a free
+  connection) in seconds; a stage deadline still bounds each request (see llm_runtime.py);
+- LLM_HTTP2=1 negotiates HTTP/2 when the `h2` package is installed. It is off by default because
+  agno keeps OpenAI on HTTP/1.1 to avoid transient 400s on some HTTP/2 edge cases.
+LLM_SHARED_HTTP_CLIENT=0 restores one SDK-managed client per model.
+
+`pool_stats` counts requests, connections opened (each one a TLS handshake), peak requests in
+flight and peak pool size per provider; `pool_summary()` is printed at the end of a run.
+"""
+
+import os, copy, atexit, threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set
+
+import httpx
+from agno.models.openai import OpenAIChat
+
+LLM_SHARED_HTTP_CLIENT = os.getenv("LLM_SHARED_HTTP_CLIENT", "1").lower() in ("1", "true", "yes", "on")
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "64"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "32"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10"))
+LLM_HTTP_READ_TIMEOUT = float(os.getenv("LLM_HTTP_READ_TIMEOUT", "600"))
+LLM_HTTP_POOL_TIMEOUT = float(os.getenv("LLM_HTTP_POOL_TIMEOUT", "60"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "0").lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class PoolStats:
+    """Request and connection counts of one provider's shared client."""
+    requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    peak_connections: int = 0
+    _connections: Set[int] = field(default_factory=set, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def connections_opened(self) -> int:
+        return len(self._connections)
+
+    def started(self, pool: Any):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self._sample(pool)
+
+    def finished(self, pool: Any):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._sample(pool)
+
+    def _sample(self, pool: Any):
+        # httpcore exposes the pool's connections; count distinct ones to know how many handshakes were paid.
+        connections = list(getattr(pool, "connections", None) or [])
+        self._connections.update(id(c) for c in connections)
+        self.peak_connections = max(self.peak_connections, len(connections))
+
+
+pool_stats: Dict[str, PoolStats] = {}
+_clients: Dict[str, httpx.Client] = {}
+_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    if not LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("⚠️  LLM_HTTP2=1 needs the `h2` package (pip install 'httpx[http2]'); using HTTP/1.1.")
+        return False
+    return True
+
+
+def _build_client(provider: str) -> httpx.Client:
+    stats = pool_stats.setdefault(provider, PoolStats())
+    client: Optional[httpx.Client] = None
+
+    def _pool() -> Any:
+        return getattr(getattr(client, "_transport", None), "_pool", None)
+
+    def _response_closed(response: httpx.Response):
+        # The response hook fires at the headers; the connection is busy until the body is closed.
+        close = response.close
+
+        def _close():
+            try:
+                close()
+            finally:
+                if not getattr(response, "_pool_released", False):
+                    response._pool_released = True
+                    stats.finished(_pool())
+
+        response.close = _close
+
+    client = httpx.Client(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(LLM_HTTP_READ_TIMEOUT, connect=LLM_HTTP_CONNECT_TIMEOUT, pool=LLM_HTTP_POOL_TIMEOUT),
+        follow_redirects=True,
+        event_hooks={"request": [lambda request: stats.started(_pool())], "response": [_response_closed]},
+    )
+    return client
+
+
+def http_client(provider: str = "openai") -> Optional[httpx.Client]:
+    """The shared client of `provider`, created on first use; None with LLM_SHARED_HTTP_CLIENT=0."""
+    if not LLM_SHARED_HTTP_CLIENT:
+        return None
+    with _lock:
+        client = _clients.get(provider)
+        if client is None or client.is_closed:
+            client = _clients[provider] = _build_client(provider)
+        return client
+
+
+def openai_model(model_id: str, **kwargs) -> OpenAIChat:
+    """`OpenAIChat(id=model_id, **kwargs)` on the shared OpenAI connection pool."""
+    kwargs.setdefault("http_client", http_client("openai"))
+    return OpenAIChat(id=model_id, **kwargs)
+
+
+def anthropic_model(model_id: str, base_url: Optional[str] = None, **kwargs) -> Any:
+    """`Claude(id=model_id, **kwargs)` on the shared Anthropic connection pool."""
+    from agno.models.anthropic import Claude
+
+    kwargs.setdefault("http_client", http_client("anthropic"))
+    if base_url:
+        kwargs["client_params"] = {**(kwargs.get("client_params") or {}), "base_url": base_url}
+    return Claude(id=model_id, **kwargs)
+
+
+def clone_agent(agent: Any, model_id: Optional[str] = None) -> Any:
+    """An independent copy of `agent` (optionally on `model_id`) that keeps the shared HTTP client.
+
+    agno's `Agent.deep_copy` keeps the model object shared and drops HTTP clients when a model is copied.
+    """
+    clone = agent.deep_copy()
+    model = getattr(agent, "model", None)
+    if model is not None:
+        clone.model = copy.deepcopy(model)
+        clone.model.http_client = getattr(model, "http_client", None)
+        if model_id is not None:
+            clone.model.id = model_id
+    return clone
+
+
+def pool_summary() -> str:
+    if not LLM_SHARED_HTTP_CLIENT:
+        return "HTTP pool: off (one client per model)."
+    if not any(s.requests for s in pool_stats.values()):
+        return "HTTP pool: no requests."
+    parts = [
+        f"{provider} {s.requests} request(s) over {s.connections_opened} connection(s) "
+        f"(peak {s.peak_in_flight} in flight, {s.peak_connections}/{LLM_HTTP_MAX_CONNECTIONS} open)"
+        for provider, s in sorted(pool_stats.items()) if s.requests
+    ]
+    return "HTTP pool: " + "; ".join(parts) + "."
+
+
+@atexit.register
+def close_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
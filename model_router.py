@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Model Router (fast / standard / deep tiers per agent role)
+Agents no longer all run on the flagship model. Each agent role has a tier and each tier a model:
+- fast (MODEL_TIER_FAST, default gpt-5-nano): mechanical jobs such as domain profiling, term
+  extraction, style sheets, English/tone passes, citation normalization and roadmap JSON;
+- standard (MODEL_TIER_STANDARD, default gpt-5-mini): outline, crosswalk, research synthesis,
+  pack augmenters, QA and scoring;
+- deep (MODEL_TIER_DEEP, default LLM_MODEL or gpt-5): RFP analysis, drafting, red team and the
+  team leader.
+AGENT_TIERS overrides roles (e.g. {"outline": "deep"}); policy_packs.PACK_MODEL_TIERS overrides them
+per policy pack where the calling stage knows the pack. MODEL_ROUTING=0 runs every role on LLM_MODEL.
+
+When a cheaper model's structured output fails validation, `escalate` returns a copy of the agent on
+the next tier's model, which ask_json and json_repair use for their retry instead of re-asking the
+same model.
+"""
+
+import os, json, threading
+from typing import Any, Dict, Optional
+
+from model_factory import clone_agent
+from policy_packs import PACK_MODEL_TIERS
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-5")
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING", "1").lower() in ("1", "true", "yes", "on")
+
+TIERS = ("fast", "standard", "deep")
+TIER_MODELS: Dict[str, str] = {
+    "fast": os.getenv("MODEL_TIER_FAST", "gpt-5-nano"),
+    "standard": os.getenv("MODEL_TIER_STANDARD", "gpt-5-mini"),
+    "deep": os.getenv("MODEL_TIER_DEEP", LLM_MODEL),
+}
+
+AGENT_TIERS: Dict[str, str] = {
+    "profiler": "fast",
+    "technology_terms": "fast",
+    "style_sheet": "fast",
+    "english": "fast",
+    "tone": "fast",
+    "evidence": "fast",
+    "roadmap": "fast",
+    "outline": "standard",
+    "crosswalk": "standard",
+    "technology": "standard",
+    "controls": "standard",
+    "accessibility": "standard",
+    "scrm": "standard",
+    "past_performance": "standard",
+    "factcheck": "standard",
+    "qa": "standard",
+    "scoring": "standard",
+    "analyzer": "deep",
+    "writer": "deep",
+    "red_team": "deep",
+    "orchestrator": "deep",
+}
+AGENT_TIERS.update(json.loads(os.getenv("AGENT_TIERS", "{}")))
+
+escalations: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def tier_for(role: str, pack: Optional[str] = None) -> str:
+    """Tier of an agent role, with the policy pack's override when `pack` is given."""
+    tier = (PACK_MODEL_TIERS.get(pack or "", {}).get(role)) or AGENT_TIERS.get(role, "deep")
+    if tier not in TIERS:
+        raise ValueError(f"Unknown model tier {tier!r} for {role}; expected one of {', '.join(TIERS)}")
+    return tier
+
+
+def model_for(role: str, pack: Optional[str] = None) -> str:
+    """Model id an agent role runs on (LLM_MODEL for every role when routing is off)."""
+    if not MODEL_ROUTING_ENABLED:
+        return LLM_MODEL
+    return TIER_MODELS[tier_for(role, pack)]
+
+
+def escalation_model(model_id: Optional[str]) -> Optional[str]:
+    """Model of the next tier above the lowest tier running `model_id`, or None at the top."""
+    if not MODEL_ROUTING_ENABLED or model_id not in TIER_MODELS.values():
+        return None
+    start = next(i for i, tier in enumerate(TIERS) if TIER_MODELS[tier] == model_id)
+    return next((TIER_MODELS[t] for t in TIERS[start + 1:] if TIER_MODELS[t] != model_id), None)
+
+
+def escalate(agent: Any) -> Optional[Any]:
+    """A copy of `agent` on the next tier's model, or None when it already runs on the top tier."""
+    model = getattr(agent, "model", None)
+    stronger = escalation_model(getattr(model, "id", None))
+    if stronger is None or not hasattr(agent, "deep_copy"):
+        return None
+    escalated = clone_agent(agent, stronger)
+    name = getattr(agent, "name", None) or "agent"
+    with _lock:
+        escalations[name] = escalations.get(name, 0) + 1
+    print(f"⬆️  Escalating {name} from {model.id} to {stronger} after invalid structured output")
+    return escalated
+
+
+def fingerprint() -> str:
+    """Routing configuration, for keys that must change when the models behind the roles change."""
+    if not MODEL_ROUTING_ENABLED:
+        return LLM_MODEL
+    return json.dumps({"models": TIER_MODELS, "agents": AGENT_TIERS, "packs": PACK_MODEL_TIERS}, sort_keys=True)
+
+
+def routing_summary() -> str:
+    if not MODEL_ROUTING_ENABLED:
+        return f"Model routing: off (every agent on {LLM_MODEL})."
+    models = ", ".join(f"{tier} {TIER_MODELS[tier]}" for tier in TIERS)
+    escalated = ", ".join(f"{name} ×{count}" for name, count in sorted(escalations.items())) or "none"
+    return f"Model routing: {models}; escalations {escalated}."
@@ -0,0 +1,444 @@
+# -*- coding: utf-8 -*-
+"""
+Stage Pipeline (dependency-graph executor)
+Each proposal stage declares the artifacts it consumes and produces; stages whose inputs are
+available run concurrently on a thread pool, so wall time follows the depth of the graph
+instead of the sum of every agent's latency.
+"""
+
+import os, time, threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+# How often a stage waiting on a helper thread (see wait_for) checks its cancel event and deadline.
+PIPELINE_POLL_SECONDS = float(os.getenv("PIPELINE_POLL_SECONDS", "0.25"))
+
+
+# ---------- Cooperative cancellation ----------
+
+class StageCancelled(Exception):
+    """Raised inside a stage once the pipeline has cancelled it (e.g. a losing speculative branch)."""
+
+
+class StageTimeout(StageCancelled):
+    """Raised inside a stage once its own timeout or the run deadline has passed."""
+
+_local = threading.local()
+
+
+def check_cancelled():
+    """Cancellation point for stage code; call between model calls so abandoned work stops early."""
+    name = getattr(_local, "stage_name", None) or "?"
+    deadline = getattr(_local, "deadline", None)
+    if deadline is not None and time.monotonic() >= deadline:
+        raise StageTimeout(f"Stage '{name}' ran past its deadline")
+    event = getattr(_local, "cancel_event", None)
+    if event is not None and event.is_set():
+        raise StageCancelled(f"Stage '{name}' was cancelled")
+
+
+def current_stage() -> Tuple[Optional[str], Optional[threading.Event]]:
+    """(stage name, cancel event) of the calling thread, for helpers that fan work out to other threads."""
+    return getattr(_local, "stage_name", None), getattr(_local, "cancel_event", None)
+
+
+def current_deadline() -> Optional[float]:
+    """Absolute `time.monotonic()` deadline of the calling stage, or None when it has none."""
+    return getattr(_local, "deadline", None)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the calling stage's deadline (never negative), or None when unbounded."""
+    deadline = current_deadline()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def wait_for(future: Any) -> Any:
+    """`future.result()` that stays a cancellation point: waits in short slices and calls
+    check_cancelled between them, so a stalled helper thread cannot outlive the stage's deadline."""
+    while not future.done():
+        check_cancelled()
+        remaining = remaining_time()
+        wait([future], timeout=PIPELINE_POLL_SECONDS if remaining is None else min(PIPELINE_POLL_SECONDS, remaining))
+    return future.result()
+
+
+@contextmanager
+def stage_scope(stage_name: Optional[str], cancel_event: Optional[threading.Event], deadline: Optional[float] = None):
+    """Bind a stage's identity, cancel event and absolute monotonic deadline to the current thread."""
+    previous = current_stage() + (current_deadline(),)
+    _local.stage_name, _local.cancel_event, _local.deadline = stage_name, cancel_event, deadline
+    try:
+        yield
+    finally:
+        _local.stage_name, _local.cancel_event, _local.deadline = previous
+
+
+def _invoke(stage: "Stage", cancel_event: threading.Event, deadline: Optional[float], kwargs: Dict[str, Any]):
+    with stage_scope(stage.name, cancel_event, deadline):
+        check_cancelled()
+        return stage.fn(**kwargs)
+
+
+# ---------- Stage definition ----------
+
+@dataclass
+class Stage:
+    """One unit of work in the pipeline.
+
+    `fn` is called with one keyword argument per entry in `inputs`. When the stage has a single
+    output the return value is stored under that name; with several outputs `fn` must return a
+    dict keyed by output name.
+
+    `speculative=(artifact, value)` lets the stage start before `artifact` exists; its outputs are
+    committed only if the artifact resolves to `value`, otherwise the stage is cancelled and its
+    result discarded. Several speculative stages may produce the same output as alternatives.
+
+    `optional_inputs` are passed as None when their producer was skipped or failed. An `optional`
+    stage may be deferred when a run has an SLA and `estimate` (seconds) says it would not fit.
+
+    `timeout` (seconds) bounds the stage's own wall time; it overrides the run's default stage timeout.
+    """
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    speculative: Optional[Tuple[str, Any]] = None
+    optional_inputs: Tuple[str, ...] = ()
+    optional: bool = False
+    estimate: float = 0.0
+    timeout: Optional[float] = None
+
+    def __post_init__(self):
+        self.inputs = tuple(self.inputs)
+        self.optional_inputs = tuple(self.optional_inputs)
+        self.outputs = tuple(self.outputs) or (self.name,)
+
+
+@dataclass
+class PipelineResult:
+    artifacts: Dict[str, Any]
+    status: Dict[str, str] = field(default_factory=dict)    # stage -> done | failed | skipped | cancelled | deferred | timed_out
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> seconds
+    errors: Dict[str, str] = field(default_factory=dict)
+    wall_time: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(s in ("done", "cancelled", "deferred") for s in self.status.values())
+
+    @property
+    def timed_out(self) -> List[str]:
+        """Stages stopped by their own timeout or by the run deadline."""
+        return [name for name, status in self.status.items() if status == "timed_out"]
+
+    @property
+    def deadline_hit(self) -> bool:
+        return any("run deadline" in self.errors.get(name, "") for name in self.status)
+
+    @property
+    def deferred(self) -> List[str]:
+        """Optional stages left out to meet the SLA, plus anything skipped because of them."""
+        return [
+            name for name, status in self.status.items()
+            if status == "deferred" or (status == "skipped" and "deferred" in self.errors.get(name, ""))
+        ]
+
+    def summary(self) -> str:
+        """Markdown table of stage status and latency."""
+        lines = ["| Stage | Status | Seconds | Note |", "|---|---|---|---|"]
+        for name, status in self.status.items():
+            secs = self.timings.get(name)
+            note = self.errors.get(name, "").replace("|", "/").replace("\n", " ")[:120]
+            lines.append(f"| {name} | {status} | {secs:.1f} | {note} |" if secs is not None else f"| {name} | {status} | - | {note} |")
+        lines.append(f"\nWall time: {self.wall_time:.1f}s (sum of stage time: {sum(self.timings.values()):.1f}s)")
+        return "\n".join(lines)
+
+
+# ---------- Executor ----------
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], max_workers: Optional[int] = None):
+        self.stages = list(stages)
+        self.max_workers = max_workers or PIPELINE_MAX_WORKERS
+        self._producers = self._index_producers()
+        self._check_acyclic()
+
+    def _index_producers(self) -> Dict[str, List[str]]:
+        producers: Dict[str, List[Stage]] = {}
+        seen = set()
+        for stage in self.stages:
+            if stage.name in seen:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            seen.add(stage.name)
+            for out in stage.outputs:
+                producers.setdefault(out, []).append(stage)
+        for out, stages in producers.items():
+            if len(stages) > 1 and not all(s.speculative for s in stages):
+                raise ValueError(
+                    f"Artifact '{out}' produced by {[s.name for s in stages]}; only speculative stages may share outputs"
+                )
+        for stage in self.stages:
+            if stage.speculative and stage.speculative[0] not in producers:
+                raise ValueError(f"Stage '{stage.name}' speculates on '{stage.speculative[0]}', which no stage produces")
+        return {out: [s.name for s in stages] for out, stages in producers.items()}
+
+    def _check_acyclic(self):
+        deps = {}
+        for s in self.stages:
+            needed = list(s.inputs) + list(s.optional_inputs) + ([s.speculative[0]] if s.speculative else [])
+            deps[s.name] = {p for i in needed for p in self._producers.get(i, [])}
+        resolved: set = set()
+        while deps:
+            ready = [name for name, d in deps.items() if d <= resolved]
+            if not ready:
+                raise ValueError(f"Stage graph has a cycle among: {sorted(deps)}")
+            for name in ready:
+                resolved.add(name)
+                del deps[name]
+
+    def _tail_estimate(self, stage: Stage, memo: Dict[str, float]) -> float:
+        """Estimated seconds from the start of `stage` to the end of its longest required downstream chain.
+
+        Optional downstream stages are left out: they are judged against the SLA on their own.
+        """
+        if stage.name not in memo:
+            downstream = [
+                s for s in self.stages
+                if not s.optional and set(stage.outputs) & (set(s.inputs) | set(s.optional_inputs))
+            ]
+            memo[stage.name] = stage.estimate + max((self._tail_estimate(s, memo) for s in downstream), default=0.0)
+        return memo[stage.name]
+
+    def run(
+        self,
+        artifacts: Optional[Dict[str, Any]] = None,
+        sla_seconds: Optional[float] = None,
+        stage_timeout: Optional[float] = None,
+        deadline_seconds: Optional[float] = None,
+        admit: Optional[Callable[[Stage], Optional[str]]] = None,
+        checkpoints: Any = None,
+    ) -> PipelineResult:
+        """Execute all stages, returning every produced artifact plus per-stage status.
+
+        A failed stage does not abort the run: stages that need its outputs are marked
+        `skipped`, while independent branches keep going. Losing speculative branches are
+        signalled through `check_cancelled()` and never block the run. With `sla_seconds`,
+        an optional stage is `deferred` when elapsed time plus its estimated downstream chain
+        would exceed the SLA.
+
+        `stage_timeout` (or `Stage.timeout`) and `deadline_seconds` are hard limits: a stage that
+        runs past either is marked `timed_out` and signalled to stop, stages not yet started when
+        the run deadline passes are `skipped`, and the result keeps every artifact completed so far.
+
+        `admit(stage)` is asked about each optional stage once it is ready; a returned reason defers it
+        (used by the token budget to drop augmenters when spend runs high).
+
+        `checkpoints` (a checkpoints.CheckpointStore) persists each successful stage's outputs keyed
+        by its inputs, and when resuming serves still-valid stages without running them.
+        """
+        available: Dict[str, Any] = dict(artifacts or {})
+        missing = [
+            f"{s.name}:{i}" for s in self.stages for i in s.inputs
+            if i not in available and i not in self._producers
+        ]
+        if missing:
+            raise ValueError(f"Stage inputs with no producer or seed artifact: {missing}")
+
+        result = PipelineResult(artifacts=available)
+        pending = {s.name: s for s in self.stages}
+        alive = set(pending)      # pending, running or held stages
+        # outputs that no live stage can produce any more
+        unavailable: set = {
+            i for s in self.stages for i in s.optional_inputs
+            if i not in available and i not in self._producers
+        }
+        running = {}
+        held: Dict[str, Tuple[Stage, Optional[Dict[str, Any]], Optional[BaseException]]] = {}
+        events: Dict[str, threading.Event] = {}
+        started: Dict[str, float] = {}
+        tails: Dict[str, float] = {}
+        deadlines: Dict[str, float] = {}   # stage -> absolute monotonic deadline
+        stage_inputs: Dict[str, Dict[str, Any]] = {}
+        restored: set = set()
+        t0 = time.perf_counter()
+        run_deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+
+        def stage_deadline(stage: Stage) -> Optional[float]:
+            timeout = stage.timeout if stage.timeout is not None else stage_timeout
+            limits = [d for d in (run_deadline, time.monotonic() + timeout if timeout else None) if d is not None]
+            return min(limits) if limits else None
+
+        def verdict(stage: Stage) -> Optional[bool]:
+            if not stage.speculative:
+                return True
+            key, value = stage.speculative
+            if key in available:
+                return available[key] == value
+            if key in unavailable:
+                return False
+            return None
+
+        def retire(stage: Stage, status: str, note: str = ""):
+            alive.discard(stage.name)
+            result.status[stage.name] = status
+            if note:
+                result.errors[stage.name] = note
+            for out in stage.outputs:
+                others = [p for p in self._producers[out] if p != stage.name]
+                if not any(p in alive or result.status.get(p) == "done" for p in others):
+                    unavailable.add(out)
+
+        def commit(stage: Stage, produced: Optional[Dict[str, Any]], error: Optional[BaseException]):
+            if isinstance(error, StageTimeout):
+                retire(stage, "timed_out", f"{error}")
+                print(f"⏱️  Stage timed out: {stage.name}")
+                return
+            if error is not None:
+                retire(stage, "failed", f"{type(error).__name__}: {error}")
+                print(f"❌ Stage failed: {stage.name} ({error})")
+                return
+            alive.discard(stage.name)
+            available.update(produced)
+            result.status[stage.name] = "done"
+            if stage.name in restored:
+                result.errors[stage.name] = "resumed from checkpoint"
+                print(f"♻️  Stage resumed from checkpoint: {stage.name}")
+                return
+            print(f"✅ Stage done: {stage.name} ({result.timings[stage.name]:.1f}s)")
+            if checkpoints is not None:
+                checkpoints.save(stage.name, stage_inputs[stage.name], produced)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage")
+        try:
+            while pending or running:
+                if run_deadline is not None and time.monotonic() >= run_deadline:
+                    for name, stage in list(pending.items()):
+                        del pending[name]
+                        retire(stage, "skipped", "run deadline reached before the stage could start")
+                changed = True
+                while changed:
+                    changed = False
+                    for name, stage in list(pending.items()):
+                        blocked = [i for i in stage.inputs if i in unavailable]
+                        ready = all(i in available for i in stage.inputs) and all(
+                            i in available or i in unavailable for i in stage.optional_inputs
+                        )
+                        if verdict(stage) is False:
+                            del pending[name]
+                            retire(stage, "cancelled", "speculative branch not selected")
+                            changed = True
+                        elif blocked:
+                            del pending[name]
+                            deferred_up = [
+                                i for i in blocked
+                                if any(result.status.get(p) == "deferred" or "deferred" in result.errors.get(p, "")
+                                       for p in self._producers.get(i, []))
+                            ]
+                            note = "upstream deferred" if deferred_up else "upstream unavailable"
+                            retire(stage, "skipped", f"{note}: {', '.join(blocked)}")
+                            changed = True
+                        elif ready and stage.optional and sla_seconds is not None and (
+                            time.perf_counter() - t0 + self._tail_estimate(stage, tails) > sla_seconds
+                        ):
+                            del pending[name]
+                            projected = time.perf_counter() - t0 + self._tail_estimate(stage, tails)
+                            retire(stage, "deferred", f"deferred: projected {projected:.0f}s exceeds SLA {sla_seconds:.0f}s")
+                            print(f"⏭️  Stage deferred to meet SLA: {name}")
+                            changed = True
+                        elif ready and stage.optional and admit is not None and (reason := admit(stage)):
+                            del pending[name]
+                            retire(stage, "deferred", reason)
+                            print(f"⏭️  Stage deferred: {name}")
+                            changed = True
+                        elif ready:
+                            kwargs = {i: available[i] for i in stage.inputs}
+                            kwargs.update({i: available.get(i) for i in stage.optional_inputs})
+                            stage_inputs[name] = kwargs
+                            saved = checkpoints.load(name, kwargs) if checkpoints is not None else None
+                            if saved is not None and set(stage.outputs) <= set(saved):
+                                del pending[name]
+                                restored.add(name)
+                                result.timings[name] = 0.0
+                                v = verdict(stage)
+                                if v is None:
+                                    held[name] = (stage, saved, None)
+                                elif v:
+                                    commit(stage, saved, None)
+                                else:
+                                    retire(stage, "cancelled", "speculative branch not selected")
+                                changed = True
+                                continue
+                            print(f"▶️  Stage started: {name}" + (" (speculative)" if stage.speculative else ""))
+                            events[name] = threading.Event()
+                            started[name] = time.perf_counter()
+                            deadlines[name] = stage_deadline(stage)
+                            running[pool.submit(_invoke, stage, events[name], deadlines[name], kwargs)] = stage
+                            del pending[name]
+                    for name, (stage, produced, error) in list(held.items()):
+                        v = verdict(stage)
+                        if v is not None:
+                            del held[name]
+                            if v:
+                                commit(stage, produced, error)
+                            else:
+                                retire(stage, "cancelled", "speculative branch not selected")
+                            changed = True
+                    for fut, stage in list(running.items()):
+                        if verdict(stage) is False:
+                            events[stage.name].set()
+                            fut.cancel()
+                            del running[fut]
+                            result.timings[stage.name] = time.perf_counter() - started[stage.name]
+                            retire(stage, "cancelled", "speculative branch not selected")
+                            print(f"🛑 Stage cancelled: {stage.name}")
+                            changed = True
+                if not running:
+                    break
+
+                limits = [deadlines[s.name] for s in running.values() if deadlines.get(s.name) is not None]
+                timeout = max(0.0, min(limits) - time.monotonic()) if limits else None
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                for fut, stage in list(running.items()):
+                    if fut in done or deadlines.get(stage.name) is None or now < deadlines[stage.name]:
+                        continue
+                    # Do not wait for it: the stage sees StageTimeout at its next check_cancelled()
+                    # and in-flight model calls are bounded by the same deadline.
+                    events[stage.name].set()
+                    fut.cancel()
+                    del running[fut]
+                    result.timings[stage.name] = time.perf_counter() - started[stage.name]
+                    hit_run = run_deadline is not None and now >= run_deadline
+                    retire(stage, "timed_out", "run deadline reached" if hit_run else "exceeded stage timeout")
+                    print(f"⏱️  Stage timed out: {stage.name}")
+                for fut in done:
+                    stage = running.pop(fut)
+                    result.timings[stage.name] = time.perf_counter() - started[stage.name]
+                    produced, error = None, None
+                    try:
+                        value = fut.result()
+                        if len(stage.outputs) == 1:
+                            produced = {stage.outputs[0]: value}
+                        else:
+                            produced = {out: value[out] for out in stage.outputs}
+                    except Exception as e:
+                        error = e
+                    v = verdict(stage)
+                    if v is None:
+                        held[stage.name] = (stage, produced, error)
+                    elif v:
+                        commit(stage, produced, error)
+                    else:
+                        retire(stage, "cancelled", "speculative branch not selected")
+        finally:
+            # Do not wait for cancelled or timed-out work; it stops at its next check_cancelled().
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        for name, (stage, _, _) in held.items():
+            retire(stage, "cancelled", "speculation never resolved")
+        result.wall_time = time.perf_counter() - t0
+        return result
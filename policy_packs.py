@@ -1,5 +1,5 @@
 # === policy_packs.py ===
-import os, json
+import os, json, functools
 from typing import Dict, Any
 
 # Two US-focused packs only (federal/state/local vs private sector).
@@ -24,6 +24,14 @@ POLICY_PACKS: Dict[str, Dict[str, Any]] = {
 
 DEFAULT_POLICY_PACK = os.getenv("DEFAULT_POLICY_PACK", "US_COMMERCIAL")
 
+# Per-pack overrides of model_router.AGENT_TIERS (role -> fast|standard|deep). Kept out of POLICY_PACKS,
+# which is rendered into prompts. Federal bids are scored on control and QA findings, so those stay deep.
+PACK_MODEL_TIERS: Dict[str, Dict[str, str]] = {
+    "US_GOV": {"controls": "deep", "qa": "deep"},
+    "US_COMMERCIAL": {},
+}
+PACK_MODEL_TIERS.update(json.loads(os.getenv("PACK_MODEL_TIERS", "{}")))
+
 def select_policy_pack(profile: Dict[str, Any]) -> str:
     """
     Input example (from profiler):
@@ -45,14 +53,17 @@ def select_policy_pack(profile: Dict[str, Any]) -> str:
         return "US_COMMERCIAL"
     return DEFAULT_POLICY_PACK
 
-def inject_pack_context(instructions: list, pack_name: str) -> list:
-    """Prepend a small, stable context block to any agent's instructions."""
-    pack = POLICY_PACKS[pack_name]
-    ctx = (
+@functools.lru_cache(maxsize=None)
+def pack_context_block(pack_name: str) -> str:
+    """The ACTIVE_POLICY_PACK block, rendered once per pack with sorted keys so it is byte-identical everywhere."""
+    return (
         "ACTIVE_POLICY_PACK:\n"
-        + json.dumps(pack, ensure_ascii=False, indent=2)
+        + json.dumps(POLICY_PACKS[pack_name], ensure_ascii=False, indent=2, sort_keys=True)
         + "\n"
         "Use the ACTIVE_POLICY_PACK to adapt frameworks, accessibility, SCRM toggles, "
         "and scoring posture. Do not mention non-applicable frameworks."
     )
-    return [ctx] + instructions
+
+def inject_pack_context(instructions: list, pack_name: str) -> list:
+    """Prepend a small, stable context block to any agent's instructions."""
+    return [pack_context_block(pack_name)] + instructions
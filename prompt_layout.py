@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Prompt Layout (prefix-cache friendly prompt assembly)
+Providers reuse the computation for the longest prompt prefix they have already seen (OpenAI
+does this automatically for prompts over 1024 tokens), which cuts time-to-first-token and bills
+the cached part at a discount. A prefix only matches byte for byte, so:
+- `layout` assembles user prompts from the most stable block to the least stable one (output
+  guard/schema, policy-pack context, RFP analysis, run-wide shared context, then the data that is
+  specific to this call) with normalized whitespace, so every call in a run that shares the
+  leading blocks shares the bytes too;
+- `stabilize` replaces the per-call timestamp agno injects into the system prompt
+  (`add_datetime_to_context`, microsecond precision) with PROMPT_DATETIME_PRECISION (`day` by
+  default, `hour`, or `off` for the live clock) — otherwise every call's system prompt differs
+  and nothing after it can be cached.
+Cached vs. uncached prompt tokens are reported per agent by the run budget (see budget.py).
+"""
+
+import os
+from typing import Any, Iterable, Optional, Union
+
+from policy_packs import pack_context_block
+
+PROMPT_DATETIME_PRECISION = os.getenv("PROMPT_DATETIME_PRECISION", "day")
+_DATETIME_FORMATS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%d %H:00"}
+
+Blocks = Union[None, str, Iterable[Optional[str]]]
+
+
+def _clean(block: str) -> str:
+    """Trailing whitespace and surrounding blank lines removed, so equal content renders to equal bytes."""
+    return "\n".join(line.rstrip() for line in block.strip("\n").splitlines()).strip()
+
+
+def _blocks(value: Blocks) -> list:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else [v for v in value if v]
+
+
+def layout(
+    guard: Blocks = None,
+    pack: Optional[str] = None,
+    analysis: Blocks = None,
+    shared: Blocks = None,
+    specific: Blocks = None,
+) -> str:
+    """Join prompt blocks from most to least stable: guard → pack context → RFP analysis → shared → call-specific."""
+    blocks = [*_blocks(guard), pack_context_block(pack) if pack else None, *_blocks(analysis), *_blocks(shared), *_blocks(specific)]
+    return "\n\n".join(c for c in (_clean(b) for b in blocks if b) if c) + "\n"
+
+
+def stabilize(agent: Any):
+    """Coarsen the datetime agno injects into `agent`'s system prompt (and its team members')."""
+    datetime_format = _DATETIME_FORMATS.get(PROMPT_DATETIME_PRECISION)
+    if datetime_format is None:
+        return
+    for member in getattr(agent, "members", None) or []:
+        stabilize(member)
+    # An explicit format (builder-set, or pinned by the response cache) is left alone.
+    if getattr(agent, "add_datetime_to_context", False) and getattr(agent, "datetime_format", None) is None:
+        agent.datetime_format = datetime_format
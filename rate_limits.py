@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Rate Limits (process-wide scheduler for provider RPM/TPM quotas)
+Every model call made through llm_runtime.run_agent takes a slot here first, per model id (or per
+endpoint, when the model is served by an endpoint pool; see endpoint_pool.py):
+- token buckets for requests and (estimated) tokens per minute, sized from RATE_LIMITS, e.g.
+  {"gpt-5": {"rpm": 500, "tpm": 500000}}, or RATE_LIMIT_RPM / RATE_LIMIT_TPM for other models
+  (0 = no limit), with bursts capped at RATE_LIMIT_BURST_SECONDS of quota. The token estimate is
+  corrected with the real usage once the call returns;
+- priority lanes: waiting calls are served critical first, then default, then optional, so the
+  pipeline's critical-path stages are not queued behind optional augmenters (see `set_lane`;
+  STAGE_LANES overrides, e.g. {"technology": "critical"});
+- adaptive concurrency: at most LLM_MAX_CONCURRENCY calls in flight per model. A 429 halves the
+  limit (at most once per cooldown) and pauses new requests for the Retry-After or
+  RATE_LIMIT_COOLDOWN seconds; every successful call raises it again by 1/limit (AIMD), so
+  throughput settles just under the quota instead of oscillating through error storms.
+Waiting is cancellable and bounded by the calling stage's deadline (see pipeline.stage_scope).
+RATE_LIMIT_SCHEDULER=0 turns the scheduler off. scripts/rate_limit_simulation.py exercises it
+against a local fake endpoint that enforces limits.
+"""
+
+import os, json, time, heapq, itertools, threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pipeline import check_cancelled, current_stage
+
+RATE_LIMIT_SCHEDULER_ENABLED = os.getenv("RATE_LIMIT_SCHEDULER", "1").lower() in ("1", "true", "yes", "on")
+RATE_LIMITS: Dict[str, Dict[str, float]] = json.loads(os.getenv("RATE_LIMITS", "{}"))
+RATE_LIMIT_RPM = float(os.getenv("RATE_LIMIT_RPM", "0"))
+RATE_LIMIT_TPM = float(os.getenv("RATE_LIMIT_TPM", "0"))
+# Providers enforce per-minute quotas over shorter windows, so bursts are capped at this many seconds of quota.
+RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "10"))
+RATE_LIMIT_COOLDOWN = float(os.getenv("RATE_LIMIT_COOLDOWN", "2"))
+# Completion tokens assumed per call until the real usage is known.
+RATE_LIMIT_OUTPUT_TOKENS = int(os.getenv("RATE_LIMIT_OUTPUT_TOKENS", "1024"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "0.25"))
+
+LANES = {"critical": 0, "default": 1, "optional": 2}
+STAGE_LANES: Dict[str, str] = json.loads(os.getenv("STAGE_LANES", "{}"))
+
+
+def estimate_tokens(agent: Any, prompt: Any) -> int:
+    """Rough token count of a call (about 4 characters per token) plus the expected completion."""
+    text = len(str(prompt or "")) + len(str(getattr(agent, "instructions", None) or "")) + len(str(getattr(agent, "description", None) or ""))
+    model = getattr(agent, "model", None)
+    output = getattr(model, "max_completion_tokens", None) or getattr(model, "max_tokens", None) or RATE_LIMIT_OUTPUT_TOKENS
+    return text // 4 + int(output)
+
+
+def limiter_key(agent: Any) -> Optional[str]:
+    """Limiter of an agent's calls: its endpoint (see endpoint_pool.py) when it has one, else its model id."""
+    model = getattr(agent, "model", None)
+    return getattr(model, "rate_limit_key", None) or getattr(model, "id", None)
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` per second up to `burst_seconds` worth; may run into
+    debt when a call turns out larger than estimated. Not thread-safe (guarded by ModelLimiter)."""
+
+    def __init__(self, per_minute: float, burst_seconds: float = RATE_LIMIT_BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` (capped at the capacity) is available; 0 when it is now."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def drain(self):
+        self.level = min(self.level, 0.0)
+
+
+@dataclass
+class Slot:
+    """A granted call; `release` it when the call is over (from any thread)."""
+    limiter: Optional["ModelLimiter"]
+    estimate: int = 0
+    lane: str = "default"
+    waited: float = 0.0
+    _released: bool = field(default=False, repr=False)
+
+    def release(self, tokens: Optional[int] = None, throttled: bool = False, retry_after: float = 0.0):
+        """`tokens`: real usage of the call (corrects the estimate); `throttled`: the provider answered 429."""
+        if self._released or self.limiter is None:
+            return
+        self._released = True
+        self.limiter.release(self, tokens, throttled, retry_after)
+
+
+class ModelLimiter:
+    """Buckets, adaptive concurrency and the priority queue of one model id."""
+
+    def __init__(self, model_id: str, rpm: float = 0, tpm: float = 0, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.model_id = model_id
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.max_concurrency = max(max_concurrency, LLM_MIN_CONCURRENCY)
+        self.concurrency = float(self.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.calls = self.throttled = 0
+        self.wait_total = self.wait_max = 0.0
+        self._waiting: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _delay(self, estimate: int, now: float) -> float:
+        """Seconds until a call of `estimate` tokens may start (0 = now); assumes the lock is held."""
+        if self.in_flight >= int(self.concurrency):
+            return SCHEDULER_POLL_SECONDS  # woken by a release
+        delay = max(0.0, self.paused_until - now)
+        if self.requests is not None:
+            delay = max(delay, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.wait_time(estimate, now))
+        return delay
+
+    def _grant(self, slot: Slot):
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(slot.estimate)
+        self.in_flight += 1
+        self.calls += 1
+        self.wait_total += slot.waited
+        self.wait_max = max(self.wait_max, slot.waited)
+
+    def acquire(self, estimate: int, lane: str) -> Slot:
+        """Block until this call is first in line (by lane, then arrival) and the model has capacity."""
+        ticket = (LANES.get(lane, LANES["default"]), next(self._seq))
+        slot = Slot(self, estimate, lane)
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._delay(estimate, now) if self._waiting[0] == ticket else SCHEDULER_POLL_SECONDS
+                    if delay <= 0:
+                        heapq.heappop(self._waiting)
+                        slot.waited = now - started
+                        self._grant(slot)
+                        return slot
+                    self._cond.wait(min(delay, SCHEDULER_POLL_SECONDS))
+                    check_cancelled()
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                raise
+            finally:
+                self._cond.notify_all()
+
+    def try_acquire(self, estimate: int, lane: str) -> Optional[Slot]:
+        """A slot only if nobody is waiting and the model has capacity right now (used for hedges)."""
+        with self._cond:
+            if self._waiting or self._delay(estimate, time.monotonic()) > 0:
+                return None
+            slot = Slot(self, estimate, lane)
+            self._grant(slot)
+            return slot
+
+    def headroom(self) -> float:
+        with self._cond:
+            now = time.monotonic()
+            if self.paused_until > now:
+                return 0.0
+            shares = [1 - self.in_flight / max(1, int(self.concurrency))]
+            for bucket in (self.requests, self.tokens):
+                if bucket is not None:
+                    bucket._refill(now)
+                    shares.append(bucket.level / bucket.capacity)
+            return max(0.0, min(shares))
+
+    def release(self, slot: Slot, tokens: Optional[int], throttled: bool, retry_after: float):
+        with self._cond:
+            self.in_flight -= 1
+            if self.tokens is not None and tokens:
+                self.tokens.take(tokens - slot.estimate)
+            now = time.monotonic()
+            if throttled:
+                self.throttled += 1
+                self.paused_until = max(self.paused_until, now + max(retry_after, RATE_LIMIT_COOLDOWN))
+                if self.requests is not None:
+                    self.requests.drain()
+                # Concurrent calls hit by the same quota window count as one signal.
+                if now - self.last_decrease >= RATE_LIMIT_COOLDOWN:
+                    self.concurrency = max(float(LLM_MIN_CONCURRENCY), self.concurrency / 2)
+                    self.last_decrease = now
+            else:
+                self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+            self._cond.notify_all()
+
+
+class RateLimitScheduler:
+    """Process-wide registry of ModelLimiters and stage lanes."""
+
+    def __init__(self, enabled: bool = RATE_LIMIT_SCHEDULER_ENABLED, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self.enabled = enabled
+        self.limits = dict(RATE_LIMITS if limits is None else limits)
+        self.stage_lanes: Dict[str, str] = {}
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, model_id: str, rpm: float = 0, tpm: float = 0, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        """Set (or replace) the limits of one model id."""
+        with self._lock:
+            self.limits[model_id] = {"rpm": rpm, "tpm": tpm, "concurrency": max_concurrency}
+            self._limiters.pop(model_id, None)
+
+    def set_lane(self, stage_name: str, lane: str):
+        """Priority lane of a stage (by base name, without a `[pack]` suffix); STAGE_LANES wins."""
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane {lane!r}; expected one of {', '.join(LANES)}")
+        self.stage_lanes[stage_name] = lane
+
+    def lane(self, stage_name: Optional[str] = None) -> str:
+        """Lane of `stage_name` (default: the calling stage); calls outside a stage use `default`."""
+        if stage_name is None:
+            stage_name, _ = current_stage()
+        base = (stage_name or "").split("[")[0]
+        return STAGE_LANES.get(base) or self.stage_lanes.get(base) or "default"
+
+    def limiter(self, model_id: Optional[str]) -> ModelLimiter:
+        model_id = model_id or "?"
+        with self._lock:
+            limiter = self._limiters.get(model_id)
+            if limiter is None:
+                limits = self.limits.get(model_id) or next(
+                    (v for k, v in sorted(self.limits.items(), key=lambda kv: -len(kv[0])) if model_id.startswith(k)), {}
+                )
+                limiter = self._limiters[model_id] = ModelLimiter(
+                    model_id,
+                    rpm=float(limits.get("rpm", RATE_LIMIT_RPM)),
+                    tpm=float(limits.get("tpm", RATE_LIMIT_TPM)),
+                    max_concurrency=int(limits.get("concurrency", LLM_MAX_CONCURRENCY)),
+                )
+            return limiter
+
+    def acquire(self, agent: Any, prompt: Any) -> Slot:
+        """Wait for a slot for one call of `agent` (its model's limiter, the calling stage's lane)."""
+        if not self.enabled:
+            return Slot(None)
+        return self.limiter(limiter_key(agent)).acquire(estimate_tokens(agent, prompt), self.lane())
+
+    def try_acquire(self, agent: Any, prompt: Any) -> Optional[Slot]:
+        """A slot without waiting, or None when the model is at its limits."""
+        if not self.enabled:
+            return Slot(None)
+        return self.limiter(limiter_key(agent)).try_acquire(estimate_tokens(agent, prompt), self.lane())
+
+    def headroom(self, key: str) -> float:
+        """Share of its quota and concurrency the limiter `key` can use right now (0 when paused or full)."""
+        return self.limiter(key).headroom() if self.enabled else 1.0
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "Rate limits: scheduler off."
+        with self._lock:
+            limiters = sorted(self._limiters.values(), key=lambda l: l.model_id)
+        if not limiters:
+            return "Rate limits: no model calls scheduled."
+        parts = [
+            f"{l.model_id} {l.calls} call(s), waited {l.wait_total:.1f}s (max {l.wait_max:.1f}s), "
+            f"{l.throttled} throttled, concurrency {int(l.concurrency)}/{l.max_concurrency}"
+            for l in limiters
+        ]
+        return "Rate limits: " + "; ".join(parts) + "."
+
+
+scheduler = RateLimitScheduler()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Refinement Loop (draft → red team → rewrite)
+Measures open issues after each pass and stops as soon as they reach zero, stop improving, or the
+iteration cap is hit. Only sections that still carry open issues are rewritten.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from pipeline import check_cancelled
+
+REFINE_MAX_ITERATIONS = int(os.getenv("REFINE_MAX_ITERATIONS", "2"))
+
+
+class IssueCheckFailed(Exception):
+    """An issue check could not run, so the open-issue count is unknown rather than zero.
+
+    `found` holds the issues reported by the checks that did run.
+    """
+
+    def __init__(self, message: str, found: Optional[List["OpenIssue"]] = None):
+        super().__init__(message)
+        self.found = list(found or [])
+
+
+@dataclass
+class OpenIssue:
+    source: str               # RedTeam | QA
+    description: str
+    section: Optional[str] = None  # resolved outline section number, None when it cannot be targeted
+    fix: str = ""
+
+
+@dataclass
+class RefinementResult:
+    sections: Dict[str, str]
+    open_issues: List[OpenIssue]
+    history: List[int] = field(default_factory=list)  # open-issue count measured after each pass
+    rewrites: List[List[str]] = field(default_factory=list)  # section numbers rewritten per pass
+    stop_reason: str = ""
+
+    def summary(self) -> str:
+        passes = " → ".join(str(n) for n in self.history) or "-"
+        rewritten = sum(len(r) for r in self.rewrites)
+        return (
+            f"Refinement: open issues per pass {passes}; {len(self.rewrites)} rewrite pass(es), "
+            f"{rewritten} section rewrite(s); stopped because {self.stop_reason}."
+        )
+
+
+def refine_until_converged(
+    sections: Dict[str, str],
+    find_issues: Callable[[Dict[str, str]], List[OpenIssue]],
+    rewrite: Callable[[Dict[str, str], Dict[str, List[OpenIssue]]], Dict[str, str]],
+    max_iterations: Optional[int] = None,
+) -> RefinementResult:
+    """Alternate issue measurement and targeted rewrites until the draft converges.
+
+    `find_issues(sections)` returns the current open issues; `rewrite(subset, issues_by_section)`
+    returns revised markdown for just the sections it was given. If a rewrite pass leaves as many
+    issues as before (or more), the previous version is kept and the loop stops. `find_issues` raises
+    IssueCheckFailed when a check could not run: the draft is then left as it is (before any rewrite,
+    or at the previous version) instead of a failed check passing for zero issues.
+    """
+    max_iterations = REFINE_MAX_ITERATIONS if max_iterations is None else max_iterations
+    current = dict(sections)
+    try:
+        issues = find_issues(current)
+    except IssueCheckFailed as e:
+        return RefinementResult(sections=current, open_issues=e.found, stop_reason=f"the issue check failed ({e}); draft left unrefined")
+    result = RefinementResult(sections=current, open_issues=issues, history=[len(issues)])
+
+    while True:
+        if not issues:
+            result.stop_reason = "no open issues remain"
+            break
+        if len(result.rewrites) >= max_iterations:
+            result.stop_reason = f"max iterations ({max_iterations}) reached"
+            break
+        by_section: Dict[str, List[OpenIssue]] = {}
+        for issue in issues:
+            if issue.section in current:
+                by_section.setdefault(issue.section, []).append(issue)
+        if not by_section:
+            result.stop_reason = "remaining issues do not map to a specific section"
+            break
+
+        check_cancelled()
+        print(f"🔁 Refinement pass {len(result.rewrites) + 1}: rewriting {len(by_section)} section(s) with {len(issues)} open issue(s)")
+        revised = rewrite({n: current[n] for n in by_section}, by_section)
+        candidate = {**current, **{n: t for n, t in revised.items() if n in current}}
+        result.rewrites.append(sorted(by_section))
+        try:
+            candidate_issues = find_issues(candidate)
+        except IssueCheckFailed as e:
+            result.history.append(len(issues))
+            result.stop_reason = f"the issue check failed after the rewrite ({e}); kept the previous version"
+            break
+        result.history.append(len(candidate_issues))
+        if len(candidate_issues) >= len(issues):
+            result.stop_reason = "issue count stopped improving (kept the previous version)"
+            break
+        current, issues = candidate, candidate_issues
+
+    result.sections, result.open_issues = current, issues
+    return result
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Technology Research Cache (per-term web lookups with TTL)
+Technology research is split into one web lookup per extracted technology term, run
+concurrently, with results kept in RESEARCH_CACHE_DIR for RESEARCH_CACHE_TTL_HOURS. Terms are
+deduplicated by their normalized form ("Section 508", "section-508" and "SECTION 508." are one
+lookup; "Federal Risk and Authorization Management Program (FedRAMP)" is keyed as "fedramp"),
+so the terms most RFPs share are served from disk instead of searched again.
+
+The search function is swappable: `use_search(fn)` installs any `fn(query, max_results)` for
+the duration of a block, and RESEARCH_SEARCH_FIXTURES points at a JSON file of canned results
+({term: [{title, url, snippet}]}) for offline runs.
+"""
+
+import os, re, json, time, hashlib, threading, unicodedata
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sections import fan_out
+
+RESEARCH_CACHE_DIR = os.getenv("RESEARCH_CACHE_DIR", ".research_cache")
+RESEARCH_CACHE_TTL_HOURS = float(os.getenv("RESEARCH_CACHE_TTL_HOURS", "168"))
+RESEARCH_MAX_RESULTS = int(os.getenv("RESEARCH_MAX_RESULTS", "5"))
+RESEARCH_MAX_WORKERS = int(os.getenv("RESEARCH_MAX_WORKERS", "8"))
+RESEARCH_MAX_TERMS = int(os.getenv("RESEARCH_MAX_TERMS", "15"))
+RESEARCH_QUERY_TEMPLATE = os.getenv("RESEARCH_QUERY_TEMPLATE", "{term} standards best practices")
+RESEARCH_SEARCH_FIXTURES = os.getenv("RESEARCH_SEARCH_FIXTURES", "")
+
+SearchFn = Callable[[str, int], List[Dict[str, str]]]
+
+
+def normalize_term(term: str) -> str:
+    """Cache/dedup key for a technology term: case-folded, punctuation collapsed, acronym preferred."""
+    text = unicodedata.normalize("NFKC", term or "")
+    acronym = re.search(r"\(([A-Za-z][A-Za-z0-9&/\-]{1,15})\)", text)
+    if acronym:
+        text = acronym.group(1)
+    text = re.sub(r"[^\w+#.]+", " ", text.casefold())  # keep C++, C#, .NET
+    return re.sub(r"\s+", " ", text).strip().rstrip(".")
+
+
+# ---------- Search backends ----------
+
+def duckduckgo_search(query: str, max_results: int) -> List[Dict[str, str]]:
+    """Live web search through agno's DuckDuckGo tool (the Technology Agent's previous backend)."""
+    from agno.tools.duckduckgo import DuckDuckGoTools
+
+    raw = json.loads(DuckDuckGoTools(enable_news=False).web_search(query, max_results=max_results))
+    return [
+        {"title": r.get("title", ""), "url": r.get("href") or r.get("url", ""), "snippet": r.get("body") or r.get("snippet", "")}
+        for r in raw
+    ]
+
+
+def fixture_search(path: str) -> SearchFn:
+    """Offline stand-in serving canned results from a JSON file of {term: [{title, url, snippet}]}."""
+    data = {normalize_term(k): v for k, v in json.loads(Path(path).read_text(encoding="utf-8")).items()}
+
+    def search(query: str, max_results: int) -> List[Dict[str, str]]:
+        normalized = f" {normalize_term(query)} "
+        for term in sorted(data, key=len, reverse=True):  # most specific term first
+            if term and f" {term} " in normalized:
+                return data[term][:max_results]
+        return []
+
+    return search
+
+
+_active: Optional[SearchFn] = None
+
+
+def active_search() -> SearchFn:
+    """The installed search function, the fixture file when configured, else live DuckDuckGo."""
+    if _active is not None:
+        return _active
+    return fixture_search(RESEARCH_SEARCH_FIXTURES) if RESEARCH_SEARCH_FIXTURES else duckduckgo_search
+
+
+@contextmanager
+def use_search(search: Optional[SearchFn]):
+    """Route every research lookup through `search` for the duration of the block."""
+    global _active
+    previous, _active = _active, search
+    try:
+        yield search
+    finally:
+        _active = previous
+
+
+# ---------- Cache ----------
+
+class ResearchCache:
+    """One JSON file per normalized term; entries older than the TTL count as misses and are refetched."""
+
+    def __init__(self, directory: Optional[str] = None, ttl_hours: Optional[float] = None):
+        self.directory = Path(directory or RESEARCH_CACHE_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = (ttl_hours if ttl_hours is not None else RESEARCH_CACHE_TTL_HOURS) * 3600
+        self.hits = self.misses = self.expired = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}.json"
+
+    def get(self, key: str) -> Optional[List[Dict[str, str]]]:
+        try:
+            entry = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        if time.time() - entry.get("fetched", 0) > self.ttl_seconds:
+            with self._lock:
+                self.expired += 1
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry["results"]
+
+    def put(self, key: str, term: str, results: List[Dict[str, str]]):
+        if not results:
+            return  # an empty answer is more likely a search hiccup than a fact worth keeping for a week
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"term": term, "key": key, "fetched": time.time(), "results": results}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "-"
+        return f"Research cache: {self.hits} hit(s), {self.misses} miss(es) ({self.expired} expired), hit rate {rate}."
+
+
+# ---------- Lookups ----------
+
+@dataclass
+class Lookup:
+    term: str
+    key: str
+    results: List[Dict[str, str]] = field(default_factory=list)
+    cached: bool = False
+    error: Optional[str] = None
+
+
+def research_technologies(
+    terms: Sequence[str],
+    cache: Optional[ResearchCache] = None,
+    search: Optional[SearchFn] = None,
+    max_workers: Optional[int] = None,
+) -> List[Lookup]:
+    """Look up each distinct term (first RESEARCH_MAX_TERMS after dedup) concurrently, cache first."""
+    unique: Dict[str, str] = {}
+    for term in terms:
+        key = normalize_term(term)
+        if key and key not in unique:
+            unique[key] = term.strip()
+    items = list(unique.items())[:RESEARCH_MAX_TERMS]
+    search = search or active_search()
+
+    def _lookup(item) -> Lookup:
+        key, term = item
+        if cache is not None:
+            results = cache.get(key)
+            if results is not None:
+                return Lookup(term, key, results, cached=True)
+        try:
+            results = search(RESEARCH_QUERY_TEMPLATE.format(term=term), RESEARCH_MAX_RESULTS)
+        except Exception as e:
+            return Lookup(term, key, error=str(e))
+        if cache is not None:
+            cache.put(key, term, results)
+        return Lookup(term, key, results)
+
+    return fan_out(items, _lookup, max_workers or RESEARCH_MAX_WORKERS)
+
+
+def format_research(lookups: Sequence[Lookup]) -> str:
+    """Research results as a prompt block, one entry per technology."""
+    if not lookups:
+        return "RESEARCH RESULTS:\n(no technology terms extracted)"
+    parts = ["RESEARCH RESULTS (one web lookup per technology):"]
+    for lookup in lookups:
+        parts.append(f"\n### {lookup.term}")
+        if lookup.error or not lookup.results:
+            parts.append(f"(no results{': ' + lookup.error if lookup.error else ''})")
+        for r in lookup.results:
+            parts.append(f"- {r.get('title', '')} <{r.get('url', '')}>: {r.get('snippet', '')}")
+    return "\n".join(parts)
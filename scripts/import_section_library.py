@@ -0,0 +1,121 @@
+"""Import approved proposal sections into the section library.
+
+Accepts saved runs (`.checkpoints/runs/*.json`, which carry section numbers, crosswalk
+requirements, policy pack and customer) and exported proposals (`.md` / `.txt`, including the
+box-drawn `proposal_pretty_*.txt` console exports), splits them into sections and stores each
+one in the SQLite library consulted by the drafting stage. Identical section text is stored once.
+
+Usage
+-----
+python scripts/import_section_library.py output_proposals/ .checkpoints/runs/ --pack US_GOV
+
+Only import proposals that were actually approved or submitted: every stored section becomes
+a starting point for future drafts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from checkpoints import decode  # noqa: E402
+from section_library import SECTION_LIBRARY_PATH, SectionLibrary, customer_type  # noqa: E402
+
+
+UNWANTED_CHARS = "┏┓┗┛┳┻┯┷┴┬┠┨┰┸┞┟┢┡┥┤┬┼┮┾┃│─━═╍╎╏╱╲╳╴╵╶╷╾╿▰▱"
+TRANSLATION_TABLE = str.maketrans("", "", UNWANTED_CHARS)
+HEADING_PATTERN = re.compile(r"^(?:#{1,4}\s+)?(\d+(?:\.\d+)*)\.?\s+([A-Z][^|]{2,100})$")
+MARKDOWN_HEADING_PATTERN = re.compile(r"^#{1,4}\s+(.{3,100})$")
+PAGE_REFERENCE_PATTERN = re.compile(r"\s*\[p+\.[^\]]*\]\s*$")
+SKIPPED_TITLES = ("coverage log", "open questions", "requirement-to-section crosswalk", "table of contents")
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """(title, body) pairs for every numbered or markdown heading in an exported proposal."""
+    sections: List[Tuple[str, List[str]]] = []
+    for raw in text.splitlines():
+        line = raw.translate(TRANSLATION_TABLE).strip()
+        heading = HEADING_PATTERN.match(line) or MARKDOWN_HEADING_PATTERN.match(line)
+        if heading:
+            title = PAGE_REFERENCE_PATTERN.sub("", heading.group(heading.lastindex)).strip()
+            # Console exports wrap long sentences, so a wrapped "2.2 AA and the City's" line is not a heading.
+            looks_like_title = len(title.split()) <= 12 and not title.endswith((":", ";", ",", "’s", "'s"))
+            if looks_like_title and not title.lower().startswith(SKIPPED_TITLES):
+                sections.append((title, [line]))
+                continue
+        if sections:
+            sections[-1][1].append(line)
+    return [(title, re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()) for title, lines in sections]
+
+
+def run_sections(path: Path) -> Iterable[Tuple[str, str, List[str], Optional[str], Optional[str]]]:
+    """(title, body, requirements, pack, customer type) for every section of a saved run snapshot."""
+    artifacts = decode(json.loads(path.read_text(encoding="utf-8"))["artifacts"])
+    pack = artifacts.get("pack")
+    analysis = artifacts.get("rfp_analysis")
+    customer = customer_type(getattr(analysis, "customer", ""), pack) if analysis else None
+    requirements: dict = {}
+    for row in getattr(artifacts.get("crosswalk"), "rows", None) or []:
+        requirements.setdefault((row.section.split() or [""])[0].rstrip("."), []).append(row.requirement)
+    sections = artifacts.get("refined_sections") or artifacts.get("reviewed_sections") or artifacts.get("section_drafts") or []
+    for section in sections:
+        yield section.title, section.content, requirements.get(section.section_number, []), pack, customer
+
+
+def iter_files(paths: Iterable[Path]) -> Iterable[Path]:
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.suffix in (".md", ".txt", ".json"))
+        elif path.exists():
+            yield path
+        else:
+            print(f"⚠️  Not found: {path}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", type=Path, nargs="+", help="Proposal files, saved-run snapshots or directories of them")
+    parser.add_argument("--library", default=SECTION_LIBRARY_PATH, help="Library database (default: SECTION_LIBRARY_PATH)")
+    parser.add_argument("--pack", default=None, help="Policy pack to tag text imports with (saved runs carry their own)")
+    parser.add_argument("--customer-type", default=None, choices=("federal", "state_local", "commercial"),
+                        help="Customer type to tag text imports with (saved runs carry their own)")
+    parser.add_argument("--min-words", type=int, default=60, help="Skip sections shorter than this (default: 60)")
+    parser.add_argument("--max-words", type=int, default=2500,
+                        help="Skip sections longer than this, usually a mis-split export (default: 2500)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    library = SectionLibrary(args.library)
+    added = duplicates = skipped = 0
+    for path in iter_files(args.paths):
+        try:
+            if path.suffix == ".json":
+                entries = list(run_sections(path))
+            else:
+                text = path.read_text(encoding="utf-8", errors="ignore")
+                entries = [(title, body, [], args.pack, args.customer_type) for title, body in split_sections(text)]
+        except (OSError, ValueError, KeyError, LookupError) as err:
+            print(f"⚠️  Skipping {path}: {err}")
+            continue
+        for title, body, requirements, pack, customer in entries:
+            if not args.min_words <= len(body.split()) <= args.max_words:
+                skipped += 1
+                continue
+            if library.add(title, body, requirements, pack=pack, customer_type=customer, source=str(path)):
+                added += 1
+            else:
+                duplicates += 1
+    print(f"📚 Added {added} section(s) to {args.library} ({duplicates} duplicate(s), {skipped} outside the word limits); {len(library)} in the library.")
+    library.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Simulate the rate-limit scheduler against a local fake endpoint that enforces quotas.
+
+Starts an OpenAI-compatible chat completions server on localhost that answers 429 once a
+request would exceed its RPM/TPM quota (enforced over a short window, as providers do), then
+fires a burst of calls through `llm_runtime.run_agent` from critical-path and optional stages.
+Prints achieved throughput against the quota ceiling, 429s seen by the endpoint, retries and
+per-lane latency — once with the scheduler and once without (`--compare`).
+
+Usage
+-----
+python scripts/rate_limit_simulation.py --rpm 1200 --tpm 600000 --calls 300 --compare
+
+No API key or network access is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agno.agent import Agent  # noqa: E402
+
+import llm_runtime  # noqa: E402
+from model_factory import openai_model, pool_summary  # noqa: E402
+from pipeline import stage_scope  # noqa: E402
+from rate_limits import RateLimitScheduler  # noqa: E402
+
+MODEL_ID = "fake-model"
+
+
+class FakeEndpoint:
+    """Sliding-window RPM/TPM enforcement with OpenAI-style 429 responses."""
+
+    def __init__(self, rpm: int, tpm: int, window: float, latency: float, completion_tokens: int):
+        self.rpm, self.tpm, self.window = rpm, tpm, window
+        self.latency, self.completion_tokens = latency, completion_tokens
+        self.served = self.rejected = 0
+        self._log: deque = deque()  # (time, tokens) of accepted requests
+        self._lock = threading.Lock()
+
+    def admit(self, tokens: int) -> float:
+        """0 when the request is accepted, else the seconds until the window frees up."""
+        now = time.monotonic()
+        with self._lock:
+            while self._log and now - self._log[0][0] >= self.window:
+                self._log.popleft()
+            allowed_requests = self.rpm * self.window / 60
+            allowed_tokens = self.tpm * self.window / 60
+            used_tokens = sum(t for _, t in self._log)
+            if len(self._log) + 1 > allowed_requests or (self.tpm and used_tokens + tokens > allowed_tokens):
+                self.rejected += 1
+                return max(0.1, self.window - (now - self._log[0][0])) if self._log else 0.1
+            self._log.append((now, tokens))
+            self.served += 1
+            return 0.0
+
+    def handler(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict, headers: Dict[str, str] = {}):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt_tokens = sum(len(str(m.get("content") or "")) for m in request.get("messages", [])) // 4
+                retry_after = endpoint.admit(prompt_tokens + endpoint.completion_tokens)
+                if retry_after:
+                    self._send(429, {"error": {
+                        "message": f"Rate limit reached for {MODEL_ID}. Please try again in {retry_after:.1f}s.",
+                        "type": "requests", "code": "rate_limit_exceeded",
+                    }}, {"retry-after": f"{retry_after:.1f}"})
+                    return
+                time.sleep(endpoint.latency * random.uniform(0.7, 1.5))
+                self._send(200, {
+                    "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": MODEL_ID,
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": endpoint.completion_tokens,
+                              "total_tokens": prompt_tokens + endpoint.completion_tokens},
+                })
+
+        return Handler
+
+
+def simulate(args: argparse.Namespace, use_scheduler: bool) -> None:
+    endpoint = FakeEndpoint(args.rpm, args.tpm, args.window, args.latency, args.completion_tokens)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), endpoint.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    scheduler = RateLimitScheduler(enabled=use_scheduler, limits={})
+    scheduler.configure(MODEL_ID, rpm=args.rpm, tpm=args.tpm, max_concurrency=args.concurrency)
+    scheduler.set_lane("draft", "critical")
+    scheduler.set_lane("technology", "optional")
+    llm_runtime.scheduler = scheduler
+    llm_runtime.call_stats = llm_runtime.CallStats()
+
+    latencies: Dict[str, List[float]] = {"draft": [], "technology": []}
+    failures = 0
+    lock = threading.Lock()
+    prompt = "Summarize the requirement. " * args.prompt_words
+
+    def one_call(i: int):
+        nonlocal failures
+        stage = "draft" if i % 3 else "technology"
+        agent = Agent(name=stage, model=openai_model(MODEL_ID, api_key="sk-fake", base_url=base_url, max_retries=0))
+        started = time.monotonic()
+        try:
+            with stage_scope(stage, None):
+                llm_runtime.run_agent(agent, prompt)
+        except Exception:
+            with lock:
+                failures += 1
+            return
+        with lock:
+            latencies[stage].append(time.monotonic() - started)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(one_call, range(args.calls)))
+    elapsed = time.monotonic() - started
+    server.shutdown()
+
+    label = "with scheduler" if use_scheduler else "without scheduler"
+    ceiling = min(args.rpm, args.tpm / (len(prompt) // 4 + args.completion_tokens)) if args.tpm else args.rpm
+    print(f"\n📊 {label}: {args.calls} calls in {elapsed:.1f}s")
+    print(f"   throughput {endpoint.served / elapsed * 60:.0f} rpm (quota ceiling ≈ {ceiling:.0f} rpm)")
+    print(f"   endpoint 429s {endpoint.rejected}, failed calls {failures}")
+    print(f"   {llm_runtime.call_stats.summary()}")
+    for stage, values in latencies.items():
+        if values:
+            values.sort()
+            print(f"   {stage:<10} mean {sum(values) / len(values):.1f}s, p95 {values[int(0.95 * (len(values) - 1))]:.1f}s ({len(values)} ok)")
+    if use_scheduler:
+        print(f"   {scheduler.summary()}")
+    print(f"   {pool_summary()}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=1200, help="Requests per minute the endpoint allows (default: 1200)")
+    parser.add_argument("--tpm", type=int, default=600000, help="Tokens per minute the endpoint allows, 0 = none (default: 600000)")
+    parser.add_argument("--window", type=float, default=10, help="Seconds over which the endpoint enforces the quota (default: 10)")
+    parser.add_argument("--calls", type=int, default=300, help="Calls to make (default: 300)")
+    parser.add_argument("--workers", type=int, default=64, help="Concurrent callers (default: 64)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Scheduler's max in-flight calls (default: 32)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean endpoint latency in seconds (default: 0.5)")
+    parser.add_argument("--prompt-words", type=int, default=200, help="Prompt size in repeated phrases (default: 200)")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Completion tokens per reply (default: 200)")
+    parser.add_argument("--compare", action="store_true", help="Also run without the scheduler")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    llm_runtime.LLM_BACKOFF_MAX = min(llm_runtime.LLM_BACKOFF_MAX, args.window)
+    simulate(args, use_scheduler=True)
+    if args.compare:
+        simulate(args, use_scheduler=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Section Library (cross-proposal reuse of approved sections)
+Previously approved proposal sections are stored in a SQLite database (SECTION_LIBRARY_PATH)
+with an FTS5 index over title, requirement text and body, tagged by policy pack and customer
+type. Before drafting, each outline section is looked up: FTS5/BM25 narrows thousands of
+stored sections to a few candidates in milliseconds, and a term-overlap score against the
+section's title and crosswalk requirements decides whether a candidate is close enough
+(SECTION_REUSE_MIN_SCORE, with at least SECTION_MIN_TITLE_SCORE title similarity before requirement
+coverage counts) to adapt instead of drafting from scratch.
+
+Sections are added with `scripts/import_section_library.py` (approved proposal files or saved
+runs); drafts are never added automatically.
+"""
+
+import os, re, time, sqlite3, hashlib, threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from amendments import significant_terms
+
+SECTION_LIBRARY_PATH = os.getenv("SECTION_LIBRARY_PATH", "section_library.sqlite3")
+SECTION_LIBRARY_ENABLED = os.getenv("SECTION_LIBRARY", "1").lower() in ("1", "true", "yes", "on")
+SECTION_REUSE_MIN_SCORE = float(os.getenv("SECTION_REUSE_MIN_SCORE", "0.45"))
+# Title similarity an entry needs before requirement coverage counts toward its score.
+SECTION_MIN_TITLE_SCORE = float(os.getenv("SECTION_MIN_TITLE_SCORE", "0.3"))
+SECTION_LIBRARY_CANDIDATES = int(os.getenv("SECTION_LIBRARY_CANDIDATES", "8"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    requirements TEXT NOT NULL DEFAULT '',
+    body TEXT NOT NULL,
+    pack TEXT,
+    customer_type TEXT,
+    source TEXT,
+    added REAL NOT NULL,
+    content_hash TEXT NOT NULL UNIQUE
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+    title, requirements, body, content='sections', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS sections_ai AFTER INSERT ON sections BEGIN
+    INSERT INTO sections_fts(rowid, title, requirements, body) VALUES (new.id, new.title, new.requirements, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_ad AFTER DELETE ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, title, requirements, body) VALUES ('delete', old.id, old.title, old.requirements, old.body);
+END;
+"""
+
+
+def customer_type(customer: str, pack: Optional[str] = None) -> str:
+    """Coarse buyer category used to tag and filter sections: federal, state_local or commercial."""
+    text = (customer or "").lower()
+    if re.search(r"\b(city|county|state of|municipal|township|school district|commonwealth)\b", text):
+        return "state_local"
+    if pack == "US_GOV" or re.search(r"\b(department|agency|federal|u\.s\.|administration|bureau|dhs|dod|gsa)\b", text):
+        return "federal"
+    return "commercial"
+
+
+@dataclass
+class LibraryMatch:
+    id: int
+    title: str
+    body: str
+    score: float                 # term overlap with the outline section, 0..1
+    pack: Optional[str] = None
+    customer_type: Optional[str] = None
+    source: Optional[str] = None
+
+
+@dataclass
+class ReuseReport:
+    """Which outline sections were adapted from the library and which were drafted fresh."""
+    reused: Dict[str, LibraryMatch] = field(default_factory=dict)
+    fresh: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        total = len(self.reused) + len(self.fresh)
+        lines = [f"{len(self.reused)} of {total} section(s) adapted from the section library, {len(self.fresh)} drafted fresh."]
+        if self.reused:
+            lines += ["", "| Section | Library entry | Score | Source |", "|---|---|---|---|"]
+            for number, m in self.reused.items():
+                lines.append(f"| {number} | {m.title} (#{m.id}) | {m.score:.2f} | {m.source or ''} |")
+        return "\n".join(lines)
+
+
+def _fts_query(terms: Iterable[str]) -> str:
+    # Quote every term so FTS5 operators and punctuation in RFP text are taken literally.
+    return " OR ".join('"' + t.replace('"', "") + '"' for t in sorted(terms) if t.replace('"', ""))
+
+
+def _title_similarity(a: set, b: set) -> float:
+    """Mean of containment and Jaccard, so "SCRM & SBOM Plan" matches a longer title without generic words dominating."""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return (shared / min(len(a), len(b)) + shared / len(a | b)) / 2
+
+
+def match_score(title: str, requirements: Sequence[str], entry_title: str, entry_text: str) -> float:
+    """0..1 closeness of a library entry to an outline section: title similarity, blended with how
+    much of the section's requirement vocabulary the entry already covers when requirements are known.
+    Coverage only counts once the titles are related (SECTION_MIN_TITLE_SCORE), so one shared generic
+    word such as "plan" cannot carry an unrelated entry over the reuse threshold."""
+    title_score = _title_similarity(significant_terms(title), significant_terms(entry_title))
+    required = significant_terms(" ".join(requirements))
+    if not required or title_score < SECTION_MIN_TITLE_SCORE:
+        return title_score
+    coverage = len(required & significant_terms(f"{entry_title} {entry_text}")) / len(required)
+    return 0.6 * title_score + 0.4 * coverage
+
+
+class SectionLibrary:
+    """SQLite/FTS5 store of approved sections; safe to share between threads."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or SECTION_LIBRARY_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+
+    def add(
+        self,
+        title: str,
+        body: str,
+        requirements: Sequence[str] = (),
+        pack: Optional[str] = None,
+        customer_type: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> bool:
+        """Store an approved section; returns False when the same text is already in the library."""
+        digest = hashlib.sha256(" ".join(body.split()).encode("utf-8")).hexdigest()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO sections (title, requirements, body, pack, customer_type, source, added, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (title, "\n".join(requirements), body, pack, customer_type, source, time.time(), digest),
+            )
+        return cursor.rowcount > 0
+
+    def search(
+        self,
+        title: str,
+        guidance: str = "",
+        requirements: Sequence[str] = (),
+        pack: Optional[str] = None,
+        customer_type: Optional[str] = None,
+        limit: int = 3,
+    ) -> List[LibraryMatch]:
+        """Best library entries for one outline section, scored 0..1 and best first."""
+        query_terms = significant_terms(" ".join([title, guidance, *requirements]))
+        fts_query = _fts_query(query_terms)
+        if not fts_query:
+            return []
+        # Untagged entries match any pack/customer type; bm25 weights title > requirements > body.
+        sql = (
+            "SELECT s.id, s.title, s.requirements, s.body, s.pack, s.customer_type, s.source "
+            "FROM sections_fts JOIN sections s ON s.id = sections_fts.rowid "
+            "WHERE sections_fts MATCH ? AND (? IS NULL OR s.pack IS NULL OR s.pack = ?) "
+            "AND (? IS NULL OR s.customer_type IS NULL OR s.customer_type = ?) "
+            "ORDER BY bm25(sections_fts, 5.0, 3.0, 1.0) LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(
+                sql, (fts_query, pack, pack, customer_type, customer_type, SECTION_LIBRARY_CANDIDATES)
+            ).fetchall()
+        matches = []
+        for id_, s_title, s_requirements, body, s_pack, s_customer, source in rows:
+            score = match_score(title, requirements, s_title, f"{s_requirements}\n{body}")
+            matches.append(LibraryMatch(id_, s_title, body, score, s_pack, s_customer, source))
+        return sorted(matches, key=lambda m: -m.score)[:limit]
+
+    def best_match(self, *args, **kwargs) -> Optional[LibraryMatch]:
+        """Closest entry at or above SECTION_REUSE_MIN_SCORE, or None."""
+        matches = self.search(*args, limit=1, **kwargs)
+        return matches[0] if matches and matches[0].score >= SECTION_REUSE_MIN_SCORE else None
+
+    def match_outline(
+        self,
+        sections: Sequence,
+        requirements_by_section: Dict[str, List[str]],
+        pack: Optional[str] = None,
+        customer_type: Optional[str] = None,
+    ) -> ReuseReport:
+        """Best reusable entry for each outline section (section_number/title/content objects)."""
+        report = ReuseReport()
+        for section in sections:
+            match = self.best_match(
+                section.title,
+                section.content or "",
+                requirements_by_section.get(section.section_number, []),
+                pack=pack,
+                customer_type=customer_type,
+            )
+            if match is not None:
+                report.reused[section.section_number] = match
+            else:
+                report.fresh.append(section.section_number)
+        return report
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_library(path: Optional[str] = None) -> Optional[SectionLibrary]:
+    """The section library, or None when reuse is disabled or no library has been imported yet."""
+    path = path or SECTION_LIBRARY_PATH
+    if not SECTION_LIBRARY_ENABLED or not Path(path).exists():
+        return None
+    return SectionLibrary(path)
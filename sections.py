@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Section fan-out helpers
+Run one job per proposal section with bounded concurrency and reassemble results in
+section-number order ("1.2" before "1.10").
+"""
+
+import os, re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pipeline import check_cancelled, current_deadline, current_stage, stage_scope
+
+SECTION_MAX_WORKERS = int(os.getenv("SECTION_MAX_WORKERS", "4"))
+
+
+def section_sort_key(section_number: str) -> Tuple:
+    """Natural sort key for outline numbers such as '2', '2.1', '2.10', 'A.3'."""
+    parts = re.split(r"[.\s]+", str(section_number).strip().rstrip("."))
+    return tuple((0, int(p), "") if p.isdigit() else (1, 0, p.lower()) for p in parts if p)
+
+
+def subsections_of(section_number: str, all_numbers: Sequence[str]) -> List[str]:
+    """Direct and nested children of `section_number` within the outline."""
+    prefix = str(section_number).strip().rstrip(".") + "."
+    return [n for n in all_numbers if str(n).strip().startswith(prefix)]
+
+
+def resolve_section_number(label: Optional[str], titles: Dict[str, str]) -> Optional[str]:
+    """Map a free-form reference ('Section 2.1', '2.1 Staffing', 'Staffing Plan') to an outline number."""
+    if not label:
+        return None
+    text = str(label).strip()
+    for match in re.findall(r"\b(\d+(?:\.\d+)*)\b", text):
+        if match in titles:
+            return match
+    lowered = text.lower()
+    for number, title in titles.items():
+        if title and (title.lower() in lowered or lowered in title.lower()):
+            return number
+    return None
+
+
+def fan_out(items: Sequence[Any], fn: Callable[[Any], Any], max_workers: Optional[int] = None) -> List[Any]:
+    """Apply `fn` to every item concurrently and return results in input order.
+
+    Worker threads inherit the calling pipeline stage and its deadline, so cancelling or timing out
+    the stage stops jobs that have not started yet.
+    """
+    stage_name, cancel_event = current_stage()
+    deadline = current_deadline()
+
+    def _job(item):
+        with stage_scope(stage_name, cancel_event, deadline):
+            check_cancelled()
+            return fn(item)
+
+    if not items:
+        return []
+    workers = max(1, min(max_workers or SECTION_MAX_WORKERS, len(items)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="section") as pool:
+        return list(pool.map(_job, items))
+
+
+EDIT_NOTES_MARKER = "=== EDIT NOTES ==="
+
+
+def split_edit_notes(text: str) -> Tuple[str, str]:
+    """Split a per-section review response into (revised markdown, edit notes)."""
+    body, _, notes = (text or "").partition(EDIT_NOTES_MARKER)
+    return body.strip(), notes.strip()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming JSON (incremental parsing of a model's JSON reply while it is generated)
+`IncrementalJSONParser` is fed the text deltas of a streamed response and calls
+`on_item(key, item)` as soon as each element of a top-level array closes — e.g. every
+`TaskItem` / `Requirement` of the RFP analysis — so downstream work can start on partial data
+while the model is still writing. Prose or a code fence before the first `{` is skipped. An
+element that does not parse on its own is dropped here; the complete reply is still parsed and
+validated (with local repair) once the stream ends, so nothing depends on the partial view.
+"""
+
+import json
+from typing import Any, Callable, Collection, List, Optional
+
+OnItem = Callable[[str, Any], None]
+
+
+class IncrementalJSONParser:
+    """Character-level scanner over a streamed JSON object that emits completed top-level array items."""
+
+    def __init__(self, on_item: OnItem, keys: Optional[Collection[str]] = None):
+        self.on_item = on_item
+        self.keys = set(keys) if keys is not None else None
+        self.text = ""
+        self.emitted = 0
+        self._pos = 0
+        self._stack: List[str] = []   # open containers; [0] is the top-level object
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = ""        # most recent complete string directly in the top-level object
+        self._key: Optional[str] = None
+        self._item_start: Optional[int] = None
+
+    def _in_array(self) -> bool:
+        """True when directly inside the array value of a top-level key."""
+        return len(self._stack) == 2 and self._stack[1] == "["
+
+    def feed(self, delta: str):
+        """Consume the next chunk of the response."""
+        if not delta or self._done:
+            return
+        self.text += delta
+        text, stack = self.text, self._stack
+        while self._pos < len(text) and not self._done:
+            i, ch = self._pos, text[self._pos]
+            self._pos += 1
+            if not stack:
+                if ch == "{":
+                    stack.append(ch)
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(stack) == 1:
+                        self._last_string = text[self._string_start + 1:i]
+                continue
+            if ch == '"':
+                self._in_string, self._string_start = True, i
+                if self._in_array() and self._item_start is None:
+                    self._item_start = i
+            elif ch == ":" and len(stack) == 1:
+                self._key = self._last_string
+            elif ch in "{[":
+                if self._in_array() and self._item_start is None:
+                    self._item_start = i
+                stack.append(ch)
+            elif ch in "}]":
+                stack.pop()
+                if self._item_start is not None and self._in_array():
+                    self._emit(text[self._item_start:i + 1])         # object / array element closed
+                elif self._item_start is not None and len(stack) == 1:
+                    self._emit(text[self._item_start:i])             # last scalar element of the array
+                self._done = not stack
+            elif ch == "," and self._in_array() and self._item_start is not None:
+                self._emit(text[self._item_start:i])                 # scalar element
+            elif self._in_array() and self._item_start is None and not ch.isspace() and ch != ",":
+                self._item_start = i
+
+    def _emit(self, fragment: str):
+        self._item_start = None
+        key = self._key or ""
+        if self.keys is not None and key not in self.keys:
+            return
+        try:
+            item = json.loads(fragment)
+        except ValueError:
+            return
+        self.emitted += 1
+        self.on_item(key, item)
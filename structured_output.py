@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Structured Output (native JSON-schema responses with a prompt-and-parse fallback)
+`ask_json` asks the provider to constrain decoding to the Pydantic schema (agno `output_schema`,
+i.e. OpenAI `response_format: json_schema` with `strict`) whenever the agent's model supports
+it, so the reply is valid JSON by construction and parse-failure retries disappear from the
+critical path. Models without native support keep the prompt-and-parse path, whose schema text
+is rendered once per model class instead of on every call and retry.
+
+STRUCTURED_OUTPUT: `auto` (default; native where the model supports it), `native` (same, but a
+provider rejection is raised instead of falling back) or `prompt` (always prompt-and-parse).
+A schema the provider rejects (HTTP 400, e.g. a free-form dict field under strict mode) is
+remembered per (model, schema) so later calls go straight to the fallback.
+
+agno buffers a native structured response and parses it at the end; `streamed_text` lets it
+stream the JSON text instead (for streaming_json.py), and the caller parses the final content.
+"""
+
+import os, json, functools, threading
+from contextlib import contextmanager
+from typing import Any, Dict, Set, Tuple, Type
+
+from pydantic import BaseModel
+
+STRUCTURED_OUTPUT_MODE = os.getenv("STRUCTURED_OUTPUT", "auto").lower()
+
+_rejected: Set[Tuple[str, str]] = set()
+_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def schema_dict(schema_model: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON Schema of a model class, generated once (treat as read-only)."""
+    return schema_model.model_json_schema()
+
+
+@functools.lru_cache(maxsize=None)
+def schema_prompt(schema_model: Type[BaseModel]) -> str:
+    """Schema block for the prompt-and-parse path, rendered once per model class."""
+    return f"SCHEMA (JSON Schema):\n{json.dumps(schema_dict(schema_model), ensure_ascii=False, indent=2)}"
+
+
+def _key(agent: Any, schema_model: Type[BaseModel]) -> Tuple[str, str]:
+    model = getattr(agent, "model", None)
+    return (f"{type(model).__name__}:{getattr(model, 'id', None)}", schema_model.__qualname__)
+
+
+def native_supported(agent: Any, schema_model: Type[BaseModel]) -> bool:
+    """True when `agent`'s model can return `schema_model` through a native JSON-schema response mode."""
+    if STRUCTURED_OUTPUT_MODE == "prompt" or not hasattr(agent, "run"):
+        return False
+    model = getattr(agent, "model", None)
+    if model is None or not getattr(model, "supports_native_structured_outputs", False):
+        return False
+    with _lock:
+        return _key(agent, schema_model) not in _rejected
+
+
+def record_rejection(agent: Any, schema_model: Type[BaseModel], error: Exception) -> bool:
+    """Remember a provider rejection of the schema; True when later calls should skip the native path."""
+    if getattr(error, "status_code", None) != 400 or STRUCTURED_OUTPUT_MODE == "native":
+        return False
+    with _lock:
+        _rejected.add(_key(agent, schema_model))
+    return True
+
+
+def parse_content(content: Any, schema_model: Type[BaseModel]) -> BaseModel:
+    """Validated `schema_model` from a native response (already parsed) or a cached JSON string."""
+    if isinstance(content, schema_model):
+        return content
+    if isinstance(content, BaseModel):
+        return schema_model.model_validate(content.model_dump())
+    if isinstance(content, dict):
+        return schema_model.model_validate(content)
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError(f"Empty or non-JSON structured response ({type(content).__name__})")
+    return schema_model.model_validate_json(content)
+
+
+@contextmanager
+def streamed_text(agent: Any):
+    """Stream a native structured response as JSON text chunks for the length of the block."""
+    previous = getattr(agent, "parse_response", True)
+    agent.parse_response = False
+    try:
+        yield agent
+    finally:
+        agent.parse_response = previous